@@ -0,0 +1,272 @@
+import json
+import re
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from services.asyncbankingservice import AsyncBankingService
+from services.bankingservice import EXPORT_FORMATS
+from util.dataerror import DataError
+from util.metrics import REGISTRY, REQUEST_DURATION
+from util.requestparser import parse_account_type, parse_account_update, parse_amount, parse_balance_change, \
+    parse_balance_range, parse_names, parse_page_args, parse_transfers
+
+banking_service: Optional[AsyncBankingService] = None
+request_headers: ContextVar[dict] = ContextVar("request_headers", default={})
+
+routes = []
+
+
+def route(path: str, method: str):
+    pattern = re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", path) + "$")
+
+    def register(handler):
+        routes.append((pattern, method, path, handler))
+        return handler
+    return register
+
+
+@route('/metrics', 'GET')
+async def metrics(body: bytes, args: dict):
+    return REGISTRY.render(), 200, {"content-type": "text/plain; version=0.0.4"}
+
+
+@route('/clients', 'POST')
+async def create_client(body: bytes, args: dict):
+    try:
+        first_name, last_name = parse_names(json.loads(body))
+        return await banking_service.create_client(first_name, last_name)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing body of request", 400
+
+
+@route('/clients/bulk', 'POST')
+async def create_clients(body: bytes, args: dict):
+    try:
+        names = [parse_names(json_dict) for json_dict in json.loads(body)]
+        return await banking_service.create_clients(names)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing body of request", 400
+
+
+@route('/clients', 'GET')
+async def get_all_clients(body: bytes, args: dict):
+    try:
+        after, limit, stream = parse_page_args(args)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+    if stream:
+        return banking_service.stream_all_clients(after, limit), 200
+    return await banking_service.get_all_clients(after, limit)
+
+
+@route('/export/<resource>', 'GET')
+async def export(body: bytes, args: dict, resource: str):
+    export_format = args.get("format", "ndjson").lower()
+    if resource == "clients":
+        content, status = banking_service.export_clients(export_format)
+    elif resource == "accounts":
+        content, status = banking_service.export_accounts(export_format)
+    else:
+        return f"Cannot export {resource}, only clients or accounts", 404
+    if status != 200:
+        return content, status
+    return content, status, {"content-type": EXPORT_FORMATS[export_format],
+                             "content-disposition": f"attachment; filename={resource}.{export_format}"}
+
+
+@route('/clients/<client_id>', 'GET')
+async def get_client(body: bytes, args: dict, client_id: str):
+    try:
+        return await banking_service.get_client(int(client_id), request_headers.get().get("if-none-match"))
+    except Exception as e:
+        print(str(e))
+        return "Error parsing body of request", 400
+
+
+@route('/clients/<client_id>', 'PUT')
+async def update_client(body: bytes, args: dict, client_id: str):
+    try:
+        f_name, l_name = parse_names(json.loads(body))
+        return await banking_service.update_client(int(client_id), f_name, l_name)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>', 'DELETE')
+async def delete_client(body: bytes, args: dict, client_id: str):
+    try:
+        return await banking_service.remove_client(int(client_id))
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts', 'POST')
+async def create_account(body: bytes, args: dict, client_id: str):
+    try:
+        return await banking_service.create_account(int(client_id), parse_account_type(json.loads(body)))
+    except DataError as e:
+        return str(e), 400
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts/bulk', 'POST')
+async def create_accounts(body: bytes, args: dict, client_id: str):
+    try:
+        account_types = [parse_account_type(json_dict) for json_dict in json.loads(body)]
+        return await banking_service.create_accounts(int(client_id), account_types)
+    except DataError as e:
+        return str(e), 400
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts', 'GET')
+async def get_accounts(body: bytes, args: dict, client_id: str):
+    try:
+        min_bal, max_bal = parse_balance_range(args)
+        after, limit, stream = parse_page_args(args)
+        if stream:
+            return await banking_service.stream_accounts(int(client_id), min_bal, max_bal, after, limit)
+        return await banking_service.get_accounts(int(client_id), min_bal, max_bal, after, limit)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts/transfers', 'PATCH')
+async def transfer_balance_batch(body: bytes, args: dict, client_id: str):
+    try:
+        transfers, atomic = parse_transfers(json.loads(body))
+        return await banking_service.transfer_funds_batch(int(client_id), transfers, atomic)
+    except DataError as e:
+        return str(e), 400
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts/<account_id>', 'GET')
+async def get_account(body: bytes, args: dict, client_id: str, account_id: str):
+    try:
+        return await banking_service.get_account(int(client_id), int(account_id),
+                                                 request_headers.get().get("if-none-match"))
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts/<account_id>', 'PUT')
+async def update_account(body: bytes, args: dict, client_id: str, account_id: str):
+    try:
+        account_type, balance = parse_account_update(json.loads(body))
+        return await banking_service.update_account(int(client_id), int(account_id), account_type, balance)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts/<account_id>', 'DELETE')
+async def delete_account(body: bytes, args: dict, client_id: str, account_id: str):
+    try:
+        return await banking_service.remove_account(int(client_id), int(account_id))
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts/<account_id>', 'PATCH')
+async def update_balance(body: bytes, args: dict, client_id: str, account_id: str):
+    try:
+        total = parse_balance_change(json.loads(body))
+        return await banking_service.update_balance(int(client_id), int(account_id), total)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@route('/clients/<client_id>/accounts/<account_from_id>/transfer/<account_to_id>', 'PATCH')
+async def transfer_balance(body: bytes, args: dict, client_id: str, account_from_id: str, account_to_id: str):
+    try:
+        funds = parse_amount(json.loads(body))
+        return await banking_service.transfer_funds(int(client_id), int(account_from_id), int(account_to_id), funds)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+async def read_body(receive) -> bytes:
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def start_service() -> None:
+    global banking_service
+    if banking_service is None:
+        banking_service = AsyncBankingService()
+
+
+async def lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await start_service()
+                await send({"type": "lifespan.startup.complete"})
+            except Exception as e:
+                print(str(e))
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+        elif message["type"] == "lifespan.shutdown":
+            if banking_service is not None:
+                await banking_service.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    await start_service()
+    started = perf_counter()
+    body = await read_body(receive)
+    args = dict(parse_qsl(scope.get("query_string", b"").decode()))
+    request_headers.set({k.decode().lower(): v.decode() for k, v in scope.get("headers", [])})
+    result = "Not Found", 404
+    matched = "unmatched"
+    for pattern, method, path, handler in routes:
+        match = pattern.match(scope["path"])
+        if match is not None and method == scope["method"]:
+            matched = path
+            result = await handler(body, args, **match.groupdict())
+            break
+    content, status = result[0], result[1]
+    headers = [(k.encode(), v.encode()) for k, v in (result[2] if len(result) > 2 else {}).items()]
+    typed = any(k == b"content-type" for k, _ in headers)
+    if isinstance(content, str):
+        if not typed:
+            headers.append((b"content-type", b"text/html; charset=utf-8"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content.encode()})
+    else:
+        if not typed:
+            headers.append((b"content-type", b"application/json"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        async for chunk in content:
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    REQUEST_DURATION.observe(perf_counter() - started, scope["method"], matched, str(status))
@@ -0,0 +1,189 @@
+import argparse
+import json
+import math
+import random
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from time import perf_counter
+from typing import Callable, Optional
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from util.databasedriver import statement_count
+
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def route_of(method: str, path: str) -> str:
+    return f"{method} {ID_SEGMENT.sub('/<id>', path.split('?')[0])}"
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    if len(ordered) == 0:
+        return 0.0
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def load_requests(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip() != ""]
+
+
+def http_sender(base_url: str) -> Callable[[dict], tuple[int, bytes, Optional[int]]]:
+    def send(request: dict) -> tuple[int, bytes, Optional[int]]:
+        body = None if request.get("body") is None else json.dumps(request["body"]).encode()
+        http_request = Request(base_url.rstrip("/") + request["path"], data=body, method=request["method"],
+                               headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(http_request) as response:
+                return response.status, response.read(), None
+        except HTTPError as e:
+            return e.code, e.read(), None
+    return send
+
+
+def in_process_sender() -> Callable[[dict], tuple[int, bytes, Optional[int]]]:
+    from server import app
+    clients = local()
+
+    def send(request: dict) -> tuple[int, bytes, Optional[int]]:
+        if getattr(clients, "client", None) is None:
+            clients.client = app.test_client()
+        body = None if request.get("body") is None else json.dumps(request["body"])
+        before = statement_count()
+        response = clients.client.open(request["path"], method=request["method"], data=body)
+        data = response.get_data()
+        return response.status_code, data, statement_count() - before
+    return send
+
+
+def synthetic_requests(send: Callable[[dict], tuple[int, bytes, Optional[int]]], clients: int, count: int,
+                       seed: int) -> list[dict]:
+    owners = {}
+    for i in range(clients):
+        status, data, _ = send({"method": "POST", "path": "/clients",
+                                "body": {"firstName": f"Bench{i}", "lastName": "Client"}})
+        if status != 201:
+            raise RuntimeError(f"Failed creating benchmark client: {status} {data[:200]!r}")
+        client_id = json.loads(data)["identification"]
+        status, data, _ = send({"method": "POST", "path": f"/clients/{client_id}/accounts/bulk",
+                                "body": [{"accountType": "checking"}, {"accountType": "savings"}]})
+        if status != 201:
+            raise RuntimeError(f"Failed creating benchmark accounts: {status} {data[:200]!r}")
+        owners[client_id] = [account["accountId"] for account in json.loads(data)]
+        for account_id in owners[client_id]:
+            send({"method": "PATCH", "path": f"/clients/{client_id}/accounts/{account_id}",
+                  "body": {"deposit": 1000000}})
+    rng = random.Random(seed)
+    mix = [(25, lambda c, a: {"method": "GET", "path": f"/clients/{c}"}),
+           (25, lambda c, a: {"method": "GET", "path": f"/clients/{c}/accounts"}),
+           (15, lambda c, a: {"method": "GET", "path": f"/clients/{c}/accounts/{a[0]}"}),
+           (15, lambda c, a: {"method": "PATCH", "path": f"/clients/{c}/accounts/{a[0]}", "body": {"deposit": 1}}),
+           (10, lambda c, a: {"method": "PATCH", "path": f"/clients/{c}/accounts/{a[0]}/transfer/{a[1]}",
+                              "body": {"amount": 1}}),
+           (10, lambda c, a: {"method": "GET", "path": "/clients?limit=50"})]
+    weights = [weight for weight, _ in mix]
+    requests = []
+    for _ in range(count):
+        client_id = rng.choice(list(owners))
+        build = rng.choices([builder for _, builder in mix], weights)[0]
+        requests.append(build(client_id, owners[client_id]))
+    return requests
+
+
+def replay(send: Callable[[dict], tuple[int, bytes, Optional[int]]], requests: list[dict],
+           concurrency: int) -> dict:
+    samples: dict[str, list[tuple[float, int, Optional[int]]]] = {}
+
+    def run(request: dict) -> tuple[str, float, int, Optional[int]]:
+        started = perf_counter()
+        status, _, queries = send(request)
+        return route_of(request["method"], request["path"]), perf_counter() - started, status, queries
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for route, elapsed, status, queries in executor.map(run, requests):
+            samples.setdefault(route, []).append((elapsed, status, queries))
+    duration = perf_counter() - started
+    routes = {}
+    for route, results in sorted(samples.items()):
+        latencies = [elapsed * 1000 for elapsed, _, _ in results]
+        statuses = {}
+        for _, status, _ in results:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        queries = [count for _, _, count in results if count is not None]
+        routes[route] = {"count": len(results),
+                         "p50_ms": round(percentile(latencies, 0.50), 3),
+                         "p95_ms": round(percentile(latencies, 0.95), 3),
+                         "p99_ms": round(percentile(latencies, 0.99), 3),
+                         "mean_ms": round(sum(latencies) / len(latencies), 3),
+                         "statuses": statuses,
+                         "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None}
+    return {"requests": len(requests),
+            "concurrency": concurrency,
+            "duration_s": round(duration, 3),
+            "throughput_rps": round(len(requests) / duration, 1) if duration > 0 else None,
+            "errors": sum(count for route in routes.values()
+                          for status, count in route["statuses"].items() if int(status) >= 500),
+            "routes": routes}
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    lines = []
+    for route, stats in results["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if previous is None or previous["p95_ms"] == 0:
+            continue
+        lines.append(f"{route}: p95 {previous['p95_ms']} -> {stats['p95_ms']} ms "
+                     f"({stats['p95_ms'] / previous['p95_ms']:.2f}x)")
+    return lines
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay",
+                                     description="Replay a request mix against the banking service")
+    parser.add_argument("--requests", help="JSON lines file of {method, path, body} requests to replay")
+    parser.add_argument("--url", help="base URL of a running server, the Flask app runs in-process when omitted")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--count", type=int, default=1000, help="number of synthetic requests")
+    parser.add_argument("--clients", type=int, default=20, help="number of synthetic clients to create")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare p95 latencies against")
+    args = parser.parse_args()
+
+    send = http_sender(args.url) if args.url else in_process_sender()
+    if args.requests:
+        requests = load_requests(args.requests)
+    else:
+        requests = synthetic_requests(send, args.clients, args.count, args.seed)
+    results = replay(send, requests, args.concurrency)
+    results["mode"] = "http" if args.url else "in-process"
+    results["commit"] = current_commit()
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    if args.baseline:
+        with open(args.baseline) as f:
+            for line in compare(results, json.load(f)):
+                print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,47 @@
+import json
 from abc import ABC, abstractmethod
+from typing import Iterator, Optional
 
 from daos.bankaccountdao import BankAccountDAO
 from entities.accountholder import AccountHolder
+from util.databasedriver import DatabaseDriver
 from util.dataerror import DataError
 from util.nosuchelementerror import NoSuchElementError
-from util.postgresdb import PostgresDB
+
+
+def client_select_sql(holders_table: str, accounts_table: str, dialect: str) -> str:
+    # each selected holder collects its accounts through the owner index, so a page never joins the whole table
+    if dialect == "sqlite":
+        accounts = f"SELECT json_group_array(account_id) FROM {accounts_table} WHERE owner_id = h.user_id"
+    else:
+        accounts = f"SELECT COALESCE(array_agg(account_id ORDER BY account_id), '{{}}') " \
+                   f"FROM {accounts_table} WHERE owner_id = h.user_id"
+    return f"SELECT h.first_name, h.last_name, h.user_id, ({accounts}) FROM {holders_table} h"
+
+
+def client_sql(holders_table: str, accounts_table: str, dialect: str) -> dict[str, str]:
+    return {
+        "insert": f"INSERT INTO {holders_table} (first_name, last_name) values (%s, %s) returning user_id;",
+        "insert_values": f"INSERT INTO {holders_table} (first_name, last_name) VALUES %s "
+                         f"RETURNING first_name, last_name, user_id;",
+        "save": f"UPDATE {holders_table} SET first_name = %s, last_name = %s WHERE user_id = %s returning user_id;",
+        "delete": f"DELETE FROM {holders_table} WHERE user_id = %s returning user_id;",
+        "load": f"{client_select_sql(holders_table, accounts_table, dialect)} WHERE h.user_id = %s;",
+    }
+
+
+def client_page_sql(holders_table: str, accounts_table: str, dialect: str, after: Optional[int],
+                    limit: Optional[int]) -> tuple[str, list]:
+    sql = client_select_sql(holders_table, accounts_table, dialect)
+    variables = []
+    if after is not None:
+        sql += " WHERE h.user_id > %s"
+        variables.append(after)
+    sql += " ORDER BY h.user_id"
+    if limit is not None:
+        sql += " LIMIT %s"
+        variables.append(limit)
+    return sql + ";", variables
 
 
 class AccountHolderDAOInterface(ABC):
@@ -13,6 +50,10 @@ class AccountHolderDAOInterface(ABC):
     def create_record(self, user: AccountHolder) -> AccountHolder:
         pass
 
+    @abstractmethod
+    def create_records(self, users: list[AccountHolder]) -> list[AccountHolder]:
+        pass
+
     @abstractmethod
     def save_record(self, user: AccountHolder) -> None:
         pass
@@ -26,27 +67,27 @@ class AccountHolderDAOInterface(ABC):
         pass
 
     @abstractmethod
-    def load_all_objects(self) -> dict[int, AccountHolder]:
+    def load_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, AccountHolder]:
+        pass
+
+    @abstractmethod
+    def stream_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[AccountHolder]:
         pass
 
 
 class AccountHolderDAO(AccountHolderDAOInterface):
 
-    def __init__(self, database: PostgresDB, table_name_p: str, table_name_s):
-        self.__database: PostgresDB = database
+    def __init__(self, database: DatabaseDriver, table_name_p: str, table_name_s):
+        self.__database: DatabaseDriver = database
         self.__table_name = table_name_p
         self.__table_name_s = table_name_s
-        sql = f"CREATE TABLE IF NOT EXISTS {self.__table_name} ( " \
-              f"first_name varchar(50), " \
-              f"last_name varchar(50), " \
-              f"user_id int primary key generated always as identity );"
-        self.__database.execute(sql)
-        self.__database.commit()
+        self.__sqlite = self.__database.get_dialect() == "sqlite"
+        self.__sql = client_sql(self.__table_name, self.__table_name_s, self.__database.get_dialect())
         self.__account_dao = BankAccountDAO(self.__database, self.__table_name_s)
 
     def create_record(self, user: AccountHolder) -> AccountHolder:
-        sql = f"INSERT INTO {self.__table_name} (first_name, last_name) values (%s, %s) returning user_id;"
-        result = self.__database.execute(sql, [user.get_first_name(), user.get_last_name()])
+        result = self.__database.execute_prepared(f"{self.__table_name}_insert", self.__sql["insert"],
+                                                  [user.get_first_name(), user.get_last_name()])
         if len(result) == 0:
             self.__database.rollback()
             raise DataError(f"Failed creating client in database with id {user.get_user_id()}")
@@ -54,9 +95,20 @@ class AccountHolderDAO(AccountHolderDAOInterface):
             self.__database.commit()
         return self.load_object(result[0][0])
 
+    def create_records(self, users: list[AccountHolder]) -> list[AccountHolder]:
+        if len(users) == 0:
+            return []
+        results = self.__database.execute_values(self.__sql["insert_values"],
+                                                 [[user.get_first_name(), user.get_last_name()] for user in users])
+        if len(results) != len(users):
+            self.__database.rollback()
+            raise DataError(f"Failed creating {len(users)} clients in database")
+        self.__database.commit()
+        return [AccountHolder(result[0], result[1], result[2]) for result in results]
+
     def save_record(self, user: AccountHolder) -> None:
-        sql = f"UPDATE {self.__table_name} SET first_name = %s, last_name = %s WHERE user_id = %s returning user_id;"
-        results = self.__database.execute(sql, [user.get_first_name(), user.get_last_name(), user.get_user_id()])
+        results = self.__database.execute_prepared(f"{self.__table_name}_save", self.__sql["save"],
+                                                   [user.get_first_name(), user.get_last_name(), user.get_user_id()])
         if len(results) == 0:
             self.__database.rollback()
             raise DataError(f"Failed updating client in database with id {user.get_user_id()}")
@@ -67,8 +119,7 @@ class AccountHolderDAO(AccountHolderDAOInterface):
         client = self.load_object(client_id)
         for account in client.get_accounts():
             self.__account_dao.delete_record(account)
-        sql = f"DELETE FROM {self.__table_name} WHERE user_id = %s returning user_id;"
-        results = self.__database.execute(sql, [client_id])
+        results = self.__database.execute(self.__sql["delete"], [client_id])
         if len(results) == 0:
             self.__database.rollback()
             raise NoSuchElementError(f"Failed deleting client {client_id}")
@@ -76,20 +127,29 @@ class AccountHolderDAO(AccountHolderDAOInterface):
             self.__database.commit()
 
     def load_object(self, client_id: int) -> AccountHolder:
-        sql = f"SELECT * FROM {self.__table_name} WHERE user_id = %s;"
-        results = self.__database.execute(sql, [client_id])
+        results = self.__database.execute_prepared(f"{self.__table_name}_load", self.__sql["load"], [client_id])
         if len(results) == 0:
             raise NoSuchElementError(f"No clients found for query on client id {client_id}")
         result = results[0]
-        accounts = self.__account_dao.load_objects(result[2])
-        return AccountHolder(result[0], result[1], result[2], [account.get_account_id()
-                                                               for account in accounts.values()
-                                                               if account.get_owner_id() == result[2]])
-
-    def load_all_objects(self) -> dict[int, AccountHolder]:
-        sql = f"SELECT * FROM {self.__table_name};"
-        sql_results = self.__database.execute(sql)
+        return AccountHolder(result[0], result[1], result[2], self.__account_ids(result[3]))
+
+    def load_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, AccountHolder]:
+        sql, variables = client_page_sql(self.__table_name, self.__table_name_s, self.__database.get_dialect(),
+                                         after, limit)
+        variant = "".join("0" if value is None else "1" for value in (after, limit))
+        sql_results = self.__database.execute_prepared(f"{self.__table_name}_load_all_{variant}", sql, variables)
         account_holders = {}
         for result in sql_results:
-            account_holders[result[2]] = self.load_object(result[2])
+            account_holders[result[2]] = AccountHolder(result[0], result[1], result[2], self.__account_ids(result[3]))
         return account_holders
+
+    def stream_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[AccountHolder]:
+        sql, variables = client_page_sql(self.__table_name, self.__table_name_s, self.__database.get_dialect(),
+                                         after, limit)
+        for result in self.__database.stream(sql, variables):
+            yield AccountHolder(result[0], result[1], result[2], self.__account_ids(result[3]))
+
+    def __account_ids(self, accounts) -> list[int]:
+        if self.__sqlite:
+            return sorted(json.loads(accounts))
+        return list(accounts)
@@ -0,0 +1,115 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+from daos.accountholderdao import client_page_sql, client_sql
+from daos.asyncbankaccountdao import AsyncBankAccountDAO
+from entities.accountholder import AccountHolder
+from util.asyncpostgresdb import AsyncPostgresDB
+from util.dataerror import DataError
+from util.nosuchelementerror import NoSuchElementError
+
+
+class AsyncAccountHolderDAOInterface(ABC):
+
+    @abstractmethod
+    async def create_record(self, user: AccountHolder) -> AccountHolder:
+        pass
+
+    @abstractmethod
+    async def create_records(self, users: list[AccountHolder]) -> list[AccountHolder]:
+        pass
+
+    @abstractmethod
+    async def save_record(self, user: AccountHolder) -> None:
+        pass
+
+    @abstractmethod
+    async def delete_record(self, client_id: int) -> None:
+        pass
+
+    @abstractmethod
+    async def load_object(self, client_id: int) -> AccountHolder:
+        pass
+
+    @abstractmethod
+    async def load_all_objects(self, after: Optional[int] = None,
+                               limit: Optional[int] = None) -> dict[int, AccountHolder]:
+        pass
+
+    @abstractmethod
+    def stream_all_objects(self, after: Optional[int] = None,
+                           limit: Optional[int] = None) -> AsyncIterator[AccountHolder]:
+        pass
+
+
+class AsyncAccountHolderDAO(AsyncAccountHolderDAOInterface):
+
+    def __init__(self, database: AsyncPostgresDB, table_name_p: str, table_name_s):
+        self.__database: AsyncPostgresDB = database
+        self.__table_name = table_name_p
+        self.__table_name_s = table_name_s
+        self.__sql = client_sql(self.__table_name, self.__table_name_s, "postgres")
+        self.__account_dao = AsyncBankAccountDAO(self.__database, self.__table_name_s)
+
+    async def create_record(self, user: AccountHolder) -> AccountHolder:
+        result = await self.__database.execute(self.__sql["insert"], [user.get_first_name(), user.get_last_name()])
+        if len(result) == 0:
+            self.__database.rollback()
+            raise DataError(f"Failed creating client in database with id {user.get_user_id()}")
+        else:
+            self.__database.commit()
+        return await self.load_object(result[0][0])
+
+    async def create_records(self, users: list[AccountHolder]) -> list[AccountHolder]:
+        if len(users) == 0:
+            return []
+        results = await self.__database.execute_values(self.__sql["insert_values"],
+                                                       [[user.get_first_name(), user.get_last_name()]
+                                                        for user in users])
+        if len(results) != len(users):
+            self.__database.rollback()
+            raise DataError(f"Failed creating {len(users)} clients in database")
+        self.__database.commit()
+        return [AccountHolder(result[0], result[1], result[2]) for result in results]
+
+    async def save_record(self, user: AccountHolder) -> None:
+        results = await self.__database.execute(self.__sql["save"],
+                                                [user.get_first_name(), user.get_last_name(), user.get_user_id()])
+        if len(results) == 0:
+            self.__database.rollback()
+            raise DataError(f"Failed updating client in database with id {user.get_user_id()}")
+        else:
+            self.__database.commit()
+
+    async def delete_record(self, client_id: int) -> None:
+        client = await self.load_object(client_id)
+        for account in client.get_accounts():
+            await self.__account_dao.delete_record(account)
+        results = await self.__database.execute(self.__sql["delete"], [client_id])
+        if len(results) == 0:
+            self.__database.rollback()
+            raise NoSuchElementError(f"Failed deleting client {client_id}")
+        else:
+            self.__database.commit()
+
+    async def load_object(self, client_id: int) -> AccountHolder:
+        results = await self.__database.execute(self.__sql["load"], [client_id])
+        if len(results) == 0:
+            raise NoSuchElementError(f"No clients found for query on client id {client_id}")
+        result = results[0]
+        return AccountHolder(result[0], result[1], result[2], list(result[3]))
+
+    async def load_all_objects(self, after: Optional[int] = None,
+                               limit: Optional[int] = None) -> dict[int, AccountHolder]:
+        sql, variables = client_page_sql(self.__table_name, self.__table_name_s, "postgres", after, limit)
+        sql_results = await self.__database.execute(sql, variables)
+        account_holders = {}
+        for result in sql_results:
+            account_holders[result[2]] = AccountHolder(result[0], result[1], result[2], list(result[3]))
+        return account_holders
+
+    async def stream_all_objects(self, after: Optional[int] = None,
+                                 limit: Optional[int] = None) -> AsyncIterator[AccountHolder]:
+        sql, variables = client_page_sql(self.__table_name, self.__table_name_s, "postgres", after, limit)
+        async for result in self.__database.stream(sql, variables):
+            yield AccountHolder(result[0], result[1], result[2], list(result[3]))
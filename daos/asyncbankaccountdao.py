@@ -0,0 +1,205 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+from daos.bankaccountdao import account_from_row, account_lock_sql, account_page_sql, account_sql, plan_transfers
+from entities.bankaccount import BankAccount
+from util.asyncpostgresdb import AsyncPostgresDB
+from util.dataerror import DataError
+from util.insufficientfundserror import InsufficientFundsError
+from util.nosuchelementerror import NoSuchElementError
+from util.staleversionerror import StaleVersionError
+
+
+class AsyncBankAccountDAOInterface(ABC):
+
+    @abstractmethod
+    async def create_record(self, account: BankAccount) -> BankAccount:
+        pass
+
+    @abstractmethod
+    async def create_records(self, accounts: list[BankAccount]) -> list[BankAccount]:
+        pass
+
+    @abstractmethod
+    async def save_record(self, account: BankAccount) -> None:
+        pass
+
+    @abstractmethod
+    async def update_balance(self, account_id: int, owner_id: int, amount: float) -> BankAccount:
+        pass
+
+    @abstractmethod
+    async def transfer_balance(self, owner_id: int, transfer_from: int, transfer_to: int,
+                               amount: float) -> tuple[BankAccount, BankAccount]:
+        pass
+
+    @abstractmethod
+    async def transfer_balances(self, owner_id: int, transfers: list[tuple[int, int, float]],
+                                atomic: bool) -> list[Optional[Exception]]:
+        pass
+
+    @abstractmethod
+    async def delete_record(self, account_id: int) -> None:
+        pass
+
+    @abstractmethod
+    async def load_object(self, account_id: int) -> BankAccount:
+        pass
+
+    @abstractmethod
+    async def load_version(self, account_id: int) -> tuple[int, int]:
+        pass
+
+    @abstractmethod
+    async def load_objects(self, owner_id: int, min_balance: Optional[float] = None,
+                           max_balance: Optional[float] = None, after: Optional[int] = None,
+                           limit: Optional[int] = None) -> dict[int, BankAccount]:
+        pass
+
+    @abstractmethod
+    def stream_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[BankAccount]:
+        pass
+
+    @abstractmethod
+    async def load_all_objects(self) -> dict[int, BankAccount]:
+        pass
+
+    @abstractmethod
+    def stream_all_objects(self) -> AsyncIterator[BankAccount]:
+        pass
+
+
+class AsyncBankAccountDAO(AsyncBankAccountDAOInterface):
+
+    def __init__(self, database: AsyncPostgresDB, table_name: str):
+        self.__database: AsyncPostgresDB = database
+        self.__table_name = table_name
+        self.__sql = account_sql(self.__table_name)
+
+    async def create_record(self, account: BankAccount) -> BankAccount:
+        result = await self.__database.execute(self.__sql["insert"], [account.get_owner_id(),
+                                                                      account.get_account_type(),
+                                                                      account.get_balance()])
+        if len(result) == 0:
+            self.__database.rollback()
+            raise DataError(f"Failed creating account in database with id {account.get_account_id()}")
+        else:
+            self.__database.commit()
+        return await self.load_object(result[0][0])
+
+    async def create_records(self, accounts: list[BankAccount]) -> list[BankAccount]:
+        if len(accounts) == 0:
+            return []
+        results = await self.__database.execute_values(self.__sql["insert_values"],
+                                                       [[account.get_owner_id(),
+                                                         account.get_account_type(),
+                                                         account.get_balance()] for account in accounts])
+        if len(results) != len(accounts):
+            self.__database.rollback()
+            raise DataError(f"Failed creating {len(accounts)} accounts in database")
+        self.__database.commit()
+        return [account_from_row(result) for result in results]
+
+    async def save_record(self, account: BankAccount) -> None:
+        result = await self.__database.execute(self.__sql["save"], [account.get_account_type(),
+                                                                    account.get_balance(),
+                                                                    account.get_account_id(),
+                                                                    account.get_version(),
+                                                                    account.get_version()])
+        if len(result) == 0:
+            self.__database.rollback()
+            try:
+                await self.load_version(account.get_account_id())
+            except NoSuchElementError:
+                raise DataError(f"Failed creating account in database with id {account.get_account_id()}")
+            raise StaleVersionError(f"Account {account.get_account_id()} was changed by another request")
+        else:
+            self.__database.commit()
+
+    async def update_balance(self, account_id: int, owner_id: int, amount: float) -> BankAccount:
+        results = await self.__database.execute(self.__sql["update_balance"], [amount, account_id, owner_id, amount])
+        if len(results) == 0:
+            self.__database.rollback()
+            if (await self.load_object(account_id)).get_owner_id() != owner_id:
+                raise NoSuchElementError(f"This client does not own account {account_id}")
+            raise InsufficientFundsError(f"Insufficient funds transfer to/from account {account_id}")
+        self.__database.commit()
+        return account_from_row(results[0])
+
+    async def transfer_balance(self, owner_id: int, transfer_from: int, transfer_to: int,
+                               amount: float) -> tuple[BankAccount, BankAccount]:
+        async with self.__database.transaction():
+            sql = account_lock_sql(self.__table_name, "postgres", 2)
+            locked = {result[3]: result for result in await self.__database.execute(sql, [transfer_from, transfer_to])}
+            errors, _ = plan_transfers(owner_id, [(transfer_from, transfer_to, amount)], locked)
+            if errors[0] is not None:
+                raise errors[0]
+            results = await self.__database.execute(self.__sql["transfer"],
+                                                    [transfer_from, -amount, amount, transfer_from, transfer_to])
+            if len(results) != 2:
+                self.__database.rollback()
+                raise DataError(f"Failed transferring funds from account {transfer_from} to {transfer_to}")
+            self.__database.commit()
+        accounts = {result[3]: account_from_row(result) for result in results}
+        return accounts[transfer_from], accounts[transfer_to]
+
+    async def transfer_balances(self, owner_id: int, transfers: list[tuple[int, int, float]],
+                                atomic: bool) -> list[Optional[Exception]]:
+        account_ids = sorted({account_id for transfer in transfers for account_id in transfer[:2]})
+        if len(account_ids) == 0:
+            return []
+        async with self.__database.transaction():
+            sql = account_lock_sql(self.__table_name, "postgres", len(account_ids))
+            locked = {result[3]: result for result in await self.__database.execute(sql, account_ids)}
+            errors, deltas = plan_transfers(owner_id, transfers, locked)
+            if len(deltas) == 0 or (atomic and any(error is not None for error in errors)):
+                return errors
+            results = await self.__database.execute_values(self.__sql["transfer_values"],
+                                                           [[account_id, float(delta)]
+                                                            for account_id, delta in deltas.items()])
+            if len(results) != len(deltas):
+                self.__database.rollback()
+                raise DataError(f"Failed applying {len(transfers)} transfers for client {owner_id}")
+            self.__database.commit()
+        return errors
+
+    async def delete_record(self, account_id: int) -> None:
+        results = await self.__database.execute(self.__sql["delete"], [account_id])
+        if len(results) == 0:
+            self.__database.rollback()
+            raise NoSuchElementError(f"Couldn't find account with id {account_id}")
+        else:
+            self.__database.commit()
+
+    async def load_object(self, account_id: int) -> BankAccount:
+        results = await self.__database.execute(self.__sql["load"], [account_id])
+        if len(results) == 0:
+            raise NoSuchElementError(f"No accounts found for query on account id {account_id}")
+        return account_from_row(results[0])
+
+    async def load_version(self, account_id: int) -> tuple[int, int]:
+        results = await self.__database.execute(self.__sql["load_version"], [account_id])
+        if len(results) == 0:
+            raise NoSuchElementError(f"No accounts found for query on account id {account_id}")
+        return results[0][0], results[0][1]
+
+    async def load_objects(self, owner_id: int, min_balance: Optional[float] = None,
+                           max_balance: Optional[float] = None, after: Optional[int] = None,
+                           limit: Optional[int] = None) -> dict[int, BankAccount]:
+        sql, variables = account_page_sql(self.__table_name, owner_id, min_balance, max_balance, after, limit)
+        return {result[3]: account_from_row(result) for result in await self.__database.execute(sql, variables)}
+
+    async def stream_objects(self, owner_id: int, min_balance: Optional[float] = None,
+                             max_balance: Optional[float] = None, after: Optional[int] = None,
+                             limit: Optional[int] = None) -> AsyncIterator[BankAccount]:
+        sql, variables = account_page_sql(self.__table_name, owner_id, min_balance, max_balance, after, limit)
+        async for result in self.__database.stream(sql, variables):
+            yield account_from_row(result)
+
+    async def load_all_objects(self) -> dict[int, BankAccount]:
+        return {result[3]: account_from_row(result) for result in await self.__database.execute(self.__sql["load_all"])}
+
+    async def stream_all_objects(self) -> AsyncIterator[BankAccount]:
+        async for result in self.__database.stream(self.__sql["load_all"]):
+            yield account_from_row(result)
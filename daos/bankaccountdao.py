@@ -1,8 +1,95 @@
 from abc import ABC, abstractmethod
+from typing import Iterator, Optional
 from entities.bankaccount import BankAccount
+from util.databasedriver import DatabaseDriver
 from util.dataerror import DataError
+from util.insufficientfundserror import InsufficientFundsError
 from util.nosuchelementerror import NoSuchElementError
-from util.postgresdb import PostgresDB
+from util.staleversionerror import StaleVersionError
+
+
+def account_sql(table_name: str) -> dict[str, str]:
+    # VALUES columns are addressed as column1/column2, the default names in both PostgreSQL and SQLite
+    return {
+        "insert": f"INSERT INTO {table_name} (owner_id, account_type, balance) VALUES (%s, %s, %s) "
+                  f"RETURNING account_id",
+        "insert_values": f"INSERT INTO {table_name} (owner_id, account_type, balance) VALUES %s RETURNING *",
+        # an account read from the database only overwrites the row it was read from; version 0 saves unconditionally
+        "save": f"UPDATE {table_name} SET account_type = %s, balance = %s, version = version + 1 "
+                f"WHERE account_id = %s AND (%s = 0 OR version = %s) RETURNING account_id",
+        "update_balance": f"UPDATE {table_name} SET balance = balance + %s, version = version + 1 "
+                          f"WHERE account_id = %s AND owner_id = %s AND balance + %s >= 0 RETURNING *",
+        "transfer": f"UPDATE {table_name} "
+                    f"SET balance = balance + CASE WHEN account_id = %s THEN %s ELSE %s END, version = version + 1 "
+                    f"WHERE account_id IN (%s, %s) RETURNING *",
+        "transfer_values": f"UPDATE {table_name} SET balance = {table_name}.balance + v.column2, "
+                           f"version = {table_name}.version + 1 "
+                           f"FROM (VALUES %s) AS v WHERE {table_name}.account_id = v.column1 "
+                           f"RETURNING {table_name}.account_id",
+        "delete": f"DELETE FROM {table_name} WHERE account_id = %s RETURNING account_id",
+        "load": f"SELECT * FROM {table_name} WHERE account_id = %s",
+        "load_version": f"SELECT owner_id, version FROM {table_name} WHERE account_id = %s",
+        "load_all": f"SELECT * FROM {table_name} ORDER BY account_id",
+    }
+
+
+def account_lock_sql(table_name: str, dialect: str, count: int) -> str:
+    # SQLite has no row locks, its transaction() scopes take the database write lock up front instead
+    for_update = " FOR UPDATE" if dialect == "postgres" else ""
+    return f"SELECT * FROM {table_name} WHERE account_id IN ({', '.join(['%s'] * count)}) " \
+           f"ORDER BY account_id{for_update}"
+
+
+def account_page_sql(table_name: str, owner_id: int, min_balance: Optional[float], max_balance: Optional[float],
+                     after: Optional[int], limit: Optional[int]) -> tuple[str, list]:
+    sql = f"SELECT * FROM {table_name} WHERE owner_id = %s"
+    variables = [owner_id]
+    if min_balance is not None:
+        sql += " AND balance >= %s"
+        variables.append(min_balance)
+    if max_balance is not None:
+        sql += " AND balance <= %s"
+        variables.append(max_balance)
+    if after is not None:
+        sql += " AND account_id > %s"
+        variables.append(after)
+    sql += " ORDER BY account_id"
+    if limit is not None:
+        sql += " LIMIT %s"
+        variables.append(limit)
+    return sql, variables
+
+
+def account_from_row(result: tuple) -> BankAccount:
+    return BankAccount(result[0], result[1], result[2], result[3], result[4])
+
+
+def plan_transfers(owner_id: int, transfers: list[tuple[int, int, float]],
+                   locked: dict[int, tuple]) -> tuple[list[Optional[Exception]], dict[int, float]]:
+    # checks each transfer against the balances left by the ones before it, locked maps account ids to their rows
+    balances = {account_id: result[2] for account_id, result in locked.items()}
+    deltas = {}
+    errors = []
+    for transfer_from, transfer_to, amount in transfers:
+        error = None
+        for account_id in (transfer_from, transfer_to):
+            if error is None and account_id not in locked:
+                error = NoSuchElementError(f"No accounts found for query on account id {account_id}")
+            elif error is None and locked[account_id][0] != owner_id:
+                error = NoSuchElementError(f"This client does not own account {account_id}")
+        if error is None and transfer_from == transfer_to:
+            error = DataError(f"Cannot transfer funds from account {transfer_from} to itself")
+        if error is None and amount <= 0:
+            error = DataError(f"Transfer amount must be positive, amount given {amount}")
+        if error is None and balances[transfer_from] - amount < 0:
+            error = InsufficientFundsError(f"Insufficient funds transfer from account {transfer_from}")
+        if error is None:
+            balances[transfer_from] -= amount
+            balances[transfer_to] += amount
+            deltas[transfer_from] = deltas.get(transfer_from, 0.0) - amount
+            deltas[transfer_to] = deltas.get(transfer_to, 0.0) + amount
+        errors.append(error)
+    return errors, deltas
 
 
 class BankAccountDAOInterface(ABC):
@@ -11,10 +98,28 @@ class BankAccountDAOInterface(ABC):
     def create_record(self, account: BankAccount) -> BankAccount:
         pass
 
+    @abstractmethod
+    def create_records(self, accounts: list[BankAccount]) -> list[BankAccount]:
+        pass
+
     @abstractmethod
     def save_record(self, account: BankAccount) -> None:
         pass
 
+    @abstractmethod
+    def update_balance(self, account_id: int, owner_id: int, amount: float) -> BankAccount:
+        pass
+
+    @abstractmethod
+    def transfer_balance(self, owner_id: int, transfer_from: int, transfer_to: int,
+                         amount: float) -> tuple[BankAccount, BankAccount]:
+        pass
+
+    @abstractmethod
+    def transfer_balances(self, owner_id: int, transfers: list[tuple[int, int, float]],
+                          atomic: bool) -> list[Optional[Exception]]:
+        pass
+
     @abstractmethod
     def delete_record(self, account_id: int) -> None:
         pass
@@ -24,34 +129,40 @@ class BankAccountDAOInterface(ABC):
         pass
 
     @abstractmethod
-    def load_objects(self, owner_id: int) -> dict[int, BankAccount]:
+    def load_version(self, account_id: int) -> tuple[int, int]:
+        pass
+
+    @abstractmethod
+    def load_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                     after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, BankAccount]:
+        pass
+
+    @abstractmethod
+    def stream_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[BankAccount]:
         pass
 
     @abstractmethod
     def load_all_objects(self) -> dict[int, BankAccount]:
         pass
 
+    @abstractmethod
+    def stream_all_objects(self) -> Iterator[BankAccount]:
+        pass
+
 
 class BankAccountDAO(BankAccountDAOInterface):
 
-    def __init__(self, database: PostgresDB, table_name: str):
-        self.__database: PostgresDB = database
+    def __init__(self, database: DatabaseDriver, table_name: str):
+        self.__database: DatabaseDriver = database
         self.__table_name = table_name
-        sql = f"create table if not exists accounts ( " \
-              f"owner_id int, " \
-              f"account_type varchar(20), " \
-              f"balance float, " \
-              f"account_id int primary key generated always as identity, " \
-              f"foreign key (owner_id) references account_holders (user_id) );"
-        self.__database.execute(sql)
-        self.__database.commit()
+        self.__sql = account_sql(self.__table_name)
 
     def create_record(self, account: BankAccount) -> BankAccount:
-        sql = f"INSERT INTO {self.__table_name} " \
-              f"(owner_id, account_type, balance) VALUES (%s, %s, %s) RETURNING account_id"
-        result = self.__database.execute(sql, [account.get_owner_id(),
-                                               account.get_account_type(),
-                                               account.get_balance()])
+        result = self.__database.execute_prepared(f"{self.__table_name}_insert", self.__sql["insert"],
+                                                  [account.get_owner_id(),
+                                                   account.get_account_type(),
+                                                   account.get_balance()])
         if len(result) == 0:
             self.__database.rollback()
             raise DataError(f"Failed creating account in database with id {account.get_account_id()}")
@@ -59,21 +170,86 @@ class BankAccountDAO(BankAccountDAOInterface):
             self.__database.commit()
         return self.load_object(result[0][0])
 
+    def create_records(self, accounts: list[BankAccount]) -> list[BankAccount]:
+        if len(accounts) == 0:
+            return []
+        results = self.__database.execute_values(self.__sql["insert_values"],
+                                                 [[account.get_owner_id(),
+                                                   account.get_account_type(),
+                                                   account.get_balance()] for account in accounts])
+        if len(results) != len(accounts):
+            self.__database.rollback()
+            raise DataError(f"Failed creating {len(accounts)} accounts in database")
+        self.__database.commit()
+        return [account_from_row(result) for result in results]
+
     def save_record(self, account: BankAccount) -> None:
-        sql = f"UPDATE {self.__table_name} " \
-              f"SET account_type = %s, balance = %s WHERE account_id = %s RETURNING account_id"
-        result = self.__database.execute(sql, [account.get_account_type(),
-                                               account.get_balance(),
-                                               account.get_account_id()])
+        result = self.__database.execute_prepared(f"{self.__table_name}_save", self.__sql["save"],
+                                                  [account.get_account_type(),
+                                                   account.get_balance(),
+                                                   account.get_account_id(),
+                                                   account.get_version(),
+                                                   account.get_version()])
         if len(result) == 0:
             self.__database.rollback()
-            raise DataError(f"Failed creating account in database with id {account.get_account_id()}")
+            try:
+                self.load_version(account.get_account_id())
+            except NoSuchElementError:
+                raise DataError(f"Failed creating account in database with id {account.get_account_id()}")
+            raise StaleVersionError(f"Account {account.get_account_id()} was changed by another request")
         else:
             self.__database.commit()
 
+    def update_balance(self, account_id: int, owner_id: int, amount: float) -> BankAccount:
+        results = self.__database.execute_prepared(f"{self.__table_name}_update_balance", self.__sql["update_balance"],
+                                                   [amount, account_id, owner_id, amount])
+        if len(results) == 0:
+            self.__database.rollback()
+            if self.load_object(account_id).get_owner_id() != owner_id:
+                raise NoSuchElementError(f"This client does not own account {account_id}")
+            raise InsufficientFundsError(f"Insufficient funds transfer to/from account {account_id}")
+        self.__database.commit()
+        return account_from_row(results[0])
+
+    def transfer_balance(self, owner_id: int, transfer_from: int, transfer_to: int,
+                         amount: float) -> tuple[BankAccount, BankAccount]:
+        with self.__database.transaction():
+            sql = account_lock_sql(self.__table_name, self.__database.get_dialect(), 2)
+            locked = {result[3]: result for result in self.__database.execute(sql, [transfer_from, transfer_to])}
+            errors, _ = plan_transfers(owner_id, [(transfer_from, transfer_to, amount)], locked)
+            if errors[0] is not None:
+                raise errors[0]
+            results = self.__database.execute(self.__sql["transfer"],
+                                              [transfer_from, -amount, amount, transfer_from, transfer_to])
+            if len(results) != 2:
+                self.__database.rollback()
+                raise DataError(f"Failed transferring funds from account {transfer_from} to {transfer_to}")
+            self.__database.commit()
+        accounts = {result[3]: account_from_row(result) for result in results}
+        return accounts[transfer_from], accounts[transfer_to]
+
+    def transfer_balances(self, owner_id: int, transfers: list[tuple[int, int, float]],
+                          atomic: bool) -> list[Optional[Exception]]:
+        account_ids = sorted({account_id for transfer in transfers for account_id in transfer[:2]})
+        if len(account_ids) == 0:
+            return []
+        with self.__database.transaction():
+            sql = account_lock_sql(self.__table_name, self.__database.get_dialect(), len(account_ids))
+            locked = {result[3]: result for result in self.__database.execute(sql, account_ids)}
+            errors, deltas = plan_transfers(owner_id, transfers, locked)
+            if len(deltas) == 0 or (atomic and any(error is not None for error in errors)):
+                return errors
+            results = self.__database.execute_values(self.__sql["transfer_values"],
+                                                     [[account_id, float(delta)]
+                                                      for account_id, delta in deltas.items()])
+            if len(results) != len(deltas):
+                self.__database.rollback()
+                raise DataError(f"Failed applying {len(transfers)} transfers for client {owner_id}")
+            self.__database.commit()
+        return errors
+
     def delete_record(self, account_id: int) -> None:
-        sql = f"DELETE FROM {self.__table_name} WHERE account_id = %s RETURNING account_id"
-        results = self.__database.execute(sql, [account_id])
+        results = self.__database.execute(self.__sql["delete"], [account_id])
         if len(results) == 0:
             self.__database.rollback()
             raise NoSuchElementError(f"Couldn't find account with id {account_id}")
@@ -81,27 +257,34 @@ class BankAccountDAO(BankAccountDAOInterface):
             self.__database.commit()
 
     def load_object(self, account_id: int) -> BankAccount:
-        sql = f"SELECT * FROM {self.__table_name} WHERE account_id = %s"
-        results = self.__database.execute(sql, [account_id])
+        results = self.__database.execute_prepared(f"{self.__table_name}_load", self.__sql["load"], [account_id])
         if len(results) == 0:
             raise NoSuchElementError(f"No accounts found for query on account id {account_id}")
-        result = results[0]
-        return BankAccount(result[0], result[1], result[2], result[3])
-
-    def load_objects(self, owner_id: int) -> dict[int, BankAccount]:
-        sql = f"SELECT * FROM {self.__table_name} WHERE owner_id = %s"
-        sql_results = self.__database.execute(sql, [owner_id])
-        accounts = {}
-        for result in sql_results:
-            account = BankAccount(result[0], result[1], result[2], result[3])
-            accounts[account.get_account_id()] = account
-        return accounts
+        return account_from_row(results[0])
+
+    def load_version(self, account_id: int) -> tuple[int, int]:
+        results = self.__database.execute_prepared(f"{self.__table_name}_load_version", self.__sql["load_version"],
+                                                   [account_id])
+        if len(results) == 0:
+            raise NoSuchElementError(f"No accounts found for query on account id {account_id}")
+        return results[0][0], results[0][1]
+
+    def load_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                     after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, BankAccount]:
+        sql, variables = account_page_sql(self.__table_name, owner_id, min_balance, max_balance, after, limit)
+        variant = "".join("0" if value is None else "1" for value in (min_balance, max_balance, after, limit))
+        sql_results = self.__database.execute_prepared(f"{self.__table_name}_load_owner_{variant}", sql, variables)
+        return {result[3]: account_from_row(result) for result in sql_results}
+
+    def stream_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[BankAccount]:
+        sql, variables = account_page_sql(self.__table_name, owner_id, min_balance, max_balance, after, limit)
+        for result in self.__database.stream(sql, variables):
+            yield account_from_row(result)
 
     def load_all_objects(self) -> dict[int, BankAccount]:
-        sql = f"SELECT * FROM {self.__table_name}"
-        sql_results = self.__database.execute(sql)
-        accounts = {}
-        for result in sql_results:
-            account = BankAccount(result[0], result[1], result[2], result[3])
-            accounts[account.get_account_id()] = account
-        return accounts
+        return {result[3]: account_from_row(result) for result in self.__database.execute(self.__sql["load_all"])}
+
+    def stream_all_objects(self) -> Iterator[BankAccount]:
+        for result in self.__database.stream(self.__sql["load_all"]):
+            yield account_from_row(result)
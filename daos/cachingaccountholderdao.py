@@ -0,0 +1,51 @@
+from typing import Iterator, Optional
+
+from daos.accountholderdao import AccountHolderDAOInterface
+from entities.accountholder import AccountHolder
+from util.lrucache import LRUCache
+
+
+class CachingAccountHolderDAO(AccountHolderDAOInterface):
+
+    def __init__(self, dao: AccountHolderDAOInterface, cache: LRUCache,
+                 account_cache: Optional[LRUCache] = None) -> None:
+        self.__dao = dao
+        self.__cache = cache
+        self.__account_cache = account_cache
+
+    def create_record(self, user: AccountHolder) -> AccountHolder:
+        return self.__dao.create_record(user)
+
+    def create_records(self, users: list[AccountHolder]) -> list[AccountHolder]:
+        return self.__dao.create_records(users)
+
+    def save_record(self, user: AccountHolder) -> None:
+        try:
+            self.__dao.save_record(user)
+        finally:
+            self.__cache.invalidate(user.get_user_id())
+
+    def delete_record(self, client_id: int) -> None:
+        accounts = self.load_object(client_id).get_accounts()
+        try:
+            self.__dao.delete_record(client_id)
+        finally:
+            self.__cache.invalidate(client_id)
+            if self.__account_cache is not None:
+                for account_id in accounts:
+                    self.__account_cache.invalidate(account_id)
+
+    def load_object(self, client_id: int) -> AccountHolder:
+        client = self.__cache.get(client_id)
+        if client is None:
+            generation = self.__cache.generation(client_id)
+            client = self.__dao.load_object(client_id)
+            self.__cache.put(client_id, client, generation)
+        return AccountHolder(client.get_first_name(), client.get_last_name(), client.get_user_id(),
+                             client.get_accounts())
+
+    def load_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, AccountHolder]:
+        return self.__dao.load_all_objects(after, limit)
+
+    def stream_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[AccountHolder]:
+        return self.__dao.stream_all_objects(after, limit)
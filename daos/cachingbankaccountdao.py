@@ -0,0 +1,99 @@
+from typing import Iterator, Optional
+
+from daos.bankaccountdao import BankAccountDAOInterface
+from entities.bankaccount import BankAccount
+from util.lrucache import LRUCache
+
+
+class CachingBankAccountDAO(BankAccountDAOInterface):
+
+    def __init__(self, dao: BankAccountDAOInterface, cache: LRUCache,
+                 client_cache: Optional[LRUCache] = None) -> None:
+        self.__dao = dao
+        self.__cache = cache
+        self.__client_cache = client_cache
+
+    def __invalidate(self, account_ids: list[int], owner_ids: Optional[list[int]] = None) -> None:
+        for account_id in account_ids:
+            self.__cache.invalidate(account_id)
+        if self.__client_cache is not None and owner_ids is not None:
+            for owner_id in owner_ids:
+                self.__client_cache.invalidate(owner_id)
+
+    def create_record(self, account: BankAccount) -> BankAccount:
+        try:
+            return self.__dao.create_record(account)
+        finally:
+            self.__invalidate([], [account.get_owner_id()])
+
+    def create_records(self, accounts: list[BankAccount]) -> list[BankAccount]:
+        try:
+            return self.__dao.create_records(accounts)
+        finally:
+            self.__invalidate([], list({account.get_owner_id() for account in accounts}))
+
+    def save_record(self, account: BankAccount) -> None:
+        try:
+            self.__dao.save_record(account)
+        finally:
+            self.__invalidate([account.get_account_id()])
+
+    def update_balance(self, account_id: int, owner_id: int, amount: float) -> BankAccount:
+        try:
+            return self.__dao.update_balance(account_id, owner_id, amount)
+        finally:
+            self.__invalidate([account_id])
+
+    def transfer_balance(self, owner_id: int, transfer_from: int, transfer_to: int,
+                         amount: float) -> tuple[BankAccount, BankAccount]:
+        try:
+            return self.__dao.transfer_balance(owner_id, transfer_from, transfer_to, amount)
+        finally:
+            self.__invalidate([transfer_from, transfer_to])
+
+    def transfer_balances(self, owner_id: int, transfers: list[tuple[int, int, float]],
+                          atomic: bool) -> list[Optional[Exception]]:
+        try:
+            return self.__dao.transfer_balances(owner_id, transfers, atomic)
+        finally:
+            self.__invalidate(list({account_id for transfer in transfers for account_id in transfer[:2]}))
+
+    def delete_record(self, account_id: int) -> None:
+        owner_id = self.load_object(account_id).get_owner_id()
+        try:
+            self.__dao.delete_record(account_id)
+        finally:
+            self.__invalidate([account_id], [owner_id])
+
+    def load_object(self, account_id: int) -> BankAccount:
+        account = self.__cache.get(account_id)
+        if account is None:
+            return self.load_object_uncached(account_id)
+        return BankAccount(account.get_owner_id(), account.get_account_type(), account.get_balance(),
+                           account.get_account_id(), account.get_version())
+
+    def load_object_uncached(self, account_id: int) -> BankAccount:
+        # reads that feed a write go to the database, and refresh the cache on the way back
+        generation = self.__cache.generation(account_id)
+        account = self.__dao.load_object(account_id)
+        self.__cache.put(account_id, account, generation)
+        return BankAccount(account.get_owner_id(), account.get_account_type(), account.get_balance(),
+                           account.get_account_id(), account.get_version())
+
+    def load_version(self, account_id: int) -> tuple[int, int]:
+        # a validator answered from this process's cache could vouch for a row another process already changed
+        return self.__dao.load_version(account_id)
+
+    def load_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                     after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, BankAccount]:
+        return self.__dao.load_objects(owner_id, min_balance, max_balance, after, limit)
+
+    def stream_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[BankAccount]:
+        return self.__dao.stream_objects(owner_id, min_balance, max_balance, after, limit)
+
+    def load_all_objects(self) -> dict[int, BankAccount]:
+        return self.__dao.load_all_objects()
+
+    def stream_all_objects(self) -> Iterator[BankAccount]:
+        return self.__dao.stream_all_objects()
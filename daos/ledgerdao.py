@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Union
+
+from entities.ledgerentry import LedgerEntry
+from util.databasedriver import DatabaseDriver
+
+
+def format_moment(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def parse_moment(value: Union[datetime, str]) -> datetime:
+    # SQLite hands timestamps back as text
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+class LedgerDAOInterface(ABC):
+
+    @abstractmethod
+    def load_balance_at(self, account_id: int, moment: datetime) -> float:
+        pass
+
+    @abstractmethod
+    def load_statement(self, account_id: int, start: datetime, end: datetime) -> tuple[float, list[LedgerEntry]]:
+        pass
+
+    @abstractmethod
+    def checkpoint_balances(self, min_entries: Optional[int] = 1) -> int:
+        pass
+
+
+class LedgerDAO(LedgerDAOInterface):
+
+    def __init__(self, database: DatabaseDriver, ledger_table: str, checkpoints_table: str):
+        self.__database: DatabaseDriver = database
+        self.__ledger_table = ledger_table
+        self.__checkpoints_table = checkpoints_table
+
+    def load_balance_at(self, account_id: int, moment: datetime) -> float:
+        # entry ids do not follow created_at when transactions overlap, so the balance is every entry stamped
+        # at or before the moment: the newest checkpoint whose entries all are, plus the later ones that are
+        sql = f"SELECT COALESCE(c.balance, 0) + COALESCE((SELECT sum(l.amount) FROM {self.__ledger_table} l " \
+              f"WHERE l.account_id = %s AND l.entry_id > COALESCE(c.entry_id, 0) AND l.created_at <= %s), 0) " \
+              f"FROM (SELECT 1 AS anchor) a LEFT JOIN (SELECT entry_id, balance FROM {self.__checkpoints_table} " \
+              f"WHERE account_id = %s AND created_at <= %s ORDER BY entry_id DESC LIMIT 1) c ON 1 = 1"
+        moment = format_moment(moment)
+        results = self.__database.execute_prepared(f"{self.__ledger_table}_balance_at", sql,
+                                                   [account_id, moment, account_id, moment])
+        if len(results) == 0:
+            return 0.0
+        return float(results[0][0])
+
+    def load_statement(self, account_id: int, start: datetime, end: datetime) -> tuple[float, list[LedgerEntry]]:
+        opening_balance = self.load_balance_at(account_id, start)
+        sql = f"SELECT entry_id, amount, created_at FROM {self.__ledger_table} " \
+              f"WHERE account_id = %s AND created_at > %s AND created_at <= %s ORDER BY created_at, entry_id"
+        results = self.__database.execute_prepared(f"{self.__ledger_table}_statement", sql,
+                                                   [account_id, format_moment(start), format_moment(end)])
+        balance = opening_balance
+        entries = []
+        for result in results:
+            balance += result[1]
+            entries.append(LedgerEntry(account_id, result[1], balance, parse_moment(result[2]), result[0]))
+        return opening_balance, entries
+
+    def checkpoint_balances(self, min_entries: Optional[int] = 1) -> int:
+        # only accounts with entries past the newest checkpoint are scanned, each from its own latest checkpoint
+        # a checkpoint is stamped with the latest created_at it covers, so it is only used for moments past all of it
+        sql = f"INSERT INTO {self.__checkpoints_table} (account_id, entry_id, balance, created_at) " \
+              f"SELECT l.account_id, max(l.entry_id), COALESCE(c.balance, 0) + sum(l.amount), " \
+              f"CASE WHEN c.created_at > max(l.created_at) THEN c.created_at ELSE max(l.created_at) END " \
+              f"FROM (SELECT DISTINCT account_id FROM {self.__ledger_table} WHERE entry_id > " \
+              f"(SELECT COALESCE(max(entry_id), 0) FROM {self.__checkpoints_table})) t " \
+              f"LEFT JOIN {self.__checkpoints_table} c ON c.account_id = t.account_id " \
+              f"AND c.entry_id = (SELECT max(entry_id) FROM {self.__checkpoints_table} " \
+              f"WHERE account_id = t.account_id) " \
+              f"JOIN {self.__ledger_table} l ON l.account_id = t.account_id AND l.entry_id > COALESCE(c.entry_id, 0) " \
+              f"GROUP BY l.account_id, c.balance, c.created_at HAVING count(*) >= %s " \
+              f"ON CONFLICT DO NOTHING RETURNING account_id"
+        results = self.__database.execute(sql, [min_entries])
+        self.__database.commit()
+        return len(results)
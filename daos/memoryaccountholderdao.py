@@ -0,0 +1,67 @@
+from bisect import bisect_left, bisect_right
+from itertools import count
+from threading import RLock
+from typing import Iterator, Optional
+
+from daos.accountholderdao import AccountHolderDAOInterface
+from daos.memorybankaccountdao import MemoryBankAccountDAO
+from entities.accountholder import AccountHolder
+from util.dataerror import DataError
+from util.nosuchelementerror import NoSuchElementError
+
+
+class MemoryAccountHolderDAO(AccountHolderDAOInterface):
+
+    def __init__(self, account_dao: MemoryBankAccountDAO) -> None:
+        self.__account_dao = account_dao
+        self.__lock = RLock()
+        self.__ids = count(1)
+        self.__clients: dict[int, tuple[str, str]] = {}
+        self.__sorted_ids: list[int] = []
+
+    def __load(self, client_id: int) -> AccountHolder:
+        first_name, last_name = self.__clients[client_id]
+        return AccountHolder(first_name, last_name, client_id, self.__account_dao.get_account_ids(client_id))
+
+    def create_record(self, user: AccountHolder) -> AccountHolder:
+        return self.create_records([user])[0]
+
+    def create_records(self, users: list[AccountHolder]) -> list[AccountHolder]:
+        created = []
+        with self.__lock:
+            for user in users:
+                client_id = next(self.__ids)
+                self.__clients[client_id] = (user.get_first_name(), user.get_last_name())
+                self.__sorted_ids.append(client_id)
+                created.append(self.__load(client_id))
+        return created
+
+    def save_record(self, user: AccountHolder) -> None:
+        with self.__lock:
+            if user.get_user_id() not in self.__clients:
+                raise DataError(f"Failed updating client in database with id {user.get_user_id()}")
+            self.__clients[user.get_user_id()] = (user.get_first_name(), user.get_last_name())
+
+    def delete_record(self, client_id: int) -> None:
+        with self.__lock:
+            if client_id not in self.__clients:
+                raise NoSuchElementError(f"No clients found for query on client id {client_id}")
+            for account_id in self.__account_dao.get_account_ids(client_id):
+                self.__account_dao.delete_record(account_id)
+            del self.__clients[client_id]
+            del self.__sorted_ids[bisect_left(self.__sorted_ids, client_id)]
+
+    def load_object(self, client_id: int) -> AccountHolder:
+        with self.__lock:
+            if client_id not in self.__clients:
+                raise NoSuchElementError(f"No clients found for query on client id {client_id}")
+            return self.__load(client_id)
+
+    def load_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, AccountHolder]:
+        with self.__lock:
+            start = 0 if after is None else bisect_right(self.__sorted_ids, after)
+            end = len(self.__sorted_ids) if limit is None else start + limit
+            return {client_id: self.__load(client_id) for client_id in self.__sorted_ids[start:end]}
+
+    def stream_all_objects(self, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[AccountHolder]:
+        yield from self.load_all_objects(after, limit).values()
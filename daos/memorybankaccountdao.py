@@ -0,0 +1,187 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+from threading import RLock
+from typing import Iterator, Optional
+
+from daos.bankaccountdao import BankAccountDAOInterface, plan_transfers
+from daos.memoryledgerdao import MemoryLedgerDAO
+from entities.bankaccount import BankAccount
+from util.dataerror import DataError
+from util.insufficientfundserror import InsufficientFundsError
+from util.nosuchelementerror import NoSuchElementError
+from util.staleversionerror import StaleVersionError
+
+
+class MemoryBankAccountDAO(BankAccountDAOInterface):
+
+    def __init__(self, ledger: Optional[MemoryLedgerDAO] = None) -> None:
+        self.__ledger = ledger
+        self.__lock = RLock()
+        self.__ids = count(1)
+        self.__accounts: dict[int, BankAccount] = {}
+        self.__by_owner: dict[int, list[int]] = {}
+        self.__by_balance: dict[int, list[tuple[float, int]]] = {}
+        self.__versions: dict[int, int] = {}
+
+    def __copy(self, account: BankAccount) -> BankAccount:
+        return BankAccount(account.get_owner_id(), account.get_account_type(), account.get_balance(),
+                           account.get_account_id(), self.__versions[account.get_account_id()])
+
+    def __record(self, account_id: int, amount: float) -> None:
+        if self.__ledger is not None and amount != 0:
+            self.__ledger.record(account_id, amount)
+
+    def __index(self, account: BankAccount) -> None:
+        insort(self.__by_owner.setdefault(account.get_owner_id(), []), account.get_account_id())
+        insort(self.__by_balance.setdefault(account.get_owner_id(), []),
+               (account.get_balance(), account.get_account_id()))
+
+    def __unindex(self, account: BankAccount) -> None:
+        owned = self.__by_owner[account.get_owner_id()]
+        del owned[bisect_left(owned, account.get_account_id())]
+        balances = self.__by_balance[account.get_owner_id()]
+        del balances[bisect_left(balances, (account.get_balance(), account.get_account_id()))]
+        if len(owned) == 0:
+            del self.__by_owner[account.get_owner_id()]
+            del self.__by_balance[account.get_owner_id()]
+
+    def __set_balance(self, account: BankAccount, balance: float) -> None:
+        balances = self.__by_balance[account.get_owner_id()]
+        del balances[bisect_left(balances, (account.get_balance(), account.get_account_id()))]
+        self.__record(account.get_account_id(), float(balance) - account.get_balance())
+        self.__versions[account.get_account_id()] += 1
+        account.set_balance(balance)
+        insort(balances, (account.get_balance(), account.get_account_id()))
+
+    def __owned(self, account_id: int, owner_id: int) -> BankAccount:
+        account = self.__accounts.get(account_id)
+        if account is None:
+            raise NoSuchElementError(f"No accounts found for query on account id {account_id}")
+        if account.get_owner_id() != owner_id:
+            raise NoSuchElementError(f"This client does not own account {account_id}")
+        return account
+
+    def get_account_ids(self, owner_id: int) -> list[int]:
+        with self.__lock:
+            return self.__by_owner.get(owner_id, []).copy()
+
+    def create_record(self, account: BankAccount) -> BankAccount:
+        return self.create_records([account])[0]
+
+    def create_records(self, accounts: list[BankAccount]) -> list[BankAccount]:
+        created = []
+        with self.__lock:
+            for account in accounts:
+                stored = BankAccount(account.get_owner_id(), account.get_account_type(), account.get_balance(),
+                                     next(self.__ids))
+                self.__accounts[stored.get_account_id()] = stored
+                self.__index(stored)
+                self.__versions[stored.get_account_id()] = 1
+                self.__record(stored.get_account_id(), stored.get_balance())
+                created.append(self.__copy(stored))
+        return created
+
+    def save_record(self, account: BankAccount) -> None:
+        with self.__lock:
+            stored = self.__accounts.get(account.get_account_id())
+            if stored is None:
+                raise DataError(f"Failed creating account in database with id {account.get_account_id()}")
+            if account.get_version() != 0 and account.get_version() != self.__versions[account.get_account_id()]:
+                raise StaleVersionError(f"Account {account.get_account_id()} was changed by another request")
+            stored.set_account_type(account.get_account_type())
+            self.__set_balance(stored, account.get_balance())
+
+    def update_balance(self, account_id: int, owner_id: int, amount: float) -> BankAccount:
+        with self.__lock:
+            account = self.__owned(account_id, owner_id)
+            if account.get_balance() + amount < 0:
+                raise InsufficientFundsError(f"Insufficient funds transfer to/from account {account_id}")
+            self.__set_balance(account, account.get_balance() + amount)
+            return self.__copy(account)
+
+    def transfer_balance(self, owner_id: int, transfer_from: int, transfer_to: int,
+                         amount: float) -> tuple[BankAccount, BankAccount]:
+        with self.__lock:
+            account_from = self.__owned(transfer_from, owner_id)
+            account_to = self.__owned(transfer_to, owner_id)
+            if account_from.get_balance() - amount < 0:
+                raise InsufficientFundsError(f"Insufficient funds transfer from account {transfer_from}")
+            self.__set_balance(account_from, account_from.get_balance() - amount)
+            self.__set_balance(account_to, account_to.get_balance() + amount)
+            return self.__copy(account_from), self.__copy(account_to)
+
+    def transfer_balances(self, owner_id: int, transfers: list[tuple[int, int, float]],
+                          atomic: bool) -> list[Optional[Exception]]:
+        with self.__lock:
+            # the same (owner_id, account_type, balance) rows the SQL DAO locks
+            locked = {}
+            for transfer in transfers:
+                for account_id in transfer[:2]:
+                    account = self.__accounts.get(account_id)
+                    if account is not None:
+                        locked[account_id] = (account.get_owner_id(), account.get_account_type(), account.get_balance())
+            errors, deltas = plan_transfers(owner_id, transfers, locked)
+            if atomic and any(error is not None for error in errors):
+                return errors
+            # accounts only named by failed transfers keep their version and get no ledger entry
+            for account_id, delta in deltas.items():
+                account = self.__accounts[account_id]
+                self.__set_balance(account, account.get_balance() + delta)
+        return errors
+
+    def delete_record(self, account_id: int) -> None:
+        with self.__lock:
+            account = self.__accounts.pop(account_id, None)
+            if account is None:
+                raise NoSuchElementError(f"Couldn't find account with id {account_id}")
+            self.__unindex(account)
+            del self.__versions[account_id]
+            self.__record(account_id, -account.get_balance())
+
+    def load_object(self, account_id: int) -> BankAccount:
+        with self.__lock:
+            account = self.__accounts.get(account_id)
+            if account is None:
+                raise NoSuchElementError(f"No accounts found for query on account id {account_id}")
+            return self.__copy(account)
+
+    def load_version(self, account_id: int) -> tuple[int, int]:
+        with self.__lock:
+            account = self.__accounts.get(account_id)
+            if account is None:
+                raise NoSuchElementError(f"No accounts found for query on account id {account_id}")
+            return account.get_owner_id(), self.__versions[account_id]
+
+    def load_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                     after: Optional[int] = None, limit: Optional[int] = None) -> dict[int, BankAccount]:
+        with self.__lock:
+            if min_balance is None and max_balance is None:
+                owned = self.__by_owner.get(owner_id, [])
+                account_ids = owned[bisect_right(owned, after):] if after is not None else owned
+            else:
+                balances = self.__by_balance.get(owner_id, [])
+                low = 0 if min_balance is None else bisect_left(balances, (min_balance, 0))
+                high = len(balances) if max_balance is None else bisect_right(balances, (max_balance, float("inf")))
+                account_ids = sorted(account_id for _, account_id in balances[low:high]
+                                     if after is None or account_id > after)
+            if limit is not None:
+                account_ids = account_ids[:limit]
+            return {account_id: self.__copy(self.__accounts[account_id]) for account_id in account_ids}
+
+    def stream_objects(self, owner_id: int, min_balance: Optional[float] = None, max_balance: Optional[float] = None,
+                       after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[BankAccount]:
+        yield from self.load_objects(owner_id, min_balance, max_balance, after, limit).values()
+
+    def load_all_objects(self) -> dict[int, BankAccount]:
+        with self.__lock:
+            return {account_id: self.__copy(account) for account_id, account in self.__accounts.items()}
+
+    def stream_all_objects(self, batch_size: Optional[int] = 500) -> Iterator[BankAccount]:
+        # ids are issued in ascending order, so insertion order is id order
+        with self.__lock:
+            account_ids = list(self.__accounts)
+        for start in range(0, len(account_ids), batch_size):
+            with self.__lock:
+                batch = [self.__copy(self.__accounts[account_id])
+                         for account_id in account_ids[start:start + batch_size] if account_id in self.__accounts]
+            yield from batch
@@ -0,0 +1,46 @@
+from bisect import bisect_right
+from datetime import datetime, timezone
+from itertools import count
+from threading import RLock
+from typing import Optional
+
+from daos.ledgerdao import LedgerDAOInterface
+from entities.ledgerentry import LedgerEntry
+
+
+class MemoryLedgerDAO(LedgerDAOInterface):
+
+    def __init__(self) -> None:
+        self.__lock = RLock()
+        self.__ids = count(1)
+        self.__entries: dict[int, list[LedgerEntry]] = {}
+        self.__times: dict[int, list[datetime]] = {}
+
+    def record(self, account_id: int, amount: float) -> None:
+        with self.__lock:
+            entries = self.__entries.setdefault(account_id, [])
+            times = self.__times.setdefault(account_id, [])
+            created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            if len(times) > 0 and created_at < times[-1]:
+                created_at = times[-1]
+            balance = amount + (entries[-1].get_balance() if len(entries) > 0 else 0.0)
+            entries.append(LedgerEntry(account_id, amount, balance, created_at, next(self.__ids)))
+            times.append(created_at)
+
+    def load_balance_at(self, account_id: int, moment: datetime) -> float:
+        with self.__lock:
+            # every entry carries its running balance, so one bisect replaces checkpoint plus tail
+            position = bisect_right(self.__times.get(account_id, []), moment)
+            return self.__entries[account_id][position - 1].get_balance() if position > 0 else 0.0
+
+    def load_statement(self, account_id: int, start: datetime, end: datetime) -> tuple[float, list[LedgerEntry]]:
+        with self.__lock:
+            times = self.__times.get(account_id, [])
+            entries = self.__entries.get(account_id, [])
+            low = bisect_right(times, start)
+            high = bisect_right(times, end)
+            opening_balance = entries[low - 1].get_balance() if low > 0 else 0.0
+            return opening_balance, entries[low:high]
+
+    def checkpoint_balances(self, min_entries: Optional[int] = 1) -> int:
+        return 0
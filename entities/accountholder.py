@@ -5,6 +5,8 @@ from util.nosuchelementerror import NoSuchElementError
 
 class AccountHolder:
 
+    __slots__ = ("__first_name", "__last_name", "__user_id", "__accounts", "__json")
+
     def __init__(self, first_name: Optional[str] = "N/A", last_name: Optional[str] = "N/A",
                  user_id: Optional[int] = 0, accounts: Optional[list[int]] = None) -> None:
         self.__first_name: str = first_name
@@ -14,14 +16,17 @@ class AccountHolder:
             self.__accounts: list[int] = []
         else:
             self.__accounts = accounts
+        self.__json: Optional[str] = None
 
     def add_account(self, account_id: int) -> None:
         self.__accounts.append(account_id)
+        self.__json = None
 
     def remove_account(self, account_id: int) -> None:
         if self.__accounts is None or account_id not in self.__accounts:
             raise NoSuchElementError(f"Account with id {account_id} not found")
         self.__accounts.remove(account_id)
+        self.__json = None
 
     def get_accounts(self) -> list[int]:
         return self.__accounts.copy()
@@ -34,13 +39,21 @@ class AccountHolder:
 
     def set_first_name(self, first_name: str) -> None:
         self.__first_name = first_name
+        self.__json = None
 
     def set_last_name(self, last_name: str) -> None:
         self.__last_name = last_name
+        self.__json = None
 
     def get_user_id(self) -> int:
         return self.__user_id
 
     def to_json_dict(self) -> dict:
         return {"firstName": self.__first_name, "lastName": self.__last_name,
-                "identification": self.__user_id, "accounts": dumps(self.__accounts)}
+                "identification": self.__user_id, "accounts": self.__accounts.copy()}
+
+    def to_json(self) -> str:
+        if self.__json is None:
+            self.__json = dumps({"firstName": self.__first_name, "lastName": self.__last_name,
+                                 "identification": self.__user_id, "accounts": self.__accounts})
+        return self.__json
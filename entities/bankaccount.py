@@ -1,14 +1,20 @@
 from typing import Optional, Union
+from json import dumps
 
 
 class BankAccount:
 
+    __slots__ = ("__owner_id", "__account_type", "__balance", "__account_id", "__version", "__json")
+
     def __init__(self, owner_id: int, account_type: str,
-                 balance: Optional[Union[float, int]] = 0.0, account_id: Optional[int] = 0) -> None:
+                 balance: Optional[Union[float, int]] = 0.0, account_id: Optional[int] = 0,
+                 version: Optional[int] = 0) -> None:
         self.__owner_id: int = owner_id
         self.__account_type: str = account_type.lower()
         self.__balance: float = float(balance)
         self.__account_id: int = account_id
+        self.__version: int = version
+        self.__json: Optional[str] = None
 
     def get_owner_id(self) -> int:
         return self.__owner_id
@@ -18,16 +24,26 @@ class BankAccount:
 
     def set_account_type(self, account_type: str) -> None:
         self.__account_type = account_type
+        self.__json = None
 
     def get_balance(self) -> float:
         return self.__balance
 
     def set_balance(self, new_balance: Union[int, float]) -> None:
         self.__balance = float(new_balance)
+        self.__json = None
 
     def get_account_id(self) -> int:
         return self.__account_id
 
+    def get_version(self) -> int:
+        return self.__version
+
     def to_json_dict(self) -> dict:
         return {"ownerId": self.__owner_id, "accountType": self.__account_type,
                 "balance": self.__balance, "accountId": self.__account_id}
+
+    def to_json(self) -> str:
+        if self.__json is None:
+            self.__json = dumps(self.to_json_dict())
+        return self.__json
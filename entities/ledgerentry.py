@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Optional, Union
+from json import dumps
+
+
+class LedgerEntry:
+
+    __slots__ = ("__account_id", "__amount", "__balance", "__created_at", "__entry_id", "__json")
+
+    def __init__(self, account_id: int, amount: Union[float, int], balance: Union[float, int],
+                 created_at: datetime, entry_id: Optional[int] = 0) -> None:
+        self.__account_id: int = account_id
+        self.__amount: float = float(amount)
+        self.__balance: float = float(balance)
+        self.__created_at: datetime = created_at
+        self.__entry_id: int = entry_id
+        self.__json: Optional[str] = None
+
+    def get_account_id(self) -> int:
+        return self.__account_id
+
+    def get_amount(self) -> float:
+        return self.__amount
+
+    def get_balance(self) -> float:
+        return self.__balance
+
+    def get_created_at(self) -> datetime:
+        return self.__created_at
+
+    def get_entry_id(self) -> int:
+        return self.__entry_id
+
+    def to_json_dict(self) -> dict:
+        return {"entryId": self.__entry_id, "accountId": self.__account_id, "amount": self.__amount,
+                "balance": self.__balance, "createdAt": self.__created_at.isoformat()}
+
+    def to_json(self) -> str:
+        if self.__json is None:
+            self.__json = dumps(self.to_json_dict())
+        return self.__json
@@ -0,0 +1,25 @@
+import argparse
+import json
+
+from migrations.migrator import MIGRATIONS, Migrator
+from util.databasefactory import create_database
+
+parser = argparse.ArgumentParser(prog="python -m migrations", description="Bring the banking schema up to date")
+parser.add_argument("--target", type=int, help="stop after this schema version")
+parser.add_argument("--status", action="store_true", help="print the current schema version and exit")
+args = parser.parse_args()
+
+with open('dbcredentials.json') as f:
+    data = json.load(f)
+database = create_database(data, min_connections=0, max_connections=1)
+try:
+    migrator = Migrator(database)
+    if args.status:
+        print(f"Schema at version {migrator.current_version()} of {MIGRATIONS[-1][0]}")
+    else:
+        descriptions = {version: description for version, description, _ in MIGRATIONS}
+        for version in migrator.migrate(args.target):
+            print(f"Applied migration {version}: {descriptions[version]}")
+        print(f"Schema at version {migrator.current_version()}")
+finally:
+    database.close()
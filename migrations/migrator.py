@@ -0,0 +1,198 @@
+from typing import Callable, Optional
+from util.changelistener import notify_trigger_sql, statement_notify_trigger_sql
+from util.dataerror import DataError
+from util.databasedriver import DatabaseDriver
+
+LOCK_KEY = "banking_schema_migrations"
+
+
+def identity_column(dialect: str, integer_type: Optional[str] = "int") -> str:
+    if dialect == "sqlite":
+        return "integer primary key autoincrement"
+    return f"{integer_type} primary key generated always as identity"
+
+
+def ledger_timestamp(dialect: str) -> str:
+    if dialect == "sqlite":
+        return "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+    return "(clock_timestamp() AT TIME ZONE 'UTC')"
+
+
+def create_account_holders(holders_table: str, accounts_table: str, foreign_keys: bool, dialect: str) -> list[str]:
+    return [f"CREATE TABLE IF NOT EXISTS {holders_table} ( "
+            f"first_name varchar(50), "
+            f"last_name varchar(50), "
+            f"user_id {identity_column(dialect)} );"]
+
+
+def create_accounts(holders_table: str, accounts_table: str, foreign_keys: bool, dialect: str) -> list[str]:
+    sql = f"CREATE TABLE IF NOT EXISTS {accounts_table} ( " \
+          f"owner_id int, " \
+          f"account_type varchar(20), " \
+          f"balance float, " \
+          f"account_id {identity_column(dialect)}"
+    if foreign_keys:
+        sql += f", foreign key (owner_id) references {holders_table} (user_id)"
+    return [sql + " );"]
+
+
+def create_owner_balance_index(holders_table: str, accounts_table: str, foreign_keys: bool,
+                               dialect: str) -> list[str]:
+    return [f"CREATE INDEX IF NOT EXISTS {accounts_table}_owner_balance_idx "
+            f"ON {accounts_table} (owner_id, balance)"]
+
+
+def create_notify_triggers(holders_table: str, accounts_table: str, foreign_keys: bool, dialect: str) -> list[str]:
+    if dialect != "postgres":
+        return []
+    return [notify_trigger_sql(holders_table, ["user_id"]),
+            notify_trigger_sql(accounts_table, ["account_id", "owner_id"])]
+
+
+def create_statement_notify_triggers(holders_table: str, accounts_table: str, foreign_keys: bool,
+                                     dialect: str) -> list[str]:
+    if dialect != "postgres":
+        return []
+    return [statement_notify_trigger_sql(holders_table, ["user_id"]),
+            statement_notify_trigger_sql(accounts_table, ["account_id", "owner_id"])]
+
+
+def create_ledger(holders_table: str, accounts_table: str, foreign_keys: bool, dialect: str) -> list[str]:
+    ledger_table = f"{accounts_table}_ledger"
+    checkpoints_table = f"{accounts_table}_checkpoints"
+    return [f"CREATE TABLE IF NOT EXISTS {ledger_table} ( "
+            f"entry_id {identity_column(dialect, 'bigint')}, "
+            f"account_id int not null, "
+            f"amount float not null, "
+            f"created_at timestamp not null );",
+            f"CREATE INDEX IF NOT EXISTS {ledger_table}_account_entry_idx ON {ledger_table} (account_id, entry_id)",
+            f"CREATE INDEX IF NOT EXISTS {ledger_table}_account_time_idx "
+            f"ON {ledger_table} (account_id, created_at, entry_id)",
+            f"CREATE TABLE IF NOT EXISTS {checkpoints_table} ( "
+            f"account_id int not null, "
+            f"entry_id bigint not null, "
+            f"balance float not null, "
+            f"created_at timestamp not null, "
+            f"primary key (account_id, entry_id) );",
+            # opening entries for balances that predate the ledger
+            f"INSERT INTO {ledger_table} (account_id, amount, created_at) "
+            f"SELECT account_id, balance, {ledger_timestamp(dialect)} FROM {accounts_table} "
+            f"WHERE balance <> 0 ORDER BY account_id"]
+
+
+def create_ledger_triggers(holders_table: str, accounts_table: str, foreign_keys: bool, dialect: str) -> list[str]:
+    ledger_table = f"{accounts_table}_ledger"
+    now = ledger_timestamp(dialect)
+    if dialect == "sqlite":
+        return [f"CREATE TRIGGER IF NOT EXISTS {accounts_table}_ledger_insert AFTER INSERT ON {accounts_table} "
+                f"WHEN NEW.balance <> 0 BEGIN "
+                f"INSERT INTO {ledger_table} (account_id, amount, created_at) "
+                f"VALUES (NEW.account_id, NEW.balance, {now}); END;",
+                f"CREATE TRIGGER IF NOT EXISTS {accounts_table}_ledger_update AFTER UPDATE ON {accounts_table} "
+                f"WHEN NEW.balance <> OLD.balance BEGIN "
+                f"INSERT INTO {ledger_table} (account_id, amount, created_at) "
+                f"VALUES (NEW.account_id, NEW.balance - OLD.balance, {now}); END;",
+                f"CREATE TRIGGER IF NOT EXISTS {accounts_table}_ledger_delete AFTER DELETE ON {accounts_table} "
+                f"WHEN OLD.balance <> 0 BEGIN "
+                f"INSERT INTO {ledger_table} (account_id, amount, created_at) "
+                f"VALUES (OLD.account_id, -OLD.balance, {now}); END;"]
+    # statement level triggers write one batched INSERT per statement, e.g. for all rows of a batch transfer
+    function = f"CREATE OR REPLACE FUNCTION {accounts_table}_record_ledger() RETURNS trigger AS $$ " \
+               f"BEGIN " \
+               f"IF TG_OP = 'INSERT' THEN " \
+               f"INSERT INTO {ledger_table} (account_id, amount, created_at) " \
+               f"SELECT account_id, balance, {now} FROM new_rows WHERE balance <> 0 ORDER BY account_id; " \
+               f"ELSIF TG_OP = 'UPDATE' THEN " \
+               f"INSERT INTO {ledger_table} (account_id, amount, created_at) " \
+               f"SELECT n.account_id, n.balance - o.balance, {now} FROM new_rows n " \
+               f"JOIN old_rows o ON o.account_id = n.account_id WHERE n.balance <> o.balance ORDER BY n.account_id; " \
+               f"ELSE " \
+               f"INSERT INTO {ledger_table} (account_id, amount, created_at) " \
+               f"SELECT account_id, -balance, {now} FROM old_rows WHERE balance <> 0 ORDER BY account_id; " \
+               f"END IF; " \
+               f"RETURN NULL; " \
+               f"END; $$ LANGUAGE plpgsql;"
+    triggers = []
+    for event, transition_tables in (("insert", "NEW TABLE AS new_rows"),
+                                     ("update", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+                                     ("delete", "OLD TABLE AS old_rows")):
+        trigger = f"{accounts_table}_ledger_{event}"
+        triggers.append(f"DO $$ BEGIN "
+                        f"IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{trigger}') THEN "
+                        f"CREATE TRIGGER {trigger} AFTER {event.upper()} ON {accounts_table} "
+                        f"REFERENCING {transition_tables} "
+                        f"FOR EACH STATEMENT EXECUTE PROCEDURE {accounts_table}_record_ledger(); "
+                        f"END IF; "
+                        f"END $$;")
+    return [function] + triggers
+
+
+def add_account_versions(holders_table: str, accounts_table: str, foreign_keys: bool, dialect: str) -> list[str]:
+    return [f"ALTER TABLE {accounts_table} ADD COLUMN version int not null default 1"]
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[str, str, bool, str], list[str]]]] = [
+    (1, "create account holders table", create_account_holders),
+    (2, "create accounts table", create_accounts),
+    (3, "index accounts on (owner_id, balance)", create_owner_balance_index),
+    (4, "publish row changes on the banking_changes channel", create_notify_triggers),
+    (5, "create balance ledger and checkpoints", create_ledger),
+    (6, "record balance changes in the ledger", create_ledger_triggers),
+    (7, "version account rows for conditional requests", add_account_versions),
+    (8, "publish change notifications once per statement", create_statement_notify_triggers),
+]
+
+
+class Migrator:
+
+    def __init__(self, database: DatabaseDriver, holders_table: Optional[str] = "account_holders",
+                 accounts_table: Optional[str] = "accounts", foreign_keys: Optional[bool] = True) -> None:
+        self.__database = database
+        self.__holders_table = holders_table
+        self.__accounts_table = accounts_table
+        self.__foreign_keys = foreign_keys
+        self.__schema = f"{holders_table}/{accounts_table}"
+
+    def __prepare(self) -> None:
+        # SQLite transaction() scopes already hold the database write lock
+        if self.__database.get_dialect() == "postgres":
+            self.__database.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [LOCK_KEY])
+        self.__database.execute("CREATE TABLE IF NOT EXISTS schema_migrations ( "
+                                "schema_name varchar(120), "
+                                "version int, "
+                                "description varchar(120), "
+                                "applied_at timestamp default CURRENT_TIMESTAMP, "
+                                "primary key (schema_name, version) );")
+
+    def __applied_version(self) -> int:
+        results = self.__database.execute("SELECT COALESCE(max(version), 0) FROM schema_migrations "
+                                          "WHERE schema_name = %s", [self.__schema])
+        if len(results) == 0:
+            raise DataError(f"Failed reading the schema version of {self.__schema}")
+        return results[0][0]
+
+    def current_version(self) -> int:
+        with self.__database.transaction():
+            self.__prepare()
+            return self.__applied_version()
+
+    def migrate(self, target: Optional[int] = None) -> list[int]:
+        applied = []
+        with self.__database.transaction():
+            self.__prepare()
+            version = self.__applied_version()
+            for migration_version, description, statements in MIGRATIONS:
+                if migration_version <= version or (target is not None and migration_version > target):
+                    continue
+                for sql in statements(self.__holders_table, self.__accounts_table, self.__foreign_keys,
+                                      self.__database.get_dialect()):
+                    self.__database.execute(sql)
+                results = self.__database.execute("INSERT INTO schema_migrations (schema_name, version, description) "
+                                                  "VALUES (%s, %s, %s) RETURNING version",
+                                                  [self.__schema, migration_version, description])
+                if len(results) == 0:
+                    self.__database.rollback()
+                    raise DataError(f"Failed applying migration {migration_version} ({description}) "
+                                    f"to {self.__schema}")
+                applied.append(migration_version)
+        return applied
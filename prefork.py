@@ -0,0 +1,165 @@
+import argparse
+import os
+import signal
+import socket
+import sys
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Optional
+
+from werkzeug.serving import make_server
+
+
+def parse_bind(bind: str) -> tuple[str, int]:
+    host, _, port = bind.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class RequestBudget:
+
+    def __init__(self, app, max_requests: int, on_exhausted) -> None:
+        self.__app = app
+        self.__remaining = max_requests
+        self.__on_exhausted = on_exhausted
+        self.__lock = Lock()
+
+    def __call__(self, environ, start_response):
+        with self.__lock:
+            self.__remaining -= 1
+            exhausted = self.__remaining == 0
+        if exhausted:
+            self.__on_exhausted()
+        return self.__app(environ, start_response)
+
+
+def run_worker(listener: socket.socket, max_requests: int) -> None:
+    import server
+    # nothing is inherited from the parent; the pool and DDL happen on this worker's first request
+    server.reset_service()
+    app = server.app
+    stopping = []
+
+    def stop(*args) -> None:
+        if len(stopping) == 0:
+            stopping.append(True)
+            # shutdown() blocks until serve_forever returns, so it cannot run on the serving thread
+            Thread(target=httpd.shutdown, daemon=True).start()
+
+    if max_requests > 0:
+        app = RequestBudget(app, max_requests, stop)
+    host, port = listener.getsockname()[:2]
+    httpd = make_server(host, port, app, threaded=True, fd=listener.fileno())
+    # server_close() joins the request threads, so in flight requests finish before the worker exits
+    httpd.daemon_threads = False
+    httpd.block_on_close = True
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    try:
+        httpd.serve_forever()
+    finally:
+        if server.banking_service is not None:
+            server.banking_service.close()
+
+
+class Arbiter:
+
+    def __init__(self, listener: socket.socket, workers: int, max_requests: int, graceful_timeout: float) -> None:
+        self.__listener = listener
+        self.__workers = workers
+        self.__max_requests = max_requests
+        self.__graceful_timeout = graceful_timeout
+        self.__pids: set[int] = set()
+        self.__retiring: set[int] = set()
+        self.__stopping = False
+        self.__recycle = False
+
+    def __spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run_worker(self.__listener, self.__max_requests)
+            except Exception as e:
+                print("Worker Error: " + str(e))
+                status = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(status)
+        self.__pids.add(pid)
+
+    def __stop(self, *args) -> None:
+        self.__stopping = True
+
+    def __reload(self, *args) -> None:
+        self.__recycle = True
+
+    def __signal_workers(self, signum: int) -> None:
+        for pid in self.__pids | self.__retiring:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def __reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.__pids.clear()
+                self.__retiring.clear()
+                return
+            if pid == 0:
+                return
+            self.__retiring.discard(pid)
+            if pid not in self.__pids:
+                continue
+            self.__pids.discard(pid)
+            if not self.__stopping and os.waitstatus_to_exitcode(status) != 0:
+                print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+
+    def run(self) -> None:
+        import server  # noqa: F401 routes are registered once here and inherited by every worker
+        signal.signal(signal.SIGTERM, self.__stop)
+        signal.signal(signal.SIGINT, self.__stop)
+        signal.signal(signal.SIGHUP, self.__reload)
+        print(f"Serving on {self.__listener.getsockname()[0]}:{self.__listener.getsockname()[1]} "
+              f"with {self.__workers} workers")
+        while not self.__stopping:
+            if self.__recycle:
+                # old workers drain their requests while the replacements already accept on the shared socket
+                self.__recycle = False
+                self.__signal_workers(signal.SIGTERM)
+                self.__retiring |= self.__pids
+                self.__pids.clear()
+            self.__reap()
+            while len(self.__pids) < self.__workers and not self.__stopping:
+                self.__spawn()
+            sleep(0.2)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        self.__signal_workers(signal.SIGTERM)
+        deadline = monotonic() + self.__graceful_timeout
+        while len(self.__pids | self.__retiring) > 0 and monotonic() < deadline:
+            self.__reap()
+            sleep(0.1)
+        self.__signal_workers(signal.SIGKILL)
+        self.__reap()
+        self.__listener.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the banking API in pre-forked worker processes")
+    parser.add_argument("--bind", default="127.0.0.1:5000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-requests", type=int, default=0,
+                        help="recycle a worker after this many requests, 0 keeps workers forever")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+    listener = socket.create_server(parse_bind(args.bind), backlog=1024)
+    Arbiter(listener, max(args.workers, 1), args.max_requests, args.graceful_timeout).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,122 @@
 import json
 import logging
-from math import inf
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from time import perf_counter
+from typing import Optional
 
-from flask import Flask, request
+from flask import Flask, Response, g, request, stream_with_context
 
-from services.bankingservice import BankingService
+from services.bankingservice import EXPORT_FORMATS, BankingService
+from util.dataerror import DataError
+from util.metrics import REGISTRY, REQUEST_DURATION
+from util.requestparser import parse_account_type, parse_account_update, parse_amount, parse_balance_change, \
+    parse_balance_range, parse_names, parse_page_args, parse_transfers
 
 app = Flask(__name__)
-app.config["DEBUG"] = True
 
 #logging.basicConfig(filename="records.log", level=logging.DEBUG, format=f'%(asctime)s %(levelname)s %(message)s')
 
-banking_service = BankingService()
+banking_service: Optional[BankingService] = None
+service_lock = Lock()
+
+
+def get_service() -> BankingService:
+    # built on first use, so a pre-fork parent can import the app without opening connections
+    global banking_service
+    if banking_service is None:
+        with service_lock:
+            if banking_service is None:
+                banking_service = BankingService()
+    return banking_service
+
+
+def reset_service() -> None:
+    # a forked worker drops the inherited reference instead of sharing the parent's sockets
+    global banking_service
+    banking_service = None
+
+
+@app.before_request
+def start_timer():
+    g.started = perf_counter()
+
+
+@app.after_request
+def record_latency(response: Response):
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REQUEST_DURATION.observe(perf_counter() - g.started, request.method, route, str(response.status_code))
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route('/clients', methods=['POST'])
 def create_client():
     try:
-        json_dict = json.loads(request.data)
-        first_name = None
-        last_name = None
-        for k, v in json_dict.items():
-            if k == "firstName":
-                first_name = str(v)
-            if k == "lastName":
-                last_name = str(v)
-        return banking_service.create_client(first_name, last_name)
+        first_name, last_name = parse_names(json.loads(request.data))
+        return get_service().create_client(first_name, last_name)
     except Exception as e:
         print(str(e))
         return "Error parsing body of request", 400
 
 
+@app.route('/clients/bulk', methods=['POST'])
+def create_clients():
+    try:
+        names = [parse_names(json_dict) for json_dict in json.loads(request.data)]
+        return get_service().create_clients(names)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing body of request", 400
+
+
+def parse_moment(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 @app.route('/clients', methods=['GET'])
 def get_all_clients():
-    return banking_service.get_all_clients()
+    try:
+        after, limit, stream = parse_page_args(request.args)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+    if stream:
+        return Response(stream_with_context(get_service().stream_all_clients(after, limit)),
+                        mimetype="application/json")
+    return get_service().get_all_clients(after, limit)
+
+
+@app.route('/export/<resource>', methods=['GET'])
+def export(resource: str):
+    export_format = request.args.get("format", "ndjson").lower()
+    if resource == "clients":
+        body, status = get_service().export_clients(export_format)
+    elif resource == "accounts":
+        body, status = get_service().export_accounts(export_format)
+    else:
+        return f"Cannot export {resource}, only clients or accounts", 404
+    if status != 200:
+        return body, status
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format],
+                    headers={"Content-Disposition": f"attachment; filename={resource}.{export_format}"})
 
 
 @app.route('/clients/<client_id>', methods=['GET'])
 def get_client(client_id: str):
     try:
-        return banking_service.get_client(int(client_id))
+        return get_service().get_client(int(client_id), request.headers.get("If-None-Match"))
     except Exception as e:
         print(str(e))
         return "Error parsing body of request", 400
@@ -48,15 +125,8 @@ def get_client(client_id: str):
 @app.route('/clients/<client_id>', methods=['PUT'])
 def update_client(client_id: str):
     try:
-        json_dict = json.loads(request.data)
-        f_name = None
-        l_name = None
-        for k, v in json_dict.items():
-            if k == "firstName":
-                f_name = str(v)
-            elif k == "lastName":
-                l_name = str(v)
-        return banking_service.update_client(int(client_id), f_name, l_name)
+        f_name, l_name = parse_names(json.loads(request.data))
+        return get_service().update_client(int(client_id), f_name, l_name)
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -65,7 +135,7 @@ def update_client(client_id: str):
 @app.route('/clients/<client_id>', methods=['DELETE'])
 def delete_client(client_id: str):
     try:
-        return banking_service.remove_client(int(client_id))
+        return get_service().remove_client(int(client_id))
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -75,14 +145,21 @@ def delete_client(client_id: str):
 @app.route('/clients/<client_id>/accounts', methods=['POST'])
 def create_account(client_id: str):
     try:
-        json_dict = json.loads(request.data)
-        account_type = None
-        for k, v in json_dict.items():
-            if k == "accountType":
-                account_type = str(v)
-        if account_type is None:
-            return f"Missing accountType in body", 400
-        return banking_service.create_account(int(client_id), account_type)
+        return get_service().create_account(int(client_id), parse_account_type(json.loads(request.data)))
+    except DataError as e:
+        return str(e), 400
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@app.route('/clients/<client_id>/accounts/bulk', methods=['POST'])
+def create_accounts(client_id: str):
+    try:
+        account_types = [parse_account_type(json_dict) for json_dict in json.loads(request.data)]
+        return get_service().create_accounts(int(client_id), account_types)
+    except DataError as e:
+        return str(e), 400
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -91,14 +168,14 @@ def create_account(client_id: str):
 @app.route('/clients/<client_id>/accounts', methods=['GET'])
 def get_accounts(client_id: str):
     try:
-        min_bal = 0.0
-        max_bal = inf
-        for k, v in request.args.items():
-            if k == "amountLessThan":
-                max_bal = int(v)
-            elif k == "amountGreaterThan":
-                min_bal = int(v)
-        return banking_service.get_accounts(int(client_id), min_bal, max_bal)
+        min_bal, max_bal = parse_balance_range(request.args)
+        after, limit, stream = parse_page_args(request.args)
+        if stream:
+            body, status = get_service().stream_accounts(int(client_id), min_bal, max_bal, after, limit)
+            if status != 200:
+                return body, status
+            return Response(stream_with_context(body), mimetype="application/json")
+        return get_service().get_accounts(int(client_id), min_bal, max_bal, after, limit)
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -107,7 +184,7 @@ def get_accounts(client_id: str):
 @app.route('/clients/<client_id>/accounts/<account_id>', methods=['GET'])
 def get_account(client_id: str, account_id: str):
     try:
-        return banking_service.get_account(int(client_id), int(account_id))
+        return get_service().get_account(int(client_id), int(account_id), request.headers.get("If-None-Match"))
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -115,15 +192,8 @@ def get_account(client_id: str, account_id: str):
 @app.route('/clients/<client_id>/accounts/<account_id>', methods=['PUT'])
 def update_account(client_id: str, account_id: str):
     try:
-        json_dict = json.loads(request.data)
-        account_type = None
-        balance = None
-        for k, v in json_dict.items():
-            if k == "accountType":
-                account_type = str(v)
-            elif k == "balance":
-                balance = float(v)
-        return banking_service.update_account(int(client_id), int(account_id), account_type, balance)
+        account_type, balance = parse_account_update(json.loads(request.data))
+        return get_service().update_account(int(client_id), int(account_id), account_type, balance)
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -132,7 +202,7 @@ def update_account(client_id: str, account_id: str):
 @app.route('/clients/<client_id>/accounts/<account_id>', methods=['DELETE'])
 def delete_account(client_id: str, account_id: str):
     try:
-        return banking_service.remove_account(int(client_id), int(account_id))
+        return get_service().remove_account(int(client_id), int(account_id))
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -141,14 +211,8 @@ def delete_account(client_id: str, account_id: str):
 @app.route('/clients/<client_id>/accounts/<account_id>', methods=['PATCH'])
 def update_balance(client_id: str, account_id: str):
     try:
-        json_dict = json.loads(request.data)
-        total = 0
-        for k, v in json_dict.items():
-            if k == "deposit":
-                total += int(v)
-            elif k == "withdraw":
-                total += -1 * int(v)
-        return banking_service.update_balance(int(client_id), int(account_id), total)
+        total = parse_balance_change(json.loads(request.data))
+        return get_service().update_balance(int(client_id), int(account_id), total)
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
@@ -157,16 +221,56 @@ def update_balance(client_id: str, account_id: str):
 @app.route('/clients/<client_id>/accounts/<account_from_id>/transfer/<account_to_id>', methods=['PATCH'])
 def transfer_balance(client_id: str, account_from_id: str, account_to_id: str):
     try:
-        json_dict = json.loads(request.data)
-        funds = 0
-        for k, v in json_dict.items():
-            if k == "amount":
-                funds += int(v)
-        return banking_service.transfer_funds(int(client_id), int(account_from_id), int(account_to_id), funds)
+        funds = parse_amount(json.loads(request.data))
+        return get_service().transfer_funds(int(client_id), int(account_from_id), int(account_to_id), funds)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@app.route('/clients/<client_id>/accounts/<account_id>/balance', methods=['GET'])
+def get_balance_at(client_id: str, account_id: str):
+    try:
+        moment = utc_now()
+        for k, v in request.args.items():
+            if k == "at":
+                moment = parse_moment(v)
+        return get_service().get_balance_at(int(client_id), int(account_id), moment)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@app.route('/clients/<client_id>/accounts/<account_id>/statement', methods=['GET'])
+def get_statement(client_id: str, account_id: str):
+    try:
+        end = utc_now()
+        start = None
+        for k, v in request.args.items():
+            if k == "from":
+                start = parse_moment(v)
+            elif k == "to":
+                end = parse_moment(v)
+        if start is None:
+            start = end - timedelta(days=30)
+        return get_service().get_statement(int(client_id), int(account_id), start, end)
+    except Exception as e:
+        print(str(e))
+        return "Error parsing request", 400
+
+
+@app.route('/clients/<client_id>/accounts/transfers', methods=['PATCH'])
+def transfer_balance_batch(client_id: str):
+    try:
+        transfers, atomic = parse_transfers(json.loads(request.data))
+        return get_service().transfer_funds_batch(int(client_id), transfers, atomic)
+    except DataError as e:
+        return str(e), 400
     except Exception as e:
         print(str(e))
         return "Error parsing request", 400
 
 
 if __name__ == "__main__":
+    app.config["DEBUG"] = True
     app.run()
@@ -0,0 +1,374 @@
+import json
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, AsyncIterator, Optional, Union
+
+from daos.asyncaccountholderdao import AsyncAccountHolderDAO
+from daos.asyncbankaccountdao import AsyncBankAccountDAO
+from entities.accountholder import AccountHolder
+from entities.bankaccount import BankAccount
+from services.bankingservice import ACCOUNT_COLUMNS, CLIENT_COLUMNS, EXPORT_FORMATS, account_etag, content_etag, \
+    etag_matches, export_header, export_line, json_array, next_page_headers, transfer_results
+from util.asyncpostgresdb import AsyncPostgresDB
+from util.insufficientfundserror import InsufficientFundsError
+from util.nosuchelementerror import NoSuchElementError
+from util.dataerror import DataError
+from util.staleversionerror import StaleVersionError
+
+
+async def async_stream_json_array(entities: AsyncIterable, batch_size: Optional[int] = 100) -> AsyncIterator[str]:
+    yield "["
+    separator = ""
+    batch = []
+    async for entity in entities:
+        batch.append(separator + entity.to_json())
+        separator = ","
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch.clear()
+    yield "".join(batch) + "]"
+
+
+async def async_stream_export(entities: AsyncIterable, export_format: str, columns: tuple,
+                              batch_size: Optional[int] = 100) -> AsyncIterator[str]:
+    batch = [export_header(export_format, columns)]
+    async for entity in entities:
+        batch.append(export_line(entity, export_format, columns))
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch.clear()
+    if len(batch) > 0:
+        yield "".join(batch)
+
+
+class AsyncBankingServiceInterface(ABC):
+
+    @abstractmethod
+    async def create_client(self, first_name: str, last_name: str) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def create_clients(self, names: list[tuple[Optional[str], Optional[str]]]) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def get_client(self, client_id: int, if_none_match: Optional[str] = None) -> Union[tuple[str, int],
+                                                                                            tuple[str, int, dict]]:
+        pass
+
+    @abstractmethod
+    async def get_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> tuple[str, int, dict]:
+        pass
+
+    @abstractmethod
+    def stream_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[str]:
+        pass
+
+    @abstractmethod
+    async def update_client(self, client_id: int, first_name: str, last_name: str) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def remove_client(self, client_id: int) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def create_account(self, client_id: int, account_type: str) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def create_accounts(self, client_id: int, account_types: list[str]) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def get_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                           after: Optional[int] = None, limit: Optional[int] = None) -> Union[tuple[str, int],
+                                                                                              tuple[str, int, dict]]:
+        pass
+
+    @abstractmethod
+    async def stream_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                              after: Optional[int] = None,
+                              limit: Optional[int] = None) -> tuple[Union[str, AsyncIterator[str]], int]:
+        pass
+
+    @abstractmethod
+    async def get_account(self, client_id: int, account_id: int,
+                          if_none_match: Optional[str] = None) -> Union[tuple[str, int], tuple[str, int, dict]]:
+        pass
+
+    @abstractmethod
+    async def update_account(self, client_id: int, account_id: int,
+                             account_type: Optional[str] = None,
+                             balance: Optional[Union[float, int]] = None) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def remove_account(self, client_id: int, account_id: int) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def update_balance(self, client_id: int, account_id: int, funds_transferred: float) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def transfer_funds(self, client_id: int, transfer_from: int, transfer_to: int,
+                             amount: float) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    async def transfer_funds_batch(self, client_id: int, transfers: list[tuple[int, int, float]],
+                                   atomic: Optional[bool] = True) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    def export_clients(self, export_format: str) -> tuple[Union[str, AsyncIterator[str]], int]:
+        pass
+
+    @abstractmethod
+    def export_accounts(self, export_format: str) -> tuple[Union[str, AsyncIterator[str]], int]:
+        pass
+
+
+class AsyncBankingService(AsyncBankingServiceInterface):
+
+    def __init__(self):
+        data = None
+        with open('dbcredentials.json') as f:
+            data = json.load(f)
+        if data is None:
+            raise DataError("Data base credentials couldn't be parsed")
+        self.__pg = AsyncPostgresDB(data["host"], data["username"], data["password"],
+                                    max_connections=data.get("maxConnections", 10),
+                                    timeout=data.get("poolTimeout", 30.0))
+        self.user_dao = AsyncAccountHolderDAO(self.__pg, "account_holders", "accounts")
+        self.account_dao = AsyncBankAccountDAO(self.__pg, "accounts")
+
+    async def close(self) -> None:
+        await self.__pg.close()
+
+    async def create_client(self, first_name: str, last_name: str) -> tuple[str, int]:
+        if first_name is None or last_name is None:
+            return f"""Client must have a first and last name, 
+                   first name given {first_name}, last name given {last_name}""", 422
+        client = await self.user_dao.create_record(AccountHolder(first_name, last_name))
+        return client.to_json(), 201
+
+    async def create_clients(self, names: list[tuple[Optional[str], Optional[str]]]) -> tuple[str, int]:
+        for index, (first_name, last_name) in enumerate(names):
+            if first_name is None or last_name is None:
+                return f"""Client {index} must have a first and last name, 
+                   first name given {first_name}, last name given {last_name}""", 422
+        try:
+            clients = await self.user_dao.create_records([AccountHolder(first_name, last_name)
+                                                          for first_name, last_name in names])
+            return json_array(clients), 201
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def get_client(self, client_id: int, if_none_match: Optional[str] = None) -> Union[tuple[str, int],
+                                                                                            tuple[str, int, dict]]:
+        try:
+            body = (await self.user_dao.load_object(client_id)).to_json()
+            etag = content_etag(body)
+            if etag_matches(if_none_match, etag):
+                return "", 304, {"ETag": etag}
+            return body, 200, {"ETag": etag}
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return f"A server side error occurred {client_id}", 500
+
+    async def get_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> tuple[str, int, dict]:
+        clients = await self.user_dao.load_all_objects(after, limit)
+        return json_array(clients.values()), 200, \
+            next_page_headers(clients.keys(), limit)
+
+    def stream_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> AsyncIterator[str]:
+        return async_stream_json_array(self.user_dao.stream_all_objects(after, limit))
+
+    async def update_client(self, client_id: int, first_name: str, last_name: str) -> tuple[str, int]:
+        try:
+            client = await self.user_dao.load_object(client_id)
+            if first_name is not None:
+                client.set_first_name(first_name)
+            if last_name is not None:
+                client.set_last_name(last_name)
+            await self.user_dao.save_record(client)
+            return client.to_json(), 200
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return f"A server side error occurred", 500
+
+    async def remove_client(self, client_id: int) -> tuple[str, int]:
+        try:
+            await self.user_dao.delete_record(client_id)
+            return f"Successfully deleted client {client_id} and all accounts associated with it", 205
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def create_account(self, client_id: int, account_type: str) -> tuple[str, int]:
+        try:
+            client = await self.user_dao.load_object(client_id)
+            if account_type.lower() != "savings" and account_type.lower() != "checking":
+                return f"Account type must be either checking or savings, type received {account_type}", 422
+            account_init = BankAccount(client.get_user_id(), account_type)
+            account = await self.account_dao.create_record(account_init)
+            client.add_account(account.get_account_id())
+            return client.to_json(), 201
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def create_accounts(self, client_id: int, account_types: list[str]) -> tuple[str, int]:
+        try:
+            await self.user_dao.load_object(client_id)
+            for account_type in account_types:
+                if account_type.lower() != "savings" and account_type.lower() != "checking":
+                    return f"Account type must be either checking or savings, type received {account_type}", 422
+            accounts = await self.account_dao.create_records([BankAccount(client_id, account_type)
+                                                              for account_type in account_types])
+            return json_array(accounts), 201
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def get_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                           after: Optional[int] = None, limit: Optional[int] = None) -> Union[tuple[str, int],
+                                                                                              tuple[str, int, dict]]:
+        try:
+            await self.user_dao.load_object(client_id)
+            accounts = await self.account_dao.load_objects(client_id, min_balance, max_balance, after, limit)
+            return json_array(accounts.values()), 200, \
+                next_page_headers(accounts.keys(), limit)
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def stream_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                              after: Optional[int] = None,
+                              limit: Optional[int] = None) -> tuple[Union[str, AsyncIterator[str]], int]:
+        try:
+            await self.user_dao.load_object(client_id)
+            return async_stream_json_array(self.account_dao.stream_objects(client_id, min_balance, max_balance,
+                                                                           after, limit)), 200
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def get_account(self, client_id: int, account_id: int,
+                          if_none_match: Optional[str] = None) -> Union[tuple[str, int], tuple[str, int, dict]]:
+        try:
+            if if_none_match is not None:
+                owner_id, version = await self.account_dao.load_version(account_id)
+                if owner_id != client_id:
+                    return f"This client does not own account {account_id}", 404
+                etag = account_etag(account_id, version)
+                if etag_matches(if_none_match, etag):
+                    return "", 304, {"ETag": etag}
+            account = await self.account_dao.load_object(account_id)
+            if account.get_owner_id() != client_id:
+                return f"This client does not own account {account_id}", 404
+            return account.to_json(), 200, {"ETag": account_etag(account_id, account.get_version())}
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def update_account(self, client_id: int, account_id: int,
+                             account_type: Optional[str] = None,
+                             balance: Optional[Union[float, int]] = None) -> tuple[str, int]:
+        try:
+            account = await self.account_dao.load_object(account_id)
+            if account.get_owner_id() != client_id:
+                return f"This client does not own account {account_id}", 404
+            if account_type is not None:
+                account.set_account_type(account_type)
+            if balance is not None:
+                account.set_balance(balance)
+            await self.account_dao.save_record(account)
+            return account.to_json(), 200
+        except NoSuchElementError as e:
+            return str(e), 404
+        except StaleVersionError as e:
+            return str(e), 409
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def remove_account(self, client_id: int, account_id: int) -> tuple[str, int]:
+        try:
+            account = await self.account_dao.load_object(account_id)
+            if account.get_owner_id() != client_id:
+                return f"This client does not own account {account_id}", 404
+            await self.account_dao.delete_record(account_id)
+            return f"Account {account_id} deleted successfully", 205
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def update_balance(self, client_id: int, account_id: int, funds_transferred: float) -> tuple[str, int]:
+        try:
+            account = await self.account_dao.update_balance(account_id, client_id, funds_transferred)
+            return account.to_json(), 200
+        except NoSuchElementError as e:
+            return str(e), 404
+        except InsufficientFundsError as e:
+            return str(e), 422
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def transfer_funds(self, client_id: int, transfer_from: int, transfer_to: int,
+                             amount: float) -> tuple[str, int]:
+        try:
+            if transfer_from == transfer_to:
+                return f"Cannot transfer funds from account {transfer_from} to itself", 422
+            if amount <= 0:
+                return f"Transfer amount must be positive, amount given {amount}", 422
+            account_from, account_to = await self.account_dao.transfer_balance(client_id, transfer_from,
+                                                                               transfer_to, amount)
+            return json_array([account_from, account_to]), 200
+        except NoSuchElementError as e:
+            return str(e), 404
+        except InsufficientFundsError as e:
+            return str(e), 422
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    async def transfer_funds_batch(self, client_id: int, transfers: list[tuple[int, int, float]],
+                                   atomic: Optional[bool] = True) -> tuple[str, int]:
+        try:
+            errors = await self.account_dao.transfer_balances(client_id, transfers, atomic)
+            return transfer_results(transfers, errors, atomic)
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    def export_clients(self, export_format: str) -> tuple[Union[str, AsyncIterator[str]], int]:
+        if export_format not in EXPORT_FORMATS:
+            return f"Export format must be one of {', '.join(EXPORT_FORMATS)}, format received {export_format}", 422
+        return async_stream_export(self.user_dao.stream_all_objects(), export_format, CLIENT_COLUMNS), 200
+
+    def export_accounts(self, export_format: str) -> tuple[Union[str, AsyncIterator[str]], int]:
+        if export_format not in EXPORT_FORMATS:
+            return f"Export format must be one of {', '.join(EXPORT_FORMATS)}, format received {export_format}", 422
+        return async_stream_export(self.account_dao.stream_all_objects(), export_format, ACCOUNT_COLUMNS), 200
@@ -1,14 +1,130 @@
+import csv
+import io
 import json
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from hashlib import sha1
+from contextlib import nullcontext
+from datetime import datetime
+from threading import Event, Thread
+from typing import Iterable, Iterator, Optional, Union
 
 from daos.accountholderdao import AccountHolderDAO
 from daos.bankaccountdao import BankAccountDAO
+from daos.cachingaccountholderdao import CachingAccountHolderDAO
+from daos.cachingbankaccountdao import CachingBankAccountDAO
+from daos.ledgerdao import LedgerDAO
+from daos.memoryaccountholderdao import MemoryAccountHolderDAO
+from daos.memorybankaccountdao import MemoryBankAccountDAO
+from daos.memoryledgerdao import MemoryLedgerDAO
 from entities.accountholder import AccountHolder
 from entities.bankaccount import BankAccount
+from util.insufficientfundserror import InsufficientFundsError
 from util.nosuchelementerror import NoSuchElementError
+from util.changelistener import ChangeListener
+from util.databasefactory import create_database
 from util.dataerror import DataError
-from util.postgresdb import PostgresDB
+from util.locktimeouterror import LockTimeoutError
+from util.lrucache import LRUCache
+from util.metrics import CACHE_ENTRIES, CACHE_HIT_RATIO, CACHE_LOOKUPS, LOCK_HOT_ACCOUNTS, POOL_CONNECTIONS, REGISTRY
+from util.stripedlock import StripedLock
+from util.staleversionerror import StaleVersionError
+
+
+def next_page_headers(ids: Iterable[int], limit: Optional[int]) -> dict:
+    ids = list(ids)
+    if limit is None or len(ids) < limit:
+        return {}
+    return {"X-Next-After": str(ids[-1])}
+
+
+def account_etag(account_id: int, version: int) -> str:
+    return f'"account-{account_id}-{version}"'
+
+
+def content_etag(body: str) -> str:
+    return '"' + sha1(body.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def json_array(entities: Iterable) -> str:
+    return "[" + ", ".join(entity.to_json() for entity in entities) + "]"
+
+
+def stream_json_array(entities: Iterable, batch_size: Optional[int] = 100) -> Iterator[str]:
+    yield "["
+    separator = ""
+    batch = []
+    for entity in entities:
+        batch.append(separator + entity.to_json())
+        separator = ","
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch.clear()
+    yield "".join(batch) + "]"
+
+
+def csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+def export_header(export_format: str, columns: tuple) -> str:
+    return csv_line(list(columns)) if export_format == "csv" else ""
+
+
+def export_line(entity, export_format: str, columns: tuple) -> str:
+    if export_format != "csv":
+        return entity.to_json() + "\n"
+    values = entity.to_json_dict()
+    return csv_line([" ".join(map(str, values[column])) if isinstance(values[column], list) else values[column]
+                     for column in columns])
+
+
+def stream_export(entities: Iterable, export_format: str, columns: tuple,
+                  batch_size: Optional[int] = 100) -> Iterator[str]:
+    batch = [export_header(export_format, columns)]
+    for entity in entities:
+        batch.append(export_line(entity, export_format, columns))
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch.clear()
+    if len(batch) > 0:
+        yield "".join(batch)
+
+
+def transfer_results(transfers: list[tuple[int, int, float]], errors: list[Optional[Exception]],
+                     atomic: bool) -> tuple[str, int]:
+    # one entry per requested transfer; an atomic batch applies nothing once any transfer fails
+    failed = any(error is not None for error in errors)
+    results = []
+    for (transfer_from, transfer_to, amount), error in zip(transfers, errors):
+        if error is None:
+            status = 200
+        elif isinstance(error, NoSuchElementError):
+            status = 404
+        else:
+            status = 422
+        results.append({"from": transfer_from, "to": transfer_to, "amount": amount,
+                        "applied": error is None and not (atomic and failed),
+                        "status": status, "message": "" if error is None else str(error)})
+    if not failed:
+        return json.dumps(results), 200
+    return json.dumps(results), 422 if atomic else 207
+
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+ACCOUNT_COLUMNS = ("accountId", "ownerId", "accountType", "balance")
+CLIENT_COLUMNS = ("identification", "firstName", "lastName", "accounts")
 
 
 class BankingServiceInterface(ABC):
@@ -18,11 +134,20 @@ class BankingServiceInterface(ABC):
         pass
 
     @abstractmethod
-    def get_client(self, client_id: int) -> tuple[str, int]:
+    def create_clients(self, names: list[tuple[Optional[str], Optional[str]]]) -> tuple[str, int]:
         pass
 
     @abstractmethod
-    def get_all_clients(self) -> tuple[str, int]:
+    def get_client(self, client_id: int, if_none_match: Optional[str] = None) -> Union[tuple[str, int],
+                                                                                      tuple[str, int, dict]]:
+        pass
+
+    @abstractmethod
+    def get_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> tuple[str, int, dict]:
+        pass
+
+    @abstractmethod
+    def stream_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[str]:
         pass
 
     @abstractmethod
@@ -37,11 +162,25 @@ class BankingServiceInterface(ABC):
     def create_account(self, client_id: int, account_type: str) -> tuple[str, int]:
         pass
 
-    def get_accounts(self, client_id: int, min_balance: float, max_balance: float) -> tuple[str, int]:
+    @abstractmethod
+    def create_accounts(self, client_id: int, account_types: list[str]) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    def get_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                     after: Optional[int] = None, limit: Optional[int] = None) -> Union[tuple[str, int],
+                                                                                        tuple[str, int, dict]]:
+        pass
+
+    @abstractmethod
+    def stream_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                        after: Optional[int] = None,
+                        limit: Optional[int] = None) -> tuple[Union[str, Iterator[str]], int]:
         pass
 
     @abstractmethod
-    def get_account(self, client_id: int, account_id: int) -> tuple[str, int]:
+    def get_account(self, client_id: int, account_id: int,
+                    if_none_match: Optional[str] = None) -> Union[tuple[str, int], tuple[str, int, dict]]:
         pass
 
     @abstractmethod
@@ -62,36 +201,176 @@ class BankingServiceInterface(ABC):
     def transfer_funds(self, client_id: int, transfer_from: int, transfer_to: int, amount: float) -> tuple[str, int]:
         pass
 
+    @abstractmethod
+    def transfer_funds_batch(self, client_id: int, transfers: list[tuple[int, int, float]],
+                             atomic: Optional[bool] = True) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    def export_clients(self, export_format: str) -> tuple[Union[str, Iterator[str]], int]:
+        pass
+
+    @abstractmethod
+    def export_accounts(self, export_format: str) -> tuple[Union[str, Iterator[str]], int]:
+        pass
+
+    @abstractmethod
+    def get_balance_at(self, client_id: int, account_id: int, moment: datetime) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    def get_statement(self, client_id: int, account_id: int, start: datetime, end: datetime) -> tuple[str, int]:
+        pass
+
 
 class BankingService(BankingServiceInterface):
 
-    def __init__(self):
+    def __init__(self, storage: Optional[str] = None):
         data = None
         with open('dbcredentials.json') as f:
             data = json.load(f)
         if data is None:
             raise DataError("Data base credentials couldn't be parsed")
-        self.__pg = PostgresDB(data["host"], data["username"], data["password"])
-        self.user_dao = AccountHolderDAO(self.__pg, "account_holders", "accounts")
-        self.account_dao = BankAccountDAO(self.__pg, "accounts")
+        if storage is None:
+            storage = data.get("storage", "postgres")
+        self.client_cache = None
+        self.account_cache = None
+        self.change_listener = None
+        self.account_locks = None
+        self.__database = None
+        self.__closed = Event()
+        self.__reported_lookups: dict[tuple[str, str], int] = {}
+        if storage == "memory":
+            self.ledger_dao = MemoryLedgerDAO()
+            self.account_dao = MemoryBankAccountDAO(self.ledger_dao)
+            self.user_dao = MemoryAccountHolderDAO(self.account_dao)
+        else:
+            self.__database = create_database(data, storage)
+            self.user_dao = AccountHolderDAO(self.__database, "account_holders", "accounts")
+            self.account_dao = BankAccountDAO(self.__database, "accounts")
+            self.ledger_dao = LedgerDAO(self.__database, "accounts_ledger", "accounts_checkpoints")
+            if data.get("cacheSize", 0) > 0:
+                self.__enable_cache(data, storage == "postgres")
+            if data.get("checkpointInterval", 0) > 0:
+                Thread(target=self.__checkpoint_periodically, name="ledger-checkpoints", daemon=True,
+                       args=(data["checkpointInterval"], data.get("checkpointEntries", 50))).start()
+        if data.get("accountLockStripes", 0) > 0:
+            self.account_locks = StripedLock(data["accountLockStripes"], data.get("accountLockTimeout"))
+        REGISTRY.add_collector(self.__collect_metrics)
+
+    def __enable_cache(self, data: dict, listen: bool) -> None:
+        self.client_cache = LRUCache(data["cacheSize"], data.get("cacheTtl", 30.0))
+        self.account_cache = LRUCache(data["cacheSize"], data.get("cacheTtl", 30.0))
+        self.user_dao = CachingAccountHolderDAO(self.user_dao, self.client_cache, self.account_cache)
+        self.account_dao = CachingBankAccountDAO(self.account_dao, self.account_cache, self.client_cache)
+        if listen and data.get("cacheListen", True):
+            self.change_listener = ChangeListener(data["host"], data["username"], data["password"])
+            self.change_listener.subscribe("account_holders", self.__evict_client)
+            self.change_listener.subscribe("accounts", self.__evict_account)
+            self.change_listener.on_reset(self.__clear_caches)
+            self.change_listener.start()
+
+    def close(self) -> None:
+        self.__closed.set()
+        REGISTRY.remove_collector(self.__collect_metrics)
+        for gauge in (POOL_CONNECTIONS, CACHE_HIT_RATIO, CACHE_ENTRIES, LOCK_HOT_ACCOUNTS):
+            gauge.clear()
+        if self.change_listener is not None:
+            self.change_listener.stop()
+        if self.__database is not None:
+            self.__database.close()
+
+    def __checkpoint_periodically(self, interval: float, min_entries: int) -> None:
+        while not self.__closed.wait(interval):
+            try:
+                self.ledger_dao.checkpoint_balances(min_entries)
+            except Exception as e:
+                print("Checkpoint Error: " + str(e))
+
+    def __collect_metrics(self) -> None:
+        if self.__database is not None:
+            for state, value in self.__database.get_pool_stats().items():
+                POOL_CONNECTIONS.set(value, state)
+        for name, cache in (("clients", self.client_cache), ("accounts", self.account_cache)):
+            if cache is not None:
+                hits = cache.get_hits()
+                misses = cache.get_misses()
+                # the cache counts for its whole life, the counter only takes what happened since the last scrape
+                for result, count in (("hit", hits), ("miss", misses)):
+                    CACHE_LOOKUPS.inc(count - self.__reported_lookups.get((name, result), 0), name, result)
+                    self.__reported_lookups[(name, result)] = count
+                CACHE_HIT_RATIO.set(hits / (hits + misses) if hits + misses > 0 else 0.0, name)
+                CACHE_ENTRIES.set(len(cache), name)
+        if self.account_locks is not None:
+            LOCK_HOT_ACCOUNTS.clear()
+            for account_id, contentions in self.account_locks.most_contended():
+                LOCK_HOT_ACCOUNTS.set(contentions, account_id)
+
+    def __load_for_update(self, account_id: int) -> BankAccount:
+        # the saved row is built from this read, so it must not come from a cache
+        if isinstance(self.account_dao, CachingBankAccountDAO):
+            return self.account_dao.load_object_uncached(account_id)
+        return self.account_dao.load_object(account_id)
+
+    def __locked(self, *account_ids: int):
+        # contended operations on an account queue here instead of on row locks while holding a connection
+        if self.account_locks is None:
+            return nullcontext()
+        return self.account_locks.hold(*account_ids)
+
+    def __evict_client(self, ids: list[int]) -> None:
+        self.client_cache.invalidate(ids[0])
+
+    def __evict_account(self, ids: list[int]) -> None:
+        self.account_cache.invalidate(ids[0])
+        if len(ids) > 1:
+            self.client_cache.invalidate(ids[1])
+
+    def __clear_caches(self) -> None:
+        self.client_cache.clear()
+        self.account_cache.clear()
 
     def create_client(self, first_name: str, last_name: str) -> tuple[str, int]:
         if first_name is None or last_name is None:
             return f"""Client must have a first and last name, 
                    first name given {first_name}, last name given {last_name}""", 422
-        return json.dumps(self.user_dao.create_record(AccountHolder(first_name, last_name)).to_json_dict()), 201
+        return self.user_dao.create_record(AccountHolder(first_name, last_name)).to_json(), 201
+
+    def create_clients(self, names: list[tuple[Optional[str], Optional[str]]]) -> tuple[str, int]:
+        for index, (first_name, last_name) in enumerate(names):
+            if first_name is None or last_name is None:
+                return f"""Client {index} must have a first and last name, 
+                   first name given {first_name}, last name given {last_name}""", 422
+        try:
+            clients = self.user_dao.create_records([AccountHolder(first_name, last_name)
+                                                    for first_name, last_name in names])
+            return json_array(clients), 201
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
 
-    def get_client(self, client_id: int) -> tuple[str, int]:
+    def get_client(self, client_id: int, if_none_match: Optional[str] = None) -> Union[tuple[str, int],
+                                                                                      tuple[str, int, dict]]:
         try:
-            return json.dumps(self.user_dao.load_object(client_id).to_json_dict()), 200
+            # a client's representation includes its account ids, so its tag is taken from the content
+            body = self.user_dao.load_object(client_id).to_json()
+            etag = content_etag(body)
+            if etag_matches(if_none_match, etag):
+                return "", 304, {"ETag": etag}
+            return body, 200, {"ETag": etag}
         except NoSuchElementError as e:
             return str(e), 404
         except Exception as e:
             print(str(e))
             return f"A server side error occurred {client_id}", 500
 
-    def get_all_clients(self) -> tuple[str, int]:
-        return json.dumps([account.to_json_dict() for account in self.user_dao.load_all_objects().values()]), 200
+    def get_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> tuple[str, int, dict]:
+        clients = self.user_dao.load_all_objects(after, limit)
+        return json_array(clients.values()), 200, \
+            next_page_headers(clients.keys(), limit)
+
+    def stream_all_clients(self, after: Optional[int] = None, limit: Optional[int] = None) -> Iterator[str]:
+        return stream_json_array(self.user_dao.stream_all_objects(after, limit))
 
     def update_client(self, client_id: int, first_name: str, last_name: str) -> tuple[str, int]:
         try:
@@ -101,7 +380,7 @@ class BankingService(BankingServiceInterface):
             if last_name is not None:
                 client.set_last_name(last_name)
             self.user_dao.save_record(client)
-            return json.dumps(client.to_json_dict()), 200
+            return client.to_json(), 200
         except NoSuchElementError as e:
             return str(e), 404
         except Exception as e:
@@ -126,34 +405,69 @@ class BankingService(BankingServiceInterface):
             account_init = BankAccount(client.get_user_id(), account_type)
             account = self.account_dao.create_record(account_init)
             client.add_account(account.get_account_id())
-            return json.dumps(client.to_json_dict()), 201
+            return client.to_json(), 201
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    def create_accounts(self, client_id: int, account_types: list[str]) -> tuple[str, int]:
+        try:
+            self.user_dao.load_object(client_id)
+            for account_type in account_types:
+                if account_type.lower() != "savings" and account_type.lower() != "checking":
+                    return f"Account type must be either checking or savings, type received {account_type}", 422
+            accounts = self.account_dao.create_records([BankAccount(client_id, account_type)
+                                                        for account_type in account_types])
+            return json_array(accounts), 201
+        except NoSuchElementError as e:
+            return str(e), 404
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    def get_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                     after: Optional[int] = None, limit: Optional[int] = None) -> Union[tuple[str, int],
+                                                                                        tuple[str, int, dict]]:
+        try:
+            self.user_dao.load_object(client_id)
+            accounts = self.account_dao.load_objects(client_id, min_balance, max_balance, after, limit)
+            return json_array(accounts.values()), 200, \
+                next_page_headers(accounts.keys(), limit)
         except NoSuchElementError as e:
             return str(e), 404
         except Exception as e:
             print(str(e))
             return "A server side error occurred", 500
 
-    def get_accounts(self, client_id: int, min_balance: float, max_balance: float) -> tuple[str, int]:
+    def stream_accounts(self, client_id: int, min_balance: float, max_balance: float,
+                        after: Optional[int] = None,
+                        limit: Optional[int] = None) -> tuple[Union[str, Iterator[str]], int]:
         try:
             self.user_dao.load_object(client_id)
-            accounts = self.account_dao.load_objects(client_id)
-            account_list_dict = []
-            for account in accounts.values():
-                if min_balance <= account.get_balance() <= max_balance:
-                    account_list_dict.append(account.to_json_dict())
-            return json.dumps(account_list_dict), 200
+            return stream_json_array(self.account_dao.stream_objects(client_id, min_balance, max_balance,
+                                                                     after, limit)), 200
         except NoSuchElementError as e:
             return str(e), 404
         except Exception as e:
             print(str(e))
             return "A server side error occurred", 500
 
-    def get_account(self, client_id: int, account_id: int) -> tuple[str, int]:
+    def get_account(self, client_id: int, account_id: int,
+                    if_none_match: Optional[str] = None) -> Union[tuple[str, int], tuple[str, int, dict]]:
         try:
+            if if_none_match is not None:
+                owner_id, version = self.account_dao.load_version(account_id)
+                if owner_id != client_id:
+                    return f"This client does not own account {account_id}", 404
+                etag = account_etag(account_id, version)
+                if etag_matches(if_none_match, etag):
+                    return "", 304, {"ETag": etag}
             account = self.account_dao.load_object(account_id)
             if account.get_owner_id() != client_id:
                 return f"This client does not own account {account_id}", 404
-            return json.dumps(account.to_json_dict()), 200
+            return account.to_json(), 200, {"ETag": account_etag(account_id, account.get_version())}
         except NoSuchElementError as e:
             return str(e), 404
         except Exception as e:
@@ -164,17 +478,22 @@ class BankingService(BankingServiceInterface):
                        account_type: Optional[str] = None,
                        balance: Optional[Union[float, int]] = None) -> tuple[str, int]:
         try:
-            account = self.account_dao.load_object(account_id)
-            if account.get_owner_id() != client_id:
-                return f"This client does not own account {account_id}", 404
-            if account_type is not None:
-                account.set_account_type(account_type)
-            if balance is not None:
-                account.set_balance(balance)
-            self.account_dao.save_record(account)
-            return json.dumps(account.to_json_dict()), 200
+            with self.__locked(account_id):
+                account = self.__load_for_update(account_id)
+                if account.get_owner_id() != client_id:
+                    return f"This client does not own account {account_id}", 404
+                if account_type is not None:
+                    account.set_account_type(account_type)
+                if balance is not None:
+                    account.set_balance(balance)
+                self.account_dao.save_record(account)
+            return account.to_json(), 200
         except NoSuchElementError as e:
             return str(e), 404
+        except StaleVersionError as e:
+            return str(e), 409
+        except LockTimeoutError as e:
+            return str(e), 503
         except Exception as e:
             print(str(e))
             return "A server side error occurred", 500
@@ -193,38 +512,87 @@ class BankingService(BankingServiceInterface):
             return "A server side error occurred", 500
 
     def update_balance(self, client_id: int, account_id: int, funds_transferred: float) -> tuple[str, int]:
+        try:
+            with self.__locked(account_id):
+                account = self.account_dao.update_balance(account_id, client_id, funds_transferred)
+            return account.to_json(), 200
+        except NoSuchElementError as e:
+            return str(e), 404
+        except InsufficientFundsError as e:
+            return str(e), 422
+        except LockTimeoutError as e:
+            return str(e), 503
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    def transfer_funds(self, client_id: int, transfer_from: int, transfer_to: int, amount: float) -> tuple[str, int]:
+        try:
+            if transfer_from == transfer_to:
+                return f"Cannot transfer funds from account {transfer_from} to itself", 422
+            if amount <= 0:
+                return f"Transfer amount must be positive, amount given {amount}", 422
+            with self.__locked(transfer_from, transfer_to):
+                account_from, account_to = self.account_dao.transfer_balance(client_id, transfer_from, transfer_to,
+                                                                             amount)
+            return json_array([account_from, account_to]), 200
+        except NoSuchElementError as e:
+            return str(e), 404
+        except InsufficientFundsError as e:
+            return str(e), 422
+        except LockTimeoutError as e:
+            return str(e), 503
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    def transfer_funds_batch(self, client_id: int, transfers: list[tuple[int, int, float]],
+                             atomic: Optional[bool] = True) -> tuple[str, int]:
+        try:
+            with self.__locked(*[account_id for transfer in transfers for account_id in transfer[:2]]):
+                errors = self.account_dao.transfer_balances(client_id, transfers, atomic)
+            return transfer_results(transfers, errors, atomic)
+        except LockTimeoutError as e:
+            return str(e), 503
+        except Exception as e:
+            print(str(e))
+            return "A server side error occurred", 500
+
+    def export_clients(self, export_format: str) -> tuple[Union[str, Iterator[str]], int]:
+        if export_format not in EXPORT_FORMATS:
+            return f"Export format must be one of {', '.join(EXPORT_FORMATS)}, format received {export_format}", 422
+        return stream_export(self.user_dao.stream_all_objects(), export_format, CLIENT_COLUMNS), 200
+
+    def export_accounts(self, export_format: str) -> tuple[Union[str, Iterator[str]], int]:
+        if export_format not in EXPORT_FORMATS:
+            return f"Export format must be one of {', '.join(EXPORT_FORMATS)}, format received {export_format}", 422
+        return stream_export(self.account_dao.stream_all_objects(), export_format, ACCOUNT_COLUMNS), 200
+
+    def get_balance_at(self, client_id: int, account_id: int, moment: datetime) -> tuple[str, int]:
         try:
             account = self.account_dao.load_object(account_id)
-            new_balance = account.get_balance()
             if account.get_owner_id() != client_id:
                 return f"This client does not own account {account_id}", 404
-            new_balance += funds_transferred
-            if new_balance < 0:
-                return f"Insufficient funds transfer to/from account {account_id}", 422
-            account.set_balance(new_balance)
-            self.account_dao.save_record(account)
-            return json.dumps(account.to_json_dict()), 200
+            balance = self.ledger_dao.load_balance_at(account_id, moment)
+            return json.dumps({"accountId": account_id, "at": moment.isoformat(), "balance": balance}), 200
         except NoSuchElementError as e:
             return str(e), 404
         except Exception as e:
             print(str(e))
             return "A server side error occurred", 500
 
-    def transfer_funds(self, client_id: int, transfer_from: int, transfer_to: int, amount: float) -> tuple[str, int]:
+    def get_statement(self, client_id: int, account_id: int, start: datetime, end: datetime) -> tuple[str, int]:
         try:
-            account_from = self.account_dao.load_object(transfer_from)
-            account_to = self.account_dao.load_object(transfer_to)
-            if account_from.get_owner_id() != client_id:
-                return f"This client does not own account {transfer_from}", 404
-            if account_to.get_owner_id() != client_id:
-                return f"This client does not own account {transfer_from}", 404
-            if account_from.get_balance() - amount < 0:
-                return f"Insufficient funds transfer from account {transfer_from}", 422
-            account_from.set_balance(account_from.get_balance() - amount)
-            account_to.set_balance(account_to.get_balance() + amount)
-            self.account_dao.save_record(account_from)
-            self.account_dao.save_record(account_to)
-            return json.dumps([account_from.to_json_dict(), account_to.to_json_dict()]), 200
+            if start > end:
+                return f"Statement start {start.isoformat()} is after its end {end.isoformat()}", 422
+            account = self.account_dao.load_object(account_id)
+            if account.get_owner_id() != client_id:
+                return f"This client does not own account {account_id}", 404
+            opening_balance, entries = self.ledger_dao.load_statement(account_id, start, end)
+            closing_balance = entries[-1].get_balance() if len(entries) > 0 else opening_balance
+            return json.dumps({"accountId": account_id, "from": start.isoformat(), "to": end.isoformat(),
+                               "openingBalance": opening_balance, "closingBalance": closing_balance,
+                               "entries": [entry.to_json_dict() for entry in entries]}), 200
         except NoSuchElementError as e:
             return str(e), 404
         except Exception as e:
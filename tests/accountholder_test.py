@@ -0,0 +1,17 @@
+import json
+
+from entities.accountholder import AccountHolder
+
+
+def test_to_json_writes_accounts_as_array():
+    client = AccountHolder("John", "Doe", 1, [3, 4])
+    assert json.loads(client.to_json())["accounts"] == [3, 4]
+
+
+def test_to_json_refreshes_after_update():
+    client = AccountHolder("John", "Doe", 1, [3])
+    client.to_json()
+    client.set_first_name("Jane")
+    client.add_account(5)
+    assert json.loads(client.to_json()) == {"firstName": "Jane", "lastName": "Doe", "identification": 1,
+                                            "accounts": [3, 5]}
@@ -1,9 +1,15 @@
-from daos.accountholderdao import AccountHolderDAO, AccountHolderDAOInterface
+import json
+
+from daos.accountholderdao import AccountHolderDAO, AccountHolderDAOInterface, client_page_sql
+from daos.bankaccountdao import BankAccountDAO
+from entities.bankaccount import BankAccount
 from entities.accountholder import AccountHolder
+from migrations.migrator import Migrator
 from util.nosuchelementerror import NoSuchElementError
 from util.postgresdb import PostgresDB
 
 database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
 client_dao: AccountHolderDAOInterface = AccountHolderDAO(database, "test_account_holders", "test_accounts")
 
 
@@ -67,3 +73,41 @@ def test_delete_client_failure():
         assert True
     except Exception as e:
         assert False
+
+
+def test_load_all_clients_success():
+    client1 = client_dao.create_record(AccountHolder("John5", "Doe6"))
+    client2 = client_dao.create_record(AccountHolder("John7", "Doe8"))
+    clients = client_dao.load_all_objects()
+    assert clients[client1.get_user_id()].get_first_name() == "John5"
+    assert clients[client2.get_user_id()].get_last_name() == "Doe8"
+    assert clients[client2.get_user_id()].get_accounts() == []
+
+
+def test_load_all_clients_page_success():
+    client1 = client_dao.create_record(AccountHolder("John9", "Doe10"))
+    client2 = client_dao.create_record(AccountHolder("John11", "Doe12"))
+    page = client_dao.load_all_objects(client1.get_user_id() - 1, 1)
+    assert list(page.keys()) == [client1.get_user_id()]
+    streamed = list(client_dao.stream_all_objects(client1.get_user_id()))
+    assert streamed[0].get_user_id() == client2.get_user_id()
+
+
+def test_client_page_limits_holders_before_collecting_accounts():
+    client = client_dao.create_record(AccountHolder("John13", "Doe14"))
+    accounts = BankAccountDAO(database, "test_accounts").create_records([BankAccount(client.get_user_id(), "savings"),
+                                                                         BankAccount(client.get_user_id(), "checking")])
+    page = client_dao.load_all_objects(client.get_user_id() - 1, 1)
+    assert page[client.get_user_id()].get_accounts() == sorted(account.get_account_id() for account in accounts)
+    sql, variables = client_page_sql("test_account_holders", "test_accounts", "postgres", 0, 50)
+    plan = database.execute("EXPLAIN (FORMAT JSON) " + sql, variables)[0][0][0]["Plan"]
+    assert plan["Node Type"] == "Limit"
+    assert "Join" not in json.dumps(plan)
+
+
+def test_create_clients_success():
+    clients = client_dao.create_records([AccountHolder("John13", "Doe14"), AccountHolder("John15", "Doe16")])
+    assert len(clients) == 2
+    assert clients[0].get_user_id() != 0
+    assert clients[1].get_user_id() == clients[0].get_user_id() + 1
+    assert client_dao.load_object(clients[1].get_user_id()).get_first_name() == "John15"
@@ -0,0 +1,154 @@
+import asyncio
+import json
+
+import asgi
+from daos.asyncaccountholderdao import AsyncAccountHolderDAO
+from daos.asyncbankaccountdao import AsyncBankAccountDAO
+from migrations.migrator import Migrator
+from services.asyncbankingservice import AsyncBankingService
+from util.asyncpostgresdb import AsyncPostgresDB
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_asgi_holders", "test_asgi_accounts", False).migrate()
+
+
+def teardown_module():
+    database.close()
+
+
+def run(scenario):
+    async def with_app():
+        async_database = AsyncPostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+        asgi.banking_service = AsyncBankingService()
+        asgi.banking_service.user_dao = AsyncAccountHolderDAO(async_database, "test_asgi_holders", "test_asgi_accounts")
+        asgi.banking_service.account_dao = AsyncBankAccountDAO(async_database, "test_asgi_accounts")
+        try:
+            return await scenario()
+        finally:
+            await asgi.banking_service.close()
+            await async_database.close()
+            asgi.banking_service = None
+    return asyncio.run(with_app())
+
+
+async def call(method: str, target: str, body=None, headers=None) -> tuple[int, dict, str, int]:
+    path, _, query = target.partition("?")
+    scope = {"type": "http", "method": method, "path": path, "query_string": query.encode(),
+             "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"" if body is None else json.dumps(body).encode()}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi.app(scope, receive, send)
+    response_headers = {k.decode(): v.decode() for k, v in sent[0]["headers"]}
+    chunks = [message["body"] for message in sent[1:]]
+    return sent[0]["status"], response_headers, b"".join(chunks).decode(), len(chunks)
+
+
+async def funded_client(balance: int) -> tuple[int, int, int]:
+    _, _, body, _ = await call("POST", "/clients", {"firstName": "Asgi", "lastName": "Holder"})
+    client_id = json.loads(body)["identification"]
+    _, _, body, _ = await call("POST", f"/clients/{client_id}/accounts/bulk",
+                               [{"accountType": "checking"}, {"accountType": "savings"}])
+    account_ids = [account["accountId"] for account in json.loads(body)]
+    await call("PATCH", f"/clients/{client_id}/accounts/{account_ids[0]}", {"deposit": balance})
+    return client_id, account_ids[0], account_ids[1]
+
+
+def test_asgi_create_client_and_account():
+    async def scenario():
+        status, _, body, _ = await call("POST", "/clients", {"firstName": "John", "lastName": "Doe"})
+        assert status == 201
+        client_id = json.loads(body)["identification"]
+        status, _, body, _ = await call("POST", f"/clients/{client_id}/accounts", {"accountType": "checking"})
+        assert status == 201
+        assert len(json.loads(body)["accounts"]) == 1
+        status, _, body, _ = await call("POST", f"/clients/{client_id}/accounts", {})
+        assert (status, body) == (400, "Missing accountType in body")
+        assert (await call("POST", "/clients", None))[0] == 400
+        assert (await call("GET", "/nowhere"))[0] == 404
+    run(scenario)
+
+
+def test_asgi_patch_balance_and_transfer():
+    async def scenario():
+        client_id, account_from, account_to = await funded_client(100)
+        status, _, body, _ = await call("PATCH", f"/clients/{client_id}/accounts/{account_from}", {"withdraw": 30})
+        assert status == 200
+        assert json.loads(body)["balance"] == 70
+        status, _, body, _ = await call("PATCH", f"/clients/{client_id}/accounts/{account_from}/transfer/{account_to}",
+                                        {"amount": 20})
+        assert status == 200
+        assert [account["balance"] for account in json.loads(body)] == [50, 20]
+        assert (await call("PATCH", f"/clients/{client_id}/accounts/{account_from}", {"withdraw": 1000}))[0] == 422
+    run(scenario)
+
+
+def test_asgi_transfer_batch_statuses():
+    async def scenario():
+        client_id, account_from, account_to = await funded_client(50)
+        transfers = [{"from": account_from, "to": account_to, "amount": 10},
+                     {"from": account_from, "to": account_to, "amount": 1000}]
+        status, _, body, _ = await call("PATCH", f"/clients/{client_id}/accounts/transfers", {"transfers": transfers})
+        assert status == 422
+        assert [item["applied"] for item in json.loads(body)] == [False, False]
+        status, _, body, _ = await call("PATCH", f"/clients/{client_id}/accounts/transfers",
+                                        {"atomic": False, "transfers": transfers})
+        assert status == 207
+        assert [item["status"] for item in json.loads(body)] == [200, 422]
+        status, _, body, _ = await call("PATCH", f"/clients/{client_id}/accounts/transfers",
+                                        {"atomic": "false", "transfers": transfers})
+        assert (status, body) == (400, "atomic must be true or false, received false")
+    run(scenario)
+
+
+def test_asgi_not_modified():
+    async def scenario():
+        client_id, account_id, _ = await funded_client(10)
+        _, headers, _, _ = await call("GET", f"/clients/{client_id}/accounts/{account_id}")
+        etag = headers["ETag"]
+        status, headers, body, _ = await call("GET", f"/clients/{client_id}/accounts/{account_id}",
+                                              headers={"If-None-Match": etag})
+        assert (status, headers["ETag"], body) == (304, etag, "")
+        _, headers, _, _ = await call("GET", f"/clients/{client_id}")
+        assert (await call("GET", f"/clients/{client_id}", headers={"If-None-Match": headers["ETag"]}))[0] == 304
+    run(scenario)
+
+
+def test_asgi_paging_header():
+    async def scenario():
+        client_id, account_id, second_id = await funded_client(10)
+        status, headers, body, _ = await call("GET", f"/clients/{client_id}/accounts?limit=1")
+        assert status == 200
+        assert headers["X-Next-After"] == str(account_id)
+        status, headers, body, _ = await call("GET", f"/clients/{client_id}/accounts?after={account_id}&limit=2")
+        assert [account["accountId"] for account in json.loads(body)] == [second_id]
+        assert "X-Next-After" not in headers
+        assert (await call("GET", "/clients?limit=0"))[0] == 400
+    run(scenario)
+
+
+def test_asgi_streams_export_attachment():
+    async def scenario():
+        client_id, account_id, _ = await funded_client(10)
+        status, headers, body, chunks = await call("GET", "/export/clients?format=csv")
+        assert status == 200
+        assert headers["content-type"] == "text/csv"
+        assert headers["content-disposition"] == "attachment; filename=clients.csv"
+        assert body.splitlines()[0] == "identification,firstName,lastName,accounts"
+        assert chunks > 1
+        status, headers, body, _ = await call("GET", "/export/accounts")
+        assert status == 200
+        assert headers["content-type"] == "application/x-ndjson"
+        assert account_id in [json.loads(line)["accountId"] for line in body.splitlines()]
+        status, headers, body, _ = await call("GET", f"/clients/{client_id}/accounts?stream=true")
+        assert headers["content-type"] == "application/json"
+        assert [account["accountId"] for account in json.loads(body)][0] == account_id
+        assert (await call("GET", "/export/accounts?format=xml"))[0] == 422
+        assert (await call("GET", "/export/ledger"))[0] == 404
+    run(scenario)
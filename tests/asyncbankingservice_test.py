@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+from daos.asyncaccountholderdao import AsyncAccountHolderDAO
+from daos.asyncbankaccountdao import AsyncBankAccountDAO
+from migrations.migrator import Migrator
+from services.asyncbankingservice import AsyncBankingService
+from util.asyncpostgresdb import AsyncPostgresDB
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_async_holders", "test_async_accounts", False).migrate()
+
+
+def teardown_module():
+    database.close()
+
+
+def run(scenario):
+    # the async pool belongs to the event loop it first ran on, so every test gets its own
+    async def with_service():
+        async_database = AsyncPostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+        service = AsyncBankingService()
+        service.user_dao = AsyncAccountHolderDAO(async_database, "test_async_holders", "test_async_accounts")
+        service.account_dao = AsyncBankAccountDAO(async_database, "test_async_accounts")
+        try:
+            return await scenario(service)
+        finally:
+            await service.close()
+            await async_database.close()
+    return asyncio.run(with_service())
+
+
+async def collect(chunks) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+
+async def funded_accounts(service: AsyncBankingService, balance: int) -> tuple[int, int, int]:
+    client_id = json.loads((await service.create_client("Async", "Holder"))[0])["identification"]
+    accounts = json.loads((await service.create_accounts(client_id, ["checking", "savings"]))[0])
+    account_ids = [account["accountId"] for account in accounts]
+    await service.update_balance(client_id, account_ids[0], balance)
+    return client_id, account_ids[0], account_ids[1]
+
+
+def test_async_create_client_and_account():
+    async def scenario(service):
+        body, status = await service.create_client("John", "Doe")
+        assert status == 201
+        client_id = json.loads(body)["identification"]
+        body, status = await service.create_account(client_id, "checking")
+        assert status == 201
+        assert len(json.loads(body)["accounts"]) == 1
+        assert (await service.create_account(client_id, "brokerage"))[1] == 422
+        assert (await service.create_account(10000000, "checking"))[1] == 404
+        assert (await service.create_clients([("Jane", "Doe"), ("Jim", None)]))[1] == 422
+    run(scenario)
+
+
+def test_async_update_balance_and_account():
+    async def scenario(service):
+        client_id, account_id, _ = await funded_accounts(service, 100)
+        body, status = await service.update_balance(client_id, account_id, -30)
+        assert status == 200
+        assert json.loads(body)["balance"] == 70
+        assert (await service.update_balance(client_id, account_id, -1000))[1] == 422
+        assert (await service.update_balance(client_id + 1, account_id, 5))[1] == 404
+        body, status = await service.update_account(client_id, account_id, "savings", None)
+        assert status == 200
+        assert json.loads(body)["accountType"] == "savings"
+    run(scenario)
+
+
+def test_async_transfer_funds_checks_amount_and_funds():
+    async def scenario(service):
+        client_id, account_from, account_to = await funded_accounts(service, 50)
+        body, status = await service.transfer_funds(client_id, account_from, account_to, 20)
+        assert status == 200
+        assert [account["balance"] for account in json.loads(body)] == [30, 20]
+        assert (await service.transfer_funds(client_id, account_from, account_to, 0))[1] == 422
+        assert (await service.transfer_funds(client_id, account_from, account_to, 1000))[1] == 422
+        assert (await service.transfer_funds(client_id, account_from, account_from, 5))[1] == 422
+    run(scenario)
+
+
+def test_async_transfer_batch_partial_and_atomic():
+    async def scenario(service):
+        client_id, account_from, account_to = await funded_accounts(service, 50)
+        transfers = [(account_from, account_to, 10), (account_from, account_to, 1000), (account_from, 10000000, 5)]
+        body, status = await service.transfer_funds_batch(client_id, transfers, True)
+        assert status == 422
+        assert [item["applied"] for item in json.loads(body)] == [False, False, False]
+        body, status = await service.transfer_funds_batch(client_id, transfers, False)
+        assert status == 207
+        assert [item["status"] for item in json.loads(body)] == [200, 422, 404]
+        assert json.loads((await service.get_account(client_id, account_from))[0])["balance"] == 40
+        assert (await service.transfer_funds_batch(client_id, [(account_to, account_from, 10)], True))[1] == 200
+    run(scenario)
+
+
+def test_async_get_not_modified():
+    async def scenario(service):
+        client_id, account_id, _ = await funded_accounts(service, 10)
+        _, status, headers = await service.get_account(client_id, account_id)
+        etag = headers["ETag"]
+        assert await service.get_account(client_id, account_id, etag) == ("", 304, {"ETag": etag})
+        assert (await service.get_account(client_id + 1, account_id, etag))[1] == 404
+        await service.update_balance(client_id, account_id, 5)
+        assert (await service.get_account(client_id, account_id, etag))[1] == 200
+        _, _, headers = await service.get_client(client_id)
+        assert (await service.get_client(client_id, headers["ETag"]))[1] == 304
+    run(scenario)
+
+
+def test_async_paging_headers():
+    async def scenario(service):
+        client_id, account_id, second_id = await funded_accounts(service, 10)
+        body, status, headers = await service.get_accounts(client_id, 0, 1000, None, 1)
+        assert status == 200
+        assert [account["accountId"] for account in json.loads(body)] == [account_id]
+        assert headers == {"X-Next-After": str(account_id)}
+        body, _, headers = await service.get_accounts(client_id, 0, 1000, account_id, 2)
+        assert [account["accountId"] for account in json.loads(body)] == [second_id]
+        assert headers == {}
+        _, _, headers = await service.get_all_clients(None, 1)
+        assert "X-Next-After" in headers
+    run(scenario)
+
+
+def test_async_streams_and_exports():
+    async def scenario(service):
+        client_id, account_id, second_id = await funded_accounts(service, 10)
+        body, status = await service.stream_accounts(client_id, 0, 1000)
+        assert status == 200
+        assert [account["accountId"] for account in json.loads(await collect(body))][0] == account_id
+        assert json.loads(await collect(service.stream_all_clients(None, 2)))
+        body, status = service.export_clients("csv")
+        assert status == 200
+        lines = (await collect(body)).splitlines()
+        assert lines[0] == "identification,firstName,lastName,accounts"
+        assert f"{client_id},Async,Holder,{account_id} {second_id}" in lines
+        body, status = service.export_accounts("ndjson")
+        assert status == 200
+        accounts = [json.loads(line) for line in (await collect(body)).splitlines()]
+        assert account_id in [account["accountId"] for account in accounts]
+        assert service.export_accounts("xml")[1] == 422
+    run(scenario)
@@ -0,0 +1,13 @@
+import asyncio
+
+from util.asyncpostgresdb import AsyncPostgresDB
+
+database = AsyncPostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+
+
+def test_execute_values_fills_only_the_values_slot():
+    async def run():
+        await database.execute("CREATE TABLE IF NOT EXISTS test_async_values (name varchar(20))")
+        return await database.execute_values("INSERT INTO test_async_values (name) VALUES %s "
+                                             "RETURNING name || '%s'", [["a"], ["b"]])
+    assert asyncio.run(run()) == [("a%s",), ("b%s",)]
@@ -0,0 +1,15 @@
+import json
+
+from entities.bankaccount import BankAccount
+
+
+def test_to_json_matches_json_dict():
+    account = BankAccount(1, "Checking", 5, 2)
+    assert json.loads(account.to_json()) == account.to_json_dict()
+
+
+def test_to_json_refreshes_after_set_balance():
+    account = BankAccount(1, "checking", 5, 2)
+    account.to_json()
+    account.set_balance(12)
+    assert json.loads(account.to_json())["balance"] == 12.0
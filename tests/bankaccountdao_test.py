@@ -1,9 +1,13 @@
 from daos.bankaccountdao import BankAccountDAOInterface, BankAccountDAO
 from entities.bankaccount import BankAccount
+from migrations.migrator import Migrator
+from util.insufficientfundserror import InsufficientFundsError
 from util.nosuchelementerror import NoSuchElementError
 from util.postgresdb import PostgresDB
+from util.staleversionerror import StaleVersionError
 
 database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
 bank_account_dao: BankAccountDAOInterface = BankAccountDAO(database, "test_accounts")
 
 
@@ -83,3 +87,117 @@ def test_load_records_success():
         assert records[original2.get_account_id()].get_owner_id() == 110
     except Exception as e:
         assert False
+
+
+def test_update_balance_success():
+    original = bank_account_dao.create_record(BankAccount(120, "savings", 50))
+    updated = bank_account_dao.update_balance(original.get_account_id(), 120, -20)
+    assert updated.get_balance() == 30
+    assert bank_account_dao.load_object(original.get_account_id()).get_balance() == 30
+
+
+def test_update_balance_failure():
+    original = bank_account_dao.create_record(BankAccount(120, "savings", 50))
+    try:
+        bank_account_dao.update_balance(original.get_account_id(), 120, -100)
+        assert False
+    except InsufficientFundsError as e:
+        assert True
+    assert bank_account_dao.load_object(original.get_account_id()).get_balance() == 50
+
+
+def test_transfer_balance_success():
+    account_from = bank_account_dao.create_record(BankAccount(130, "savings", 50))
+    account_to = bank_account_dao.create_record(BankAccount(130, "checking", 5))
+    account_from, account_to = bank_account_dao.transfer_balance(130, account_from.get_account_id(),
+                                                                 account_to.get_account_id(), 20)
+    assert account_from.get_balance() == 30
+    assert account_to.get_balance() == 25
+
+
+def test_transfer_balance_failure():
+    account_from = bank_account_dao.create_record(BankAccount(130, "savings", 50))
+    account_to = bank_account_dao.create_record(BankAccount(130, "checking", 5))
+    try:
+        bank_account_dao.transfer_balance(130, account_from.get_account_id(), account_to.get_account_id(), 100)
+        assert False
+    except InsufficientFundsError as e:
+        assert True
+    assert bank_account_dao.load_object(account_from.get_account_id()).get_balance() == 50
+    assert bank_account_dao.load_object(account_to.get_account_id()).get_balance() == 5
+
+
+def test_load_records_balance_range_success():
+    low = bank_account_dao.create_record(BankAccount(140, "savings", 10))
+    high = bank_account_dao.create_record(BankAccount(140, "checking", 500))
+    records = bank_account_dao.load_objects(140, 100, 1000)
+    assert high.get_account_id() in records
+    assert low.get_account_id() not in records
+
+
+def test_create_records_success():
+    returned = bank_account_dao.create_records([BankAccount(150, "savings", 5), BankAccount(150, "checking", 6)])
+    assert len(returned) == 2
+    assert returned[0].get_account_id() != 0
+    assert bank_account_dao.load_object(returned[1].get_account_id()).get_balance() == 6
+
+
+def test_transfer_balances_success():
+    account1 = bank_account_dao.create_record(BankAccount(160, "savings", 50))
+    account2 = bank_account_dao.create_record(BankAccount(160, "checking", 5))
+    errors = bank_account_dao.transfer_balances(160, [(account1.get_account_id(), account2.get_account_id(), 20),
+                                                      (account2.get_account_id(), account1.get_account_id(), 100),
+                                                      (account2.get_account_id(), account1.get_account_id(), 5)],
+                                                False)
+    assert errors[0] is None
+    assert isinstance(errors[1], InsufficientFundsError)
+    assert errors[2] is None
+    assert bank_account_dao.load_object(account1.get_account_id()).get_balance() == 35
+    assert bank_account_dao.load_object(account2.get_account_id()).get_balance() == 20
+
+
+def test_transfer_balances_atomic_failure():
+    account1 = bank_account_dao.create_record(BankAccount(160, "savings", 50))
+    account2 = bank_account_dao.create_record(BankAccount(160, "checking", 5))
+    errors = bank_account_dao.transfer_balances(160, [(account1.get_account_id(), account2.get_account_id(), 20),
+                                                      (account1.get_account_id(), 10000, 5)], True)
+    assert errors[0] is None
+    assert isinstance(errors[1], NoSuchElementError)
+    assert bank_account_dao.load_object(account1.get_account_id()).get_balance() == 50
+
+
+def test_load_record_after_prepared_statements_dropped():
+    original = bank_account_dao.create_record(BankAccount(170, "savings", 5))
+    bank_account_dao.load_object(original.get_account_id())
+    database.execute("DEALLOCATE ALL")
+    assert bank_account_dao.load_object(original.get_account_id()).get_balance() == 5
+
+
+def test_version_changes_with_every_write():
+    first, second = bank_account_dao.create_records([BankAccount(130, "savings", 50), BankAccount(130, "checking")])
+    assert first.get_version() == 1
+    assert bank_account_dao.update_balance(first.get_account_id(), 130, 5).get_version() == 2
+    bank_account_dao.transfer_balance(130, first.get_account_id(), second.get_account_id(), 5)
+    bank_account_dao.transfer_balances(130, [(first.get_account_id(), second.get_account_id(), 5),
+                                             (first.get_account_id(), second.get_account_id(), 5)], True)
+    assert bank_account_dao.load_version(first.get_account_id()) == (130, 4)
+    assert bank_account_dao.load_object(second.get_account_id()).get_version() == 3
+
+
+def test_stream_all_objects_in_id_order():
+    created = bank_account_dao.create_records([BankAccount(140, "savings", 1), BankAccount(140, "checking", 2)])
+    streamed = list(bank_account_dao.stream_all_objects())
+    assert [account.get_account_id() for account in streamed] == sorted(bank_account_dao.load_all_objects())
+    assert created[1].get_account_id() in [account.get_account_id() for account in streamed]
+
+
+def test_save_record_rejects_stale_version():
+    account = bank_account_dao.create_record(BankAccount(150, "checking", 5))
+    bank_account_dao.update_balance(account.get_account_id(), 150, 5)
+    account.set_account_type("savings")
+    try:
+        bank_account_dao.save_record(account)
+        assert False
+    except StaleVersionError:
+        pass
+    assert bank_account_dao.load_object(account.get_account_id()).get_balance() == 10
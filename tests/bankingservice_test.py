@@ -1,9 +1,14 @@
+import json
+
 from daos.accountholderdao import AccountHolderDAO, AccountHolderDAOInterface
 from daos.bankaccountdao import BankAccountDAO, BankAccountDAOInterface
+from entities.bankaccount import BankAccount
+from migrations.migrator import Migrator
 from services.bankingservice import BankingServiceInterface, BankingService
 from util.postgresdb import PostgresDB
 
 database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_account_holders2", "test_accounts2", False).migrate()
 client_dao: AccountHolderDAOInterface = AccountHolderDAO(database, "test_account_holders2", "test_accounts2")
 bank_account_dao: BankAccountDAOInterface = BankAccountDAO(database, "test_accounts2")
 banking_service: BankingServiceInterface = BankingService()
@@ -11,6 +16,11 @@ banking_service.account_dao = bank_account_dao
 banking_service.user_dao = client_dao
 
 
+def teardown_module():
+    banking_service.close()
+    database.close()
+
+
 def test_banking_create_client_success():
     result = banking_service.create_client("John", "Doe")
     assert result[1] == 201
@@ -175,3 +185,106 @@ def test_banking_transfer_failure3():
 def test_banking_transfer_failure4():
     result = banking_service.transfer_funds(1, 1, 4, 1000000)
     assert result[1] == 422
+
+
+def test_banking_get_all_clients_page_success():
+    result = banking_service.get_all_clients(0, 1)
+    assert result[1] == 200
+    assert result[2]["X-Next-After"] == "1"
+
+
+def test_banking_stream_all_clients_success():
+    result = "".join(banking_service.stream_all_clients(0, 2))
+    assert result.startswith("[") and result.endswith("]")
+
+
+def test_banking_stream_accounts_failure():
+    result = banking_service.stream_accounts(10000, 0, 10000)
+    assert result[1] == 404
+
+
+def test_banking_create_clients_success():
+    result = banking_service.create_clients([("John4", "Doe4"), ("John5", "Doe5")])
+    assert result[1] == 201
+
+
+def test_banking_create_clients_failure():
+    result = banking_service.create_clients([("John6", "Doe6"), ("John7", None)])
+    assert result[1] == 422
+
+
+def test_banking_create_accounts_failure():
+    result = banking_service.create_accounts(10000, ["checking", "savings"])
+    assert result[1] == 404
+
+
+def test_banking_transfer_batch_success():
+    result = banking_service.transfer_funds_batch(1, [(1, 4, 10), (4, 1, 10)], True)
+    assert result[1] == 200
+
+
+def test_banking_transfer_batch_failure():
+    result = banking_service.transfer_funds_batch(1, [(1, 4, 10), (1, 4, 1000000)], True)
+    assert result[1] == 422
+
+
+def test_banking_transfer_batch_rejects_non_positive_amount():
+    result = banking_service.transfer_funds_batch(1, [(1, 4, 10), (4, 1, -5)], False)
+    assert result[1] == 207
+    assert [item["status"] for item in json.loads(result[0])] == [200, 422]
+
+
+def test_banking_transfer_rejects_non_positive_amount():
+    balances = [account.get_balance() for account in (bank_account_dao.load_object(1), bank_account_dao.load_object(4))]
+    assert banking_service.transfer_funds(1, 1, 4, -5)[1] == 422
+    assert banking_service.transfer_funds(1, 1, 4, 0)[1] == 422
+    assert [bank_account_dao.load_object(account_id).get_balance() for account_id in (1, 4)] == balances
+
+
+def test_banking_get_account_not_modified():
+    account = bank_account_dao.create_record(BankAccount(1, "checking", 10))
+    result = banking_service.get_account(1, account.get_account_id())
+    etag = result[2]["ETag"]
+    assert banking_service.get_account(1, account.get_account_id(), etag)[1] == 304
+    assert banking_service.get_account(1, account.get_account_id(), f'"stale", W/{etag}')[1] == 304
+    assert banking_service.get_account(2, account.get_account_id(), etag)[1] == 404
+    banking_service.update_balance(1, account.get_account_id(), 5)
+    result = banking_service.get_account(1, account.get_account_id(), etag)
+    assert result[1] == 200
+    assert result[2]["ETag"] != etag
+
+
+def test_banking_get_client_not_modified():
+    result = banking_service.get_client(1)
+    etag = result[2]["ETag"]
+    assert banking_service.get_client(1, etag) == ("", 304, {"ETag": etag})
+    bank_account_dao.create_record(BankAccount(1, "savings"))
+    assert banking_service.get_client(1, etag)[1] == 200
+
+
+def test_banking_dropped_connection_is_server_error():
+    dropped = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+    service = BankingService()
+    service.account_dao = BankAccountDAO(dropped, "test_accounts2")
+    service.user_dao = AccountHolderDAO(dropped, "test_account_holders2", "test_accounts2")
+    try:
+        database.execute("SELECT pg_terminate_backend(%s)", [dropped.execute("SELECT pg_backend_pid()")[0][0]])
+        assert service.get_account(1, 1)[1] == 500
+    finally:
+        service.close()
+        dropped.close()
+
+
+def test_service_exports_csv_and_ndjson(memory_service):
+    service = memory_service
+    client = json.loads(service.create_client("Jane", "Roe, Jr.")[0])
+    service.create_accounts(client["identification"], ["checking", "savings"])
+    body, status = service.export_clients("csv")
+    assert status == 200
+    lines = "".join(body).splitlines()
+    assert lines[0] == "identification,firstName,lastName,accounts"
+    assert lines[1] == f'{client["identification"]},Jane,"Roe, Jr.",1 2'
+    body, status = service.export_accounts("ndjson")
+    accounts = [json.loads(line) for line in "".join(body).splitlines()]
+    assert [account["accountType"] for account in accounts] == ["checking", "savings"]
+    assert service.export_accounts("xml")[1] == 422
@@ -0,0 +1,32 @@
+from daos.accountholderdao import AccountHolderDAO
+from daos.cachingaccountholderdao import CachingAccountHolderDAO
+from entities.accountholder import AccountHolder
+from migrations.migrator import Migrator
+from util.lrucache import LRUCache
+from util.nosuchelementerror import NoSuchElementError
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
+cache = LRUCache(100, 60)
+client_dao = CachingAccountHolderDAO(AccountHolderDAO(database, "test_account_holders", "test_accounts"), cache)
+
+
+def test_cached_save_client_invalidates():
+    client = client_dao.create_record(AccountHolder("Jane", "Doe"))
+    client = client_dao.load_object(client.get_user_id())
+    client.set_first_name("Janet")
+    assert client_dao.load_object(client.get_user_id()).get_first_name() == "Jane"
+    client_dao.save_record(client)
+    assert client_dao.load_object(client.get_user_id()).get_first_name() == "Janet"
+
+
+def test_cached_delete_client_invalidates():
+    client = client_dao.create_record(AccountHolder("Jane1", "Doe1"))
+    client_dao.load_object(client.get_user_id())
+    client_dao.delete_record(client.get_user_id())
+    try:
+        client_dao.load_object(client.get_user_id())
+        assert False
+    except NoSuchElementError as e:
+        assert True
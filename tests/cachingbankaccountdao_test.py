@@ -0,0 +1,80 @@
+import json
+
+from daos.bankaccountdao import BankAccountDAO
+from daos.cachingbankaccountdao import CachingBankAccountDAO
+from entities.bankaccount import BankAccount
+from migrations.migrator import Migrator
+from util.lrucache import LRUCache
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
+cache = LRUCache(2, 60)
+bank_account_dao = CachingBankAccountDAO(BankAccountDAO(database, "test_accounts"), cache)
+
+
+def test_cached_load_record_success():
+    original = bank_account_dao.create_record(BankAccount(200, "savings", 5))
+    misses = cache.get_misses()
+    bank_account_dao.load_object(original.get_account_id())
+    hits = cache.get_hits()
+    returned = bank_account_dao.load_object(original.get_account_id())
+    assert cache.get_misses() == misses + 1
+    assert cache.get_hits() == hits + 1
+    assert returned.get_balance() == 5
+
+
+def test_cached_update_balance_invalidates():
+    original = bank_account_dao.create_record(BankAccount(200, "savings", 5))
+    bank_account_dao.load_object(original.get_account_id())
+    bank_account_dao.update_balance(original.get_account_id(), 200, 10)
+    assert bank_account_dao.load_object(original.get_account_id()).get_balance() == 15
+
+
+def test_cache_evicts_least_recently_used():
+    accounts = [bank_account_dao.create_record(BankAccount(200, "savings", 5)) for _ in range(3)]
+    for account in accounts:
+        bank_account_dao.load_object(account.get_account_id())
+    assert len(cache) == 2
+    assert cache.get(accounts[0].get_account_id()) is None
+
+
+def test_uncached_load_reads_past_the_cache():
+    original = bank_account_dao.create_record(BankAccount(200, "savings", 5))
+    bank_account_dao.load_object(original.get_account_id())
+    database.execute("UPDATE test_accounts SET balance = 7 WHERE account_id = %s", [original.get_account_id()])
+    database.commit()
+    assert bank_account_dao.load_object(original.get_account_id()).get_balance() == 5
+    assert bank_account_dao.load_object_uncached(original.get_account_id()).get_balance() == 7
+
+
+def test_read_through_skips_put_after_invalidation():
+    original = bank_account_dao.create_record(BankAccount(200, "savings", 5))
+    generation = cache.generation(original.get_account_id())
+    stale = BankAccount(200, "savings", 5, original.get_account_id(), 1)
+    cache.invalidate(original.get_account_id())
+    cache.put(original.get_account_id(), stale, generation)
+    assert cache.get(original.get_account_id()) is None
+    cache.put(original.get_account_id(), stale, cache.generation(original.get_account_id()))
+    assert cache.get(original.get_account_id()) is stale
+
+
+def test_load_version_reads_past_the_cache():
+    original = bank_account_dao.create_record(BankAccount(200, "savings", 5))
+    bank_account_dao.load_object(original.get_account_id())
+    database.execute("UPDATE test_accounts SET version = version + 1 WHERE account_id = %s",
+                     [original.get_account_id()])
+    database.commit()
+    assert bank_account_dao.load_version(original.get_account_id()) == (200, 2)
+
+
+def test_service_updates_account_from_a_fresh_read(memory_service):
+    client = json.loads(memory_service.create_client("John", "Doe")[0])
+    account_id = json.loads(memory_service.create_account(client["identification"], "checking")[0])["accounts"][0]
+    store = memory_service.account_dao
+    memory_service.account_dao = CachingBankAccountDAO(store, LRUCache(10, 60))
+    memory_service.account_dao.load_object(account_id)
+    store.update_balance(account_id, client["identification"], 25)
+    result = memory_service.update_account(client["identification"], account_id, "savings")
+    assert result[1] == 200
+    assert json.loads(result[0])["balance"] == 25
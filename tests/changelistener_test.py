@@ -0,0 +1,53 @@
+from threading import Event
+
+from daos.bankaccountdao import BankAccountDAO
+from entities.bankaccount import BankAccount
+from migrations.migrator import Migrator
+from util.changelistener import ChangeListener
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
+bank_account_dao = BankAccountDAO(database, "test_accounts")
+
+
+def test_listener_receives_account_change():
+    received = []
+    notified = Event()
+    listening = Event()
+    listener = ChangeListener("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature",
+                              poll_interval=0.1)
+    listener.on_reset(listening.set)
+    listener.subscribe("test_accounts", lambda ids: (received.append(ids), notified.set()))
+    listener.start()
+    try:
+        assert listening.wait(5)
+        account = bank_account_dao.create_record(BankAccount(300, "savings", 5))
+        assert notified.wait(5)
+        assert received[0] == [account.get_account_id(), 300]
+    finally:
+        listener.stop()
+
+
+def test_listener_receives_one_notification_per_statement():
+    received = []
+    resets = []
+    listening = Event()
+    batched = Event()
+    cleared = Event()
+    listener = ChangeListener("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature",
+                              poll_interval=0.1)
+    listener.on_reset(lambda: (resets.append(True), listening.set(), len(resets) > 1 and cleared.set()))
+    listener.subscribe("test_accounts", lambda ids: (received.append(ids), len(received) >= 3 and batched.set()))
+    listener.start()
+    try:
+        assert listening.wait(5)
+        accounts = bank_account_dao.create_records([BankAccount(301, "savings", 5) for _ in range(3)])
+        assert batched.wait(5)
+        assert sorted(received) == sorted([account.get_account_id(), 301] for account in accounts)
+        # a statement whose keys exceed one payload makes listeners drop everything instead
+        bank_account_dao.create_records([BankAccount(301, "savings", 5) for _ in range(1000)])
+        assert cleared.wait(5)
+        assert len(received) == 3
+    finally:
+        listener.stop()
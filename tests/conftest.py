@@ -0,0 +1,11 @@
+import pytest
+
+from services.bankingservice import BankingService
+
+
+@pytest.fixture
+def memory_service():
+    # close() unregisters the service's metrics collector and stops its threads
+    service = BankingService("memory")
+    yield service
+    service.close()
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from time import sleep
+
+from daos.bankaccountdao import BankAccountDAO
+from daos.ledgerdao import LedgerDAO, LedgerDAOInterface
+from entities.bankaccount import BankAccount
+from migrations.migrator import Migrator
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
+bank_account_dao = BankAccountDAO(database, "test_accounts")
+ledger_dao: LedgerDAOInterface = LedgerDAO(database, "test_accounts_ledger", "test_accounts_checkpoints")
+
+
+def utc_now() -> datetime:
+    # leave a gap so entries on either side of the moment cannot share a timestamp
+    sleep(0.005)
+    moment = datetime.now(timezone.utc).replace(tzinfo=None)
+    sleep(0.005)
+    return moment
+
+
+def test_balance_changes_recorded_in_ledger():
+    account = bank_account_dao.create_record(BankAccount(300, "checking", 100))
+    bank_account_dao.update_balance(account.get_account_id(), 300, 25)
+    bank_account_dao.update_balance(account.get_account_id(), 300, -5)
+    opening, entries = ledger_dao.load_statement(account.get_account_id(), datetime(2000, 1, 1), utc_now())
+    assert opening == 0
+    assert [entry.get_amount() for entry in entries] == [100, 25, -5]
+    assert [entry.get_balance() for entry in entries] == [100, 125, 120]
+
+
+def test_balance_at_moment():
+    account = bank_account_dao.create_record(BankAccount(301, "checking", 10))
+    before = utc_now()
+    bank_account_dao.update_balance(account.get_account_id(), 301, 40)
+    after = utc_now()
+    bank_account_dao.update_balance(account.get_account_id(), 301, 50)
+    assert ledger_dao.load_balance_at(account.get_account_id(), datetime(2000, 1, 1)) == 0
+    assert ledger_dao.load_balance_at(account.get_account_id(), before) == 10
+    assert ledger_dao.load_balance_at(account.get_account_id(), after) == 50
+    assert ledger_dao.load_balance_at(account.get_account_id(), utc_now()) == 100
+
+
+def test_balance_at_moment_uses_checkpoint_and_tail():
+    account = bank_account_dao.create_record(BankAccount(302, "savings", 10))
+    bank_account_dao.update_balance(account.get_account_id(), 302, 5)
+    assert ledger_dao.checkpoint_balances() > 0
+    middle = utc_now()
+    bank_account_dao.update_balance(account.get_account_id(), 302, 7)
+    assert ledger_dao.load_balance_at(account.get_account_id(), middle) == 15
+    assert ledger_dao.load_balance_at(account.get_account_id(), utc_now()) == 22
+    ledger_dao.checkpoint_balances()
+    checkpoints = database.execute("SELECT balance FROM test_accounts_checkpoints WHERE account_id = %s "
+                                   "ORDER BY entry_id", [account.get_account_id()])
+    assert [checkpoint[0] for checkpoint in checkpoints] == [15, 22]
+    assert ledger_dao.load_balance_at(account.get_account_id(), middle) == 15
+
+
+def test_batch_transfer_ledgered_with_transaction():
+    first = bank_account_dao.create_record(BankAccount(303, "checking", 100))
+    second = bank_account_dao.create_record(BankAccount(303, "savings", 0))
+    start = utc_now()
+    bank_account_dao.transfer_balances(303, [(first.get_account_id(), second.get_account_id(), 30),
+                                             (first.get_account_id(), second.get_account_id(), 20)], True)
+    bank_account_dao.transfer_balances(303, [(first.get_account_id(), second.get_account_id(), 500)], True)
+    end = utc_now()
+    _, entries = ledger_dao.load_statement(first.get_account_id(), start, end)
+    assert [entry.get_amount() for entry in entries] == [-50]
+    _, entries = ledger_dao.load_statement(second.get_account_id(), start, end)
+    assert [entry.get_amount() for entry in entries] == [50]
+
+
+def test_statement_window():
+    account = bank_account_dao.create_record(BankAccount(304, "checking", 10))
+    start = utc_now()
+    bank_account_dao.update_balance(account.get_account_id(), 304, 1)
+    bank_account_dao.update_balance(account.get_account_id(), 304, 2)
+    end = utc_now()
+    bank_account_dao.update_balance(account.get_account_id(), 304, 4)
+    opening, entries = ledger_dao.load_statement(account.get_account_id(), start, end)
+    assert opening == 10
+    assert [entry.get_balance() for entry in entries] == [11, 13]
+    assert all(start < entry.get_created_at() <= end for entry in entries)
+    assert ledger_dao.load_statement(account.get_account_id(), end, end + timedelta(days=1))[1][0].get_amount() == 4
+
+
+def test_balance_at_moment_follows_created_at_not_entry_order():
+    # an overlapping transaction can take the later entry id with the earlier timestamp
+    for amount, created_at in ((10, "2020-01-01 00:00:02"), (5, "2020-01-01 00:00:01")):
+        database.execute("INSERT INTO test_accounts_ledger (account_id, amount, created_at) VALUES (%s, %s, %s)",
+                         [99305, amount, created_at])
+    database.commit()
+    assert ledger_dao.load_balance_at(99305, datetime(2020, 1, 1, 0, 0, 1, 500000)) == 5
+    assert ledger_dao.checkpoint_balances() > 0
+    assert ledger_dao.load_balance_at(99305, datetime(2020, 1, 1, 0, 0, 1, 500000)) == 5
+    assert ledger_dao.load_balance_at(99305, datetime(2020, 1, 1, 0, 0, 3)) == 15
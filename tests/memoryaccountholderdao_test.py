@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from daos.memoryaccountholderdao import MemoryAccountHolderDAO
+from daos.memorybankaccountdao import MemoryBankAccountDAO
+from entities.accountholder import AccountHolder
+from entities.bankaccount import BankAccount
+from util.nosuchelementerror import NoSuchElementError
+
+bank_account_dao = MemoryBankAccountDAO()
+client_dao = MemoryAccountHolderDAO(bank_account_dao)
+
+
+def test_load_client_with_accounts():
+    client = client_dao.create_record(AccountHolder("John", "Doe"))
+    account = bank_account_dao.create_record(BankAccount(client.get_user_id(), "checking"))
+    assert client_dao.load_object(client.get_user_id()).get_accounts() == [account.get_account_id()]
+
+
+def test_load_all_objects_pages():
+    clients = client_dao.create_records([AccountHolder("A", "B"), AccountHolder("C", "D"), AccountHolder("E", "F")])
+    returned = client_dao.load_all_objects(clients[0].get_user_id(), 1)
+    assert list(returned.keys()) == [clients[1].get_user_id()]
+
+
+def test_delete_client_removes_accounts():
+    client = client_dao.create_record(AccountHolder("John", "Doe"))
+    account = bank_account_dao.create_record(BankAccount(client.get_user_id(), "checking"))
+    client_dao.delete_record(client.get_user_id())
+    with pytest.raises(NoSuchElementError):
+        client_dao.load_object(client.get_user_id())
+    with pytest.raises(NoSuchElementError):
+        bank_account_dao.load_object(account.get_account_id())
+
+
+def test_banking_service_in_memory(memory_service):
+    banking_service = memory_service
+    client = json.loads(banking_service.create_client("John", "Doe")[0])
+    accounts = json.loads(banking_service.create_accounts(client["identification"], ["checking", "savings"])[0])
+    banking_service.update_balance(client["identification"], accounts[0]["accountId"], 100)
+    result = banking_service.transfer_funds(client["identification"], accounts[0]["accountId"],
+                                            accounts[1]["accountId"], 40)
+    assert result[1] == 200
+    assert [account["balance"] for account in json.loads(result[0])] == [60.0, 40.0]
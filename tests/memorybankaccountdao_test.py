@@ -0,0 +1,81 @@
+import pytest
+
+from daos.memorybankaccountdao import MemoryBankAccountDAO
+from entities.bankaccount import BankAccount
+from util.insufficientfundserror import InsufficientFundsError
+from util.nosuchelementerror import NoSuchElementError
+from util.staleversionerror import StaleVersionError
+
+bank_account_dao = MemoryBankAccountDAO()
+
+
+def test_create_and_load_record():
+    returned = bank_account_dao.create_record(BankAccount(1, "savings", 5))
+    assert bank_account_dao.load_object(returned.get_account_id()).get_balance() == 5
+
+
+def test_load_objects_by_balance_range():
+    accounts = bank_account_dao.create_records([BankAccount(2, "checking", balance) for balance in (50, 10, 30, 70)])
+    returned = bank_account_dao.load_objects(2, 20, 60)
+    assert list(returned.keys()) == [accounts[0].get_account_id(), accounts[2].get_account_id()]
+
+
+def test_load_objects_pages_in_id_order():
+    accounts = bank_account_dao.create_records([BankAccount(3, "checking", balance) for balance in (9, 1, 5)])
+    returned = bank_account_dao.load_objects(3, after=accounts[0].get_account_id(), limit=1)
+    assert list(returned.keys()) == [accounts[1].get_account_id()]
+
+
+def test_update_balance_keeps_balance_index():
+    account = bank_account_dao.create_record(BankAccount(4, "checking", 5))
+    bank_account_dao.update_balance(account.get_account_id(), 4, 100)
+    assert list(bank_account_dao.load_objects(4, 50).keys()) == [account.get_account_id()]
+    with pytest.raises(InsufficientFundsError):
+        bank_account_dao.update_balance(account.get_account_id(), 4, -1000)
+
+
+def test_transfer_balances_atomic_failure():
+    account1, account2 = bank_account_dao.create_records([BankAccount(5, "savings", 50), BankAccount(5, "checking")])
+    errors = bank_account_dao.transfer_balances(5, [(account1.get_account_id(), account2.get_account_id(), 20),
+                                                    (account1.get_account_id(), 10000, 5)], True)
+    assert errors[0] is None
+    assert isinstance(errors[1], NoSuchElementError)
+    assert bank_account_dao.load_object(account1.get_account_id()).get_balance() == 50
+
+
+def test_delete_record():
+    account = bank_account_dao.create_record(BankAccount(6, "checking", 5))
+    bank_account_dao.delete_record(account.get_account_id())
+    assert bank_account_dao.load_objects(6) == {}
+    with pytest.raises(NoSuchElementError):
+        bank_account_dao.load_object(account.get_account_id())
+
+
+def test_version_changes_with_every_write():
+    account = bank_account_dao.create_record(BankAccount(7, "checking", 5))
+    assert bank_account_dao.load_version(account.get_account_id()) == (7, 1)
+    bank_account_dao.update_balance(account.get_account_id(), 7, 5)
+    account = bank_account_dao.load_object(account.get_account_id())
+    account.set_account_type("savings")
+    bank_account_dao.save_record(account)
+    assert bank_account_dao.load_version(account.get_account_id()) == (7, 3)
+    assert bank_account_dao.load_object(account.get_account_id()).get_version() == 3
+
+
+def test_save_record_rejects_stale_version():
+    account = bank_account_dao.create_record(BankAccount(8, "checking", 5))
+    bank_account_dao.update_balance(account.get_account_id(), 8, 5)
+    account.set_account_type("savings")
+    with pytest.raises(StaleVersionError):
+        bank_account_dao.save_record(account)
+    assert bank_account_dao.load_object(account.get_account_id()).get_balance() == 10
+
+
+def test_transfer_balances_leaves_accounts_of_failed_transfers_untouched():
+    first, second, third = bank_account_dao.create_records([BankAccount(9, "checking", 50), BankAccount(9, "savings"),
+                                                            BankAccount(9, "savings", 5)])
+    errors = bank_account_dao.transfer_balances(9, [(first.get_account_id(), second.get_account_id(), 20),
+                                                    (third.get_account_id(), second.get_account_id(), 100)], False)
+    assert errors[0] is None and isinstance(errors[1], InsufficientFundsError)
+    assert bank_account_dao.load_version(second.get_account_id()) == (9, 2)
+    assert bank_account_dao.load_version(third.get_account_id()) == (9, 1)
@@ -0,0 +1,56 @@
+import json
+from datetime import datetime, timezone
+from time import sleep
+
+from daos.memorybankaccountdao import MemoryBankAccountDAO
+from daos.memoryledgerdao import MemoryLedgerDAO
+from entities.bankaccount import BankAccount
+
+ledger_dao = MemoryLedgerDAO()
+bank_account_dao = MemoryBankAccountDAO(ledger_dao)
+
+
+def utc_now() -> datetime:
+    sleep(0.002)
+    moment = datetime.now(timezone.utc).replace(tzinfo=None)
+    sleep(0.002)
+    return moment
+
+
+def test_balance_at_moment_and_statement():
+    account = bank_account_dao.create_record(BankAccount(1, "checking", 10))
+    before = utc_now()
+    bank_account_dao.update_balance(account.get_account_id(), 1, 5)
+    bank_account_dao.delete_record(account.get_account_id())
+    assert ledger_dao.load_balance_at(account.get_account_id(), before) == 10
+    assert ledger_dao.load_balance_at(account.get_account_id(), utc_now()) == 0
+    opening, entries = ledger_dao.load_statement(account.get_account_id(), before, utc_now())
+    assert opening == 10
+    assert [(entry.get_amount(), entry.get_balance()) for entry in entries] == [(5, 15), (-15, 0)]
+
+
+def test_batch_transfer_records_net_change():
+    first = bank_account_dao.create_record(BankAccount(2, "checking", 100))
+    second = bank_account_dao.create_record(BankAccount(2, "savings"))
+    start = utc_now()
+    bank_account_dao.transfer_balances(2, [(first.get_account_id(), second.get_account_id(), 30),
+                                           (first.get_account_id(), second.get_account_id(), 20)], True)
+    _, entries = ledger_dao.load_statement(first.get_account_id(), start, utc_now())
+    assert [entry.get_amount() for entry in entries] == [-50]
+
+
+def test_service_statement(memory_service):
+    service = memory_service
+    client = json.loads(service.create_client("John", "Doe")[0])
+    client = json.loads(service.create_account(client["identification"], "checking")[0])
+    account_id = client["accounts"][0]
+    start = utc_now()
+    service.update_balance(client["identification"], account_id, 40)
+    body, status = service.get_statement(client["identification"], account_id, start, utc_now())
+    assert status == 200
+    statement = json.loads(body)
+    assert statement["openingBalance"] == 0
+    assert statement["closingBalance"] == 40
+    assert [entry["amount"] for entry in statement["entries"]] == [40]
+    assert service.get_statement(client["identification"] + 1, account_id, start, utc_now())[1] == 404
+    assert json.loads(service.get_balance_at(client["identification"], account_id, start)[0])["balance"] == 0
@@ -0,0 +1,49 @@
+from util.lrucache import LRUCache
+from util.metrics import CACHE_LOOKUPS, REGISTRY, Counter, Histogram, MetricsRegistry, statement_label
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency", ("route",), (0.1, 1.0))
+    histogram.observe(0.05, "/clients")
+    histogram.observe(0.5, "/clients")
+    histogram.observe(5, "/clients")
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{route="/clients",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/clients",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/clients",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{route="/clients"} 3' in lines
+
+
+def test_registry_runs_collectors():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("test_total", "Test counter", ("kind",)))
+    registry.add_collector(lambda: counter.inc(2, "a\"b"))
+    assert 'test_total{kind="a\\"b"} 2' in registry.render()
+
+
+def test_statement_label_collapses_placeholder_lists():
+    assert statement_label("SELECT *\n  FROM accounts WHERE account_id IN (%s, %s, %s)") == \
+           "SELECT * FROM accounts WHERE account_id IN (%s, ...)"
+
+
+def test_registry_drops_removed_collectors():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("test_removed_total", "Test counter", ("kind",)))
+    collector = lambda: counter.inc(1, "run")
+    registry.add_collector(collector)
+    registry.render()
+    registry.remove_collector(collector)
+    registry.remove_collector(collector)
+    assert 'test_removed_total{kind="run"} 1' in registry.render()
+
+
+def test_cache_lookups_count_up_across_scrapes(memory_service):
+    service = memory_service
+    service.client_cache = LRUCache(10, 30.0)
+    service.client_cache.get(1)
+    before = CACHE_LOOKUPS.get("clients", "miss")
+    rendered = REGISTRY.render()
+    REGISTRY.render()
+    assert "# TYPE banking_cache_lookups_total counter" in rendered
+    assert "# TYPE banking_account_lock_contentions gauge" in rendered
+    assert CACHE_LOOKUPS.get("clients", "miss") == before + 1
@@ -0,0 +1,38 @@
+from migrations.migrator import MIGRATIONS, Migrator
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature")
+
+
+def test_migrate_to_target_version():
+    migrator = Migrator(database, "test_migration_holders", "test_migration_accounts", False)
+    migrator.migrate(2)
+    assert migrator.current_version() >= 2
+
+
+def test_migrate_is_idempotent():
+    migrator = Migrator(database, "test_migration_holders", "test_migration_accounts", False)
+    migrator.migrate()
+    assert migrator.migrate() == []
+    assert migrator.current_version() == MIGRATIONS[-1][0]
+
+
+def test_migrate_creates_owner_balance_index():
+    Migrator(database, "test_migration_holders", "test_migration_accounts", False).migrate()
+    results = database.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s",
+                               ["test_migration_accounts"])
+    assert "test_migration_accounts_owner_balance_idx" in [result[0] for result in results]
+
+
+def test_migrate_replaces_row_notify_triggers():
+    migrator = Migrator(database, "test_events_holders", "test_events_accounts", False)
+    sql = "SELECT t.tgname FROM pg_trigger t JOIN pg_class c ON c.oid = t.tgrelid " \
+          "WHERE c.relname = %s AND t.tgname LIKE '%%notify%%' ORDER BY t.tgname"
+    migrator.migrate(7)
+    assert database.execute(sql, ["test_events_accounts"]) == [("test_events_accounts_notify_change",)]
+    migrator.migrate()
+    assert database.execute(sql, ["test_events_accounts"]) == [("test_events_accounts_notify_delete",),
+                                                               ("test_events_accounts_notify_insert",),
+                                                               ("test_events_accounts_notify_update",)]
+    assert database.execute("SELECT proname FROM pg_proc WHERE proname = %s",
+                            ["test_events_accounts_notify_change"]) == []
@@ -0,0 +1,116 @@
+from threading import Barrier, Thread
+from psycopg2.errors import DivisionByZero
+
+from migrations.migrator import Migrator
+from util.databasedriver import modifies_rows, statement_count
+from util.postgresdb import PostgresDB
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature",
+                      group_commit_size=16, group_commit_window=0.05)
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
+
+
+def run_concurrently(writes: list) -> list:
+    results = [None] * len(writes)
+    barrier = Barrier(len(writes))
+
+    def run(index: int) -> None:
+        barrier.wait()
+        try:
+            results[index] = writes[index]()
+        except Exception as e:
+            results[index] = e
+
+    threads = [Thread(target=run, args=(index,)) for index in range(len(writes))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def insert(owner_id: int, balance: str = "0"):
+    sql = f"INSERT INTO test_accounts (owner_id, account_type, balance) VALUES (%s, 'checking', {balance}) " \
+          f"RETURNING account_id, txid_current()"
+    return lambda: database.execute(sql, [owner_id])
+
+
+def test_concurrent_writes_share_one_commit():
+    results = run_concurrently([insert(500) for _ in range(8)])
+    assert all(len(result) == 1 for result in results)
+    assert len({result[0][1] for result in results}) == 1
+    assert len({result[0][0] for result in results}) == 8
+
+
+def test_prepared_writes_grouped():
+    sql = "UPDATE test_accounts SET balance = balance + %s WHERE owner_id = %s RETURNING txid_current()"
+    results = run_concurrently([lambda: database.execute_prepared("group_commit_update", sql, [1, 500])
+                                for _ in range(4)])
+    assert len({result[0][0] for result in results}) == 1
+    balances = database.execute("SELECT DISTINCT balance FROM test_accounts WHERE owner_id = %s", [500])
+    assert balances == [(4.0,)]
+
+
+def test_failed_write_only_fails_its_caller():
+    results = run_concurrently([insert(501), insert(501, "1/0"), insert(501)])
+    assert isinstance(results[1], DivisionByZero)
+    assert len(results[0]) == 1 and len(results[2]) == 1
+    assert len(database.execute("SELECT * FROM test_accounts WHERE owner_id = %s", [501])) == 2
+
+
+def test_reads_and_transactions_not_grouped():
+    results = run_concurrently([lambda: database.execute("SELECT txid_current()") for _ in range(2)])
+    assert results[0][0][0] != results[1][0][0]
+    results = run_concurrently([lambda: database.execute("WITH t AS (SELECT 1) SELECT txid_current() FROM t")
+                                for _ in range(2)])
+    assert results[0][0][0] != results[1][0][0]
+    with database.transaction():
+        first = database.execute("UPDATE test_accounts SET balance = 0 WHERE owner_id = %s RETURNING txid_current()",
+                                 [501])
+        second = database.execute("SELECT txid_current()")
+    assert first[0][0] == second[0][0]
+
+
+def test_grouped_writes_counted_on_the_calling_thread():
+    before = statement_count()
+    insert(503)()
+    insert(503)()
+    assert statement_count() == before + 2
+
+
+def test_failed_statement_raises():
+    try:
+        database.execute("SELECT 1/0")
+        assert False
+    except DivisionByZero:
+        pass
+    try:
+        with database.transaction():
+            database.execute_prepared("test_divide", "SELECT 1/%s", [0])
+        assert False
+    except DivisionByZero:
+        pass
+
+
+def test_statement_verb_decides_grouping():
+    assert modifies_rows("INSERT INTO test_accounts (owner_id) VALUES (%s)")
+    assert modifies_rows("WITH moved AS (UPDATE test_accounts SET balance = 0 RETURNING *) SELECT * FROM moved")
+    assert modifies_rows("WITH ids AS (SELECT 1 AS id) DELETE FROM test_accounts USING ids WHERE account_id = ids.id")
+    assert not modifies_rows("WITH ids AS (SELECT 1) SELECT * FROM ids")
+    assert not modifies_rows("SELECT * FROM test_accounts WHERE account_type = 'update' FOR UPDATE")
+    assert not modifies_rows("SHOW search_path")
+    assert not modifies_rows("EXPLAIN SELECT 1")
+
+
+def test_grouped_prepared_write_prepares_again():
+    single = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature",
+                        max_connections=1, group_commit_size=4, group_commit_window=0.001)
+    sql = "INSERT INTO test_accounts (owner_id, account_type, balance) VALUES (%s, 'checking', 0) RETURNING account_id"
+    try:
+        assert len(single.execute_prepared("test_grouped_insert", sql, [504])) == 1
+        # e.g. a pooler running DISCARD ALL between sessions
+        single.execute("DEALLOCATE ALL")
+        assert len(single.execute_prepared("test_grouped_insert", sql, [504])) == 1
+    finally:
+        single.close()
+    assert len(database.execute("SELECT * FROM test_accounts WHERE owner_id = %s", [504])) == 2
@@ -0,0 +1,16 @@
+from prefork import RequestBudget, parse_bind
+
+
+def test_parse_bind():
+    assert parse_bind("0.0.0.0:8000") == ("0.0.0.0", 8000)
+    assert parse_bind(":8000") == ("127.0.0.1", 8000)
+
+
+def test_request_budget_signals_once():
+    exhausted = []
+    app = RequestBudget(lambda environ, start_response: [b"ok"], 2, lambda: exhausted.append(True))
+    assert app({}, None) == [b"ok"]
+    assert len(exhausted) == 0
+    for _ in range(3):
+        assert app({}, None) == [b"ok"]
+    assert len(exhausted) == 1
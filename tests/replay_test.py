@@ -0,0 +1,21 @@
+from benchmarks.replay import percentile, replay, route_of
+
+
+def test_route_of_groups_ids():
+    assert route_of("PATCH", "/clients/12/accounts/7/transfer/9") == "PATCH /clients/<id>/accounts/<id>/transfer/<id>"
+    assert route_of("GET", "/clients?limit=50") == "GET /clients"
+
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 0.50) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([], 0.95) == 0.0
+
+
+def test_replay_reports_routes():
+    results = replay(lambda request: (200, b"[]", 2), [{"method": "GET", "path": "/clients/1"},
+                                                       {"method": "GET", "path": "/clients/2"}], 2)
+    assert results["requests"] == 2
+    assert results["routes"]["GET /clients/<id>"]["count"] == 2
+    assert results["routes"]["GET /clients/<id>"]["queries_per_request"] == 2
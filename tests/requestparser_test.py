@@ -0,0 +1,38 @@
+from math import inf
+
+import pytest
+
+from util.dataerror import DataError
+from util.requestparser import parse_account_type, parse_balance_change, parse_balance_range, parse_names, \
+    parse_page_args, parse_transfers
+
+
+def test_parse_names_leaves_missing_names_unset():
+    assert parse_names({"firstName": "Jane", "lastName": 7}) == ("Jane", "7")
+    assert parse_names({"firstName": "Jane"}) == ("Jane", None)
+
+
+def test_parse_account_type_required():
+    assert parse_account_type({"accountType": "savings"}) == "savings"
+    with pytest.raises(DataError):
+        parse_account_type({"balance": 5})
+
+
+def test_parse_balance_change_nets_deposit_and_withdrawal():
+    assert parse_balance_change({"deposit": 50, "withdraw": "20"}) == 30
+
+
+def test_parse_transfers_defaults_to_atomic():
+    assert parse_transfers({"transfers": [{"from": 1, "to": "2", "amount": 3}]}) == ([(1, 2, 3)], True)
+    assert parse_transfers({"atomic": False})[1] is False
+    with pytest.raises(DataError):
+        parse_transfers({"atomic": "false"})
+
+
+def test_parse_query_args():
+    assert parse_page_args({"after": "4", "limit": "10", "stream": "yes"}) == (4, 10, True)
+    assert parse_page_args({}) == (None, None, False)
+    with pytest.raises(ValueError):
+        parse_page_args({"limit": "0"})
+    assert parse_balance_range({}) == (0.0, inf)
+    assert parse_balance_range({"amountGreaterThan": "5", "amountLessThan": "9"}) == (5, 9)
@@ -0,0 +1,47 @@
+import server
+from services.bankingservice import BankingService
+
+
+def test_transfer_batch_requires_boolean_atomic():
+    response = server.app.test_client().patch("/clients/1/accounts/transfers",
+                                              json={"atomic": "false", "transfers": []})
+    assert response.status_code == 400
+
+
+def test_export_route_streams_attachment():
+    server.banking_service = BankingService("memory")
+    try:
+        server.banking_service.create_client("Jane", "Roe")
+        response = server.app.test_client().get("/export/clients?format=csv")
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        assert response.headers["Content-Disposition"] == "attachment; filename=clients.csv"
+        assert response.get_data(as_text=True).splitlines()[0] == "identification,firstName,lastName,accounts"
+        response = server.app.test_client().get("/export/accounts")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        assert response.headers["Content-Disposition"] == "attachment; filename=accounts.ndjson"
+        assert server.app.test_client().get("/export/accounts?format=xml").status_code == 422
+        assert server.app.test_client().get("/export/ledger").status_code == 404
+    finally:
+        server.banking_service.close()
+        server.reset_service()
+
+
+def test_get_service_is_lazy_and_reset_by_workers(monkeypatch):
+    monkeypatch.setattr(server, "BankingService", lambda: BankingService("memory"))
+    server.reset_service()
+    assert server.banking_service is None
+    service = server.get_service()
+    assert server.get_service() is service
+    server.reset_service()
+    assert server.banking_service is None
+    replacement = server.get_service()
+    assert replacement is not service
+    service.close()
+    replacement.close()
+    server.reset_service()
+
+
+def test_debug_off_when_imported():
+    assert not server.app.debug
@@ -0,0 +1,76 @@
+import json
+import logging
+
+from daos.bankaccountdao import BankAccountDAO
+from entities.bankaccount import BankAccount
+from migrations.migrator import Migrator
+from util.postgresdb import PostgresDB
+from util.slowquerylog import explain_analyzes, redact
+
+database = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature",
+                      slow_query_ms=0, explain_sample_rate=1.0)
+Migrator(database, "test_account_holders", "test_accounts", False).migrate()
+bank_account_dao = BankAccountDAO(database, "test_accounts")
+
+
+def slow_queries(caplog) -> list[dict]:
+    return [json.loads(record.getMessage()) for record in caplog.records if record.name == "banking.slowqueries"]
+
+
+def test_redact_keeps_only_types():
+    assert redact([5, "secret", 2.5, [1, 2, 3], None]) == ["<int>", "<str>", "<float>", "<list[3]>", "<NoneType>"]
+    assert redact(None) == []
+
+
+def test_slow_write_logged_with_caller(caplog):
+    caplog.set_level(logging.WARNING, "banking.slowqueries")
+    bank_account_dao.create_record(BankAccount(4242, "checking", 17))
+    records = slow_queries(caplog)
+    assert len(records) > 0
+    record = [record for record in records if record["statement"].startswith("INSERT")][-1]
+    assert record["event"] == "slow_query"
+    assert record["caller"] == "daos.bankaccountdao.BankAccountDAO.create_record"
+    assert record["statement"].startswith("INSERT INTO test_accounts")
+    assert record["parameters"] == ["<int>", "<str>", "<float>"]
+    assert "4242" not in json.dumps(record)
+    assert "plan" not in record
+
+
+def test_explain_analyzes_only_plain_reads():
+    assert explain_analyzes("SELECT * FROM accounts WHERE account_id = %s")
+    assert not explain_analyzes("SELECT * FROM accounts WHERE account_id IN (%s, %s) ORDER BY account_id FOR UPDATE")
+    assert not explain_analyzes("select * from accounts for no key update")
+    assert not explain_analyzes("SELECT * FROM accounts FOR SHARE")
+    assert not explain_analyzes("SELECT pg_advisory_xact_lock(hashtext(%s))")
+    assert not explain_analyzes("SELECT pg_notify('banking_changes', 'accounts:1') FROM accounts")
+    assert not explain_analyzes("SELECT nextval('accounts_account_id_seq')")
+    assert not explain_analyzes("UPDATE accounts SET balance = 0")
+
+
+def test_locking_read_planned_without_running(caplog):
+    caplog.set_level(logging.WARNING, "banking.slowqueries")
+    explained = PostgresDB("revaturedb.cw0dgbcoagdz.us-east-2.rds.amazonaws.com", "revature", "revature",
+                           slow_query_ms=0, explain_sample_rate=1.0)
+    dao = BankAccountDAO(explained, "test_accounts")
+    account1, account2 = dao.create_records([BankAccount(4244, "checking", 30), BankAccount(4244, "savings", 0)])
+    dao.transfer_balance(4244, account1.get_account_id(), account2.get_account_id(), 10)
+    explained.close()
+    records = [record for record in slow_queries(caplog) if "FOR UPDATE" in record["statement"]]
+    assert len(records) == 1
+    assert records[0]["plan_analyzed"] is False
+    assert "Actual Rows" not in json.dumps(records[0]["plan"])
+
+
+def test_slow_select_explained(caplog):
+    caplog.set_level(logging.WARNING, "banking.slowqueries")
+    account = bank_account_dao.create_record(BankAccount(4243, "savings", 30))
+    bank_account_dao.load_object(account.get_account_id())
+    database.close()
+    records = [record for record in slow_queries(caplog) if record["statement"].startswith("SELECT")]
+    assert len(records) >= 2
+    for record in records:
+        assert record["caller"] == "daos.bankaccountdao.BankAccountDAO.load_object"
+        assert record["parameters"] == ["<int>"]
+        assert record["plan_analyzed"] is True
+        assert "Shared Hit Blocks" in record["plan"][0]["Plan"]
+        assert record["plan"][0]["Plan"]["Index Cond"] == "(account_id = $1)"
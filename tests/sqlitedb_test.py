@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import tempfile
+from threading import Event, Thread
+from time import perf_counter
+
+from daos.accountholderdao import AccountHolderDAO
+from daos.bankaccountdao import BankAccountDAO
+from entities.accountholder import AccountHolder
+from entities.bankaccount import BankAccount
+from migrations.migrator import Migrator
+from util.sqlitedb import SQLiteDB
+
+path = os.path.join(tempfile.mkdtemp(), "banking.db")
+database = SQLiteDB(path, commit_batch=50)
+Migrator(database, "test_account_holders", "test_accounts").migrate()
+client_dao = AccountHolderDAO(database, "test_account_holders", "test_accounts")
+bank_account_dao = BankAccountDAO(database, "test_accounts")
+
+
+def test_database_uses_wal():
+    assert database.execute("PRAGMA journal_mode")[0][0] == "wal"
+
+
+def test_load_client_with_accounts():
+    client = client_dao.create_record(AccountHolder("John", "Doe"))
+    accounts = bank_account_dao.create_records([BankAccount(client.get_user_id(), "checking"),
+                                                BankAccount(client.get_user_id(), "savings")])
+    assert client_dao.load_object(client.get_user_id()).get_accounts() == [account.get_account_id()
+                                                                           for account in accounts]
+
+
+def test_transfer_balances():
+    client = client_dao.create_record(AccountHolder("John", "Doe"))
+    account1, account2 = bank_account_dao.create_records([BankAccount(client.get_user_id(), "checking", 50),
+                                                          BankAccount(client.get_user_id(), "savings", 5)])
+    errors = bank_account_dao.transfer_balances(client.get_user_id(),
+                                                [(account1.get_account_id(), account2.get_account_id(), 20)], True)
+    assert errors == [None]
+    assert bank_account_dao.load_object(account2.get_account_id()).get_balance() == 25
+
+
+def test_batched_writes_visible_to_streams():
+    client = client_dao.create_record(AccountHolder("John", "Doe"))
+    account = bank_account_dao.create_record(BankAccount(client.get_user_id(), "checking", 5))
+    bank_account_dao.update_balance(account.get_account_id(), client.get_user_id(), 10)
+    streamed = list(bank_account_dao.stream_objects(client.get_user_id()))
+    assert [account.get_balance() for account in streamed] == [15]
+
+
+def test_migrate_is_idempotent():
+    assert Migrator(database, "test_account_holders", "test_accounts").migrate() == []
+
+
+def test_batched_write_is_committed_before_it_returns():
+    client = client_dao.create_record(AccountHolder("John", "Doe"))
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute("SELECT first_name FROM test_account_holders WHERE user_id = ?",
+                                  [client.get_user_id()]).fetchall()
+    finally:
+        connection.close()
+    assert rows == [("John",)]
+    assert database.get_pool_stats()["pending_writes"] == 0
+
+
+def scratch_database(commit_interval: float) -> SQLiteDB:
+    scratch = SQLiteDB(os.path.join(tempfile.mkdtemp(), "scratch.db"), commit_batch=50, commit_interval=commit_interval)
+    scratch.execute("CREATE TABLE entries (value int)")
+    return scratch
+
+
+def test_pragma_not_batched():
+    scratch = scratch_database(5.0)
+    try:
+        started = perf_counter()
+        scratch.execute("PRAGMA user_version = 3")
+        assert scratch.execute("PRAGMA user_version") == [(3,)]
+        assert perf_counter() - started < 1.0
+        assert scratch.get_pool_stats()["pending_writes"] == 0
+    finally:
+        scratch.close()
+
+
+def test_reads_skip_the_open_batch():
+    scratch = scratch_database(0.5)
+    try:
+        writer = Thread(target=lambda: scratch.execute("INSERT INTO entries VALUES (%s)", [1]))
+        writer.start()
+        while scratch.get_pool_stats()["pending_writes"] == 0:
+            pass
+        assert scratch.execute("SELECT count(*) FROM entries") == [(0,)]
+        writer.join()
+        assert scratch.execute("SELECT count(*) FROM entries") == [(1,)]
+    finally:
+        scratch.close()
+
+
+def test_transaction_does_not_hold_up_reads():
+    scratch = scratch_database(0.01)
+    held = Event()
+    release = Event()
+
+    def hold() -> None:
+        with scratch.transaction():
+            scratch.execute("INSERT INTO entries VALUES (%s)", [2])
+            held.set()
+            release.wait()
+
+    thread = Thread(target=hold)
+    thread.start()
+    held.wait()
+    counts = []
+    reader = Thread(target=lambda: counts.append(scratch.execute("SELECT count(*) FROM entries")))
+    reader.start()
+    reader.join(1.0)
+    release.set()
+    thread.join()
+    reader.join()
+    scratch.close()
+    assert counts[:1] == [[(0,)]]
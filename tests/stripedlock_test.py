@@ -0,0 +1,95 @@
+import json
+from threading import Barrier, Event, Thread
+
+import pytest
+
+from util.locktimeouterror import LockTimeoutError
+from util.stripedlock import StripedLock
+
+
+def test_opposite_order_transfers_do_not_deadlock():
+    locks = StripedLock(8)
+    barrier = Barrier(2)
+    counts = [0, 0]
+
+    def transfer(index: int, first: int, second: int) -> None:
+        barrier.wait()
+        for _ in range(2000):
+            with locks.hold(first, second):
+                counts[index] += 1
+
+    threads = [Thread(target=transfer, args=(0, 1, 2)), Thread(target=transfer, args=(1, 2, 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert counts == [2000, 2000]
+
+
+def test_accounts_sharing_a_stripe_can_be_held_together():
+    locks = StripedLock(4)
+    with locks.hold(1, 5, 9, 1):
+        pass
+    with locks.hold(1):
+        pass
+
+
+def test_contention_recorded_and_timeout_raised():
+    locks = StripedLock(8, timeout=0.05)
+    held = Event()
+    release = Event()
+
+    def hold() -> None:
+        with locks.hold(7):
+            held.set()
+            release.wait()
+
+    thread = Thread(target=hold)
+    thread.start()
+    held.wait()
+    with pytest.raises(LockTimeoutError):
+        with locks.hold(3, 7):
+            pass
+    release.set()
+    thread.join()
+    with locks.hold(3, 7):
+        pass
+    assert locks.get_contentions(7) == 1
+    assert locks.most_contended(1) == [(7, 1)]
+
+
+def test_service_rejects_busy_account(memory_service):
+    service = memory_service
+    service.account_locks = StripedLock(4, timeout=0.05)
+    client = json.loads(service.create_client("John", "Doe")[0])
+    account_id = json.loads(service.create_account(client["identification"], "checking")[0])["accounts"][0]
+    results = []
+    with service.account_locks.hold(account_id):
+        thread = Thread(target=lambda: results.append(service.update_balance(client["identification"], account_id, 10)))
+        thread.start()
+        thread.join()
+    assert results[0][1] == 503
+    assert service.update_balance(client["identification"], account_id, 10)[1] == 200
+
+
+def test_contentions_tracked_for_a_bounded_number_of_accounts():
+    locks = StripedLock(1, timeout=0.001, tracked=4)
+    held = Event()
+    release = Event()
+
+    def hold() -> None:
+        with locks.hold(0):
+            held.set()
+            release.wait()
+
+    thread = Thread(target=hold)
+    thread.start()
+    held.wait()
+    for account_id in [1, 1, 1] + list(range(2, 50)):
+        with pytest.raises(LockTimeoutError):
+            with locks.hold(account_id):
+                pass
+    release.set()
+    thread.join()
+    assert len(locks.most_contended(100)) <= 4
+    assert locks.most_contended(1) == [(1, 3)]
@@ -0,0 +1,211 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+import psycopg2
+from psycopg2 import extensions
+
+from util.pooltimeouterror import PoolTimeoutError
+
+VALUES_SLOT = re.compile(r"VALUES\s+%s", re.IGNORECASE)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AsyncPostgresDB:
+
+    def __init__(self, host: str, username: str, password: str, port: Optional[int] = 5432,
+                 database: Optional[str] = "postgres", max_connections: Optional[int] = 10,
+                 timeout: Optional[float] = 30.0) -> None:
+        if max_connections < 1:
+            raise ValueError(f"Invalid pool bound max {max_connections}")
+        self.__host = host
+        self.__username = username
+        self.__password = password
+        self.__port = port
+        self.__database = database
+        self.__max_connections = max_connections
+        self.__timeout = timeout
+        self.__idle: list = []
+        self.__opened = 0
+        self.__available: Optional[asyncio.Condition] = None
+        self.__local: ContextVar[Optional[dict]] = ContextVar(f"async_postgres_{id(self)}", default=None)
+
+    @staticmethod
+    async def __wait(connection) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            state = connection.poll()
+            if state == extensions.POLL_OK:
+                return
+            future = loop.create_future()
+            if state == extensions.POLL_READ:
+                loop.add_reader(connection.fileno(), _resolve, future)
+                try:
+                    await future
+                finally:
+                    loop.remove_reader(connection.fileno())
+            elif state == extensions.POLL_WRITE:
+                loop.add_writer(connection.fileno(), _resolve, future)
+                try:
+                    await future
+                finally:
+                    loop.remove_writer(connection.fileno())
+            else:
+                raise psycopg2.OperationalError(f"Unexpected connection poll state {state}")
+
+    async def __connect(self):
+        connection = psycopg2.connect(host=self.__host,
+                                      port=self.__port,
+                                      user=self.__username,
+                                      password=self.__password,
+                                      database=self.__database,
+                                      async_=True)
+        await self.__wait(connection)
+        return connection
+
+    async def __checkout(self):
+        if self.__available is None:
+            self.__available = asyncio.Condition()
+        async with self.__available:
+            try:
+                await asyncio.wait_for(self.__available.wait_for(
+                    lambda: len(self.__idle) > 0 or self.__opened < self.__max_connections), self.__timeout)
+            except asyncio.TimeoutError:
+                raise PoolTimeoutError(f"No database connection available after {self.__timeout} seconds")
+            connection = self.__idle.pop() if len(self.__idle) > 0 else None
+            if connection is None:
+                self.__opened += 1
+        if connection is not None and connection.closed == 0:
+            return connection
+        try:
+            return await self.__connect()
+        except BaseException:
+            async with self.__available:
+                self.__opened -= 1
+                self.__available.notify()
+            raise
+
+    async def __release(self, connection) -> None:
+        async with self.__available:
+            if connection.closed != 0:
+                self.__opened -= 1
+            else:
+                self.__idle.append(connection)
+            self.__available.notify()
+
+    async def __run(self, connection, sql_statement: str, variables: Optional[list]) -> list[tuple]:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(sql_statement, variables)
+            await self.__wait(connection)
+            if cursor.description is None:
+                return []
+            return cursor.fetchall()
+        except asyncio.CancelledError:
+            connection.close()
+            raise
+        finally:
+            cursor.close()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        state = self.__local.get()
+        if state is not None:
+            try:
+                yield
+            except BaseException:
+                state["rollback_only"] = True
+                raise
+            return
+        connection = await self.__checkout()
+        state = {"connection": connection, "rollback_only": False}
+        token = self.__local.set(state)
+        try:
+            await self.__run(connection, "BEGIN", None)
+            yield
+        except BaseException:
+            state["rollback_only"] = True
+            raise
+        finally:
+            self.__local.reset(token)
+            try:
+                if connection.closed == 0:
+                    await self.__run(connection, "ROLLBACK" if state["rollback_only"] else "COMMIT", None)
+            finally:
+                await self.__release(connection)
+
+    async def execute(self, sql_statement: str, variables: Optional[list] = None) -> Optional[list[tuple]]:
+        state = self.__local.get()
+        if state is not None:
+            try:
+                return await self.__run(state["connection"], sql_statement, variables)
+            except Exception:
+                state["rollback_only"] = True
+                raise
+        connection = await self.__checkout()
+        try:
+            return await self.__run(connection, sql_statement, variables)
+        finally:
+            await self.__release(connection)
+
+    async def execute_values(self, sql_statement: str, rows: list, page_size: Optional[int] = 1000) -> list[tuple]:
+        if VALUES_SLOT.search(sql_statement) is None:
+            raise ValueError(f"Statement has no VALUES %s slot for its rows: {sql_statement}")
+        results = []
+        async with self.transaction():
+            state = self.__local.get()
+            cursor = state["connection"].cursor()
+            try:
+                for start in range(0, len(rows), page_size):
+                    page = rows[start:start + page_size]
+                    values = b",".join(cursor.mogrify("(" + ",".join(["%s"] * len(row)) + ")", row) for row in page)
+                    statement = VALUES_SLOT.sub(lambda match: "VALUES " + values.decode(), sql_statement, 1)
+                    results.extend(await self.__run(state["connection"], statement, None))
+            except Exception:
+                state["rollback_only"] = True
+                raise
+            finally:
+                cursor.close()
+        return results
+
+    async def stream(self, sql_statement: str, variables: Optional[list] = None,
+                     batch_size: Optional[int] = 500) -> AsyncIterator[tuple]:
+        connection = await self.__checkout()
+        try:
+            await self.__run(connection, "BEGIN", None)
+            await self.__run(connection, "DECLARE banking_stream NO SCROLL CURSOR FOR " + sql_statement, variables)
+            while True:
+                rows = await self.__run(connection, f"FETCH {batch_size} FROM banking_stream", None)
+                if len(rows) == 0:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            try:
+                if connection.closed == 0:
+                    await self.__run(connection, "ROLLBACK", None)
+            finally:
+                await self.__release(connection)
+
+    def commit(self) -> None:
+        # statements outside transaction() autocommit and a transaction() scope commits on exit
+        pass
+
+    def rollback(self) -> None:
+        state = self.__local.get()
+        if state is not None:
+            state["rollback_only"] = True
+
+    async def close(self) -> None:
+        if self.__available is None:
+            return
+        async with self.__available:
+            for connection in self.__idle:
+                connection.close()
+            self.__opened -= len(self.__idle)
+            self.__idle.clear()
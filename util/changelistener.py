@@ -0,0 +1,142 @@
+import select
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+import psycopg2
+
+CHANNEL = "banking_changes"
+# NOTIFY payloads are limited to 8000 bytes, larger statements ask listeners to drop everything
+MAX_PAYLOAD = 7500
+
+
+def notify_trigger_sql(table_name: str, key_columns: list[str]) -> str:
+    new_keys = " || ':' || ".join(f"COALESCE(NEW.{column}::text, '')" for column in key_columns)
+    old_keys = " || ':' || ".join(f"COALESCE(OLD.{column}::text, '')" for column in key_columns)
+    return f"CREATE OR REPLACE FUNCTION {table_name}_notify_change() RETURNS trigger AS $$ " \
+           f"BEGIN " \
+           f"IF TG_OP = 'DELETE' THEN PERFORM pg_notify('{CHANNEL}', TG_TABLE_NAME || ':' || {old_keys}); " \
+           f"ELSE PERFORM pg_notify('{CHANNEL}', TG_TABLE_NAME || ':' || {new_keys}); " \
+           f"END IF; " \
+           f"RETURN NULL; " \
+           f"END; $$ LANGUAGE plpgsql; " \
+           f"DO $$ BEGIN " \
+           f"IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{table_name}_notify_change') THEN " \
+           f"CREATE TRIGGER {table_name}_notify_change AFTER INSERT OR UPDATE OR DELETE ON {table_name} " \
+           f"FOR EACH ROW EXECUTE PROCEDURE {table_name}_notify_change(); " \
+           f"END IF; " \
+           f"END $$;"
+
+
+def statement_notify_trigger_sql(table_name: str, key_columns: list[str]) -> str:
+    # one notification per statement carries the keys of every row it touched, e.g. all rows of a bulk insert
+    keys = " || ':' || ".join(f"COALESCE(r.{column}::text, '')" for column in key_columns)
+    sql = f"DROP TRIGGER IF EXISTS {table_name}_notify_change ON {table_name}; " \
+          f"DROP FUNCTION IF EXISTS {table_name}_notify_change(); " \
+          f"CREATE OR REPLACE FUNCTION {table_name}_notify_changes() RETURNS trigger AS $$ " \
+          f"DECLARE changed text; " \
+          f"BEGIN " \
+          f"IF TG_OP = 'DELETE' THEN SELECT string_agg({keys}, ';') INTO changed FROM old_rows r; " \
+          f"ELSE SELECT string_agg({keys}, ';') INTO changed FROM new_rows r; " \
+          f"END IF; " \
+          f"IF changed IS NULL THEN RETURN NULL; END IF; " \
+          f"IF length(changed) > {MAX_PAYLOAD} THEN changed := '*'; END IF; " \
+          f"PERFORM pg_notify('{CHANNEL}', TG_TABLE_NAME || ':' || changed); " \
+          f"RETURN NULL; " \
+          f"END; $$ LANGUAGE plpgsql;"
+    for event, transition_table in (("insert", "NEW TABLE AS new_rows"),
+                                    ("update", "NEW TABLE AS new_rows"),
+                                    ("delete", "OLD TABLE AS old_rows")):
+        trigger = f"{table_name}_notify_{event}"
+        sql += f" DO $$ BEGIN " \
+               f"IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{trigger}') THEN " \
+               f"CREATE TRIGGER {trigger} AFTER {event.upper()} ON {table_name} " \
+               f"REFERENCING {transition_table} " \
+               f"FOR EACH STATEMENT EXECUTE PROCEDURE {table_name}_notify_changes(); " \
+               f"END IF; " \
+               f"END $$;"
+    return sql
+
+
+class ChangeListener:
+
+    def __init__(self, host: str, username: str, password: str, port: Optional[int] = 5432,
+                 database: Optional[str] = "postgres", poll_interval: Optional[float] = 1.0,
+                 retry_interval: Optional[float] = 5.0) -> None:
+        self.__host = host
+        self.__username = username
+        self.__password = password
+        self.__port = port
+        self.__database = database
+        self.__poll_interval = poll_interval
+        self.__retry_interval = retry_interval
+        self.__subscribers: dict[str, list[Callable[[list[int]], None]]] = {}
+        self.__reset_callbacks: list[Callable[[], None]] = []
+        self.__lock = Lock()
+        self.__stopped = Event()
+        self.__thread: Optional[Thread] = None
+
+    def subscribe(self, table_name: str, callback: Callable[[list[int]], None]) -> None:
+        with self.__lock:
+            self.__subscribers.setdefault(table_name, []).append(callback)
+
+    def on_reset(self, callback: Callable[[], None]) -> None:
+        with self.__lock:
+            self.__reset_callbacks.append(callback)
+
+    def start(self) -> None:
+        if self.__thread is None:
+            self.__thread = Thread(target=self.__run, name="change-listener", daemon=True)
+            self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self) -> None:
+        while not self.__stopped.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(host=self.__host,
+                                              port=self.__port,
+                                              user=self.__username,
+                                              password=self.__password,
+                                              database=self.__database)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL};")
+                self.__reset()
+                while not self.__stopped.is_set():
+                    if select.select([connection], [], [], self.__poll_interval) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.__dispatch(connection.notifies.pop(0).payload)
+            except Exception as e:
+                print("Change listener error: " + str(e))
+                self.__reset()
+                self.__stopped.wait(self.__retry_interval)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def __reset(self) -> None:
+        with self.__lock:
+            callbacks = list(self.__reset_callbacks)
+        for callback in callbacks:
+            callback()
+
+    def __dispatch(self, payload: str) -> None:
+        table_name, _, rows = payload.partition(":")
+        if rows == "*":
+            self.__reset()
+            return
+        with self.__lock:
+            callbacks = list(self.__subscribers.get(table_name, []))
+        for row in rows.split(";"):
+            ids = [int(key) for key in row.split(":") if key != ""]
+            for callback in callbacks:
+                try:
+                    callback(ids)
+                except Exception as e:
+                    print("Change listener callback error: " + str(e))
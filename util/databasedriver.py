@@ -0,0 +1,86 @@
+import re
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from functools import lru_cache
+from threading import local
+from typing import Iterator, Optional
+
+statement_counter = local()
+MODIFYING_VERBS = {"INSERT", "UPDATE", "DELETE", "MERGE"}
+STATEMENT_VERBS = MODIFYING_VERBS | {"SELECT", "VALUES", "TABLE", "REPLACE"}
+SQL_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|\(|\)|\w+", re.DOTALL)
+
+
+def statement_count() -> int:
+    return getattr(statement_counter, "count", 0)
+
+
+def count_statement() -> None:
+    statement_counter.count = statement_count() + 1
+
+
+@lru_cache(maxsize=1024)
+def modifies_rows(sql_statement: str) -> bool:
+    # the verb after any WITH queries decides, and a WITH query that is itself an INSERT/UPDATE/DELETE counts too
+    depth = 0
+    previous = None
+    for token in SQL_TOKENS.findall(sql_statement):
+        if token[0] in "'\"-/":
+            continue
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        else:
+            word = token.upper()
+            if previous == "(" and word in MODIFYING_VERBS:
+                return True
+            if depth == 0 and word in STATEMENT_VERBS:
+                return word in MODIFYING_VERBS or word == "REPLACE"
+        previous = token
+    return False
+
+
+class DatabaseDriver(ABC):
+
+    @abstractmethod
+    def get_dialect(self) -> str:
+        pass
+
+    @abstractmethod
+    def transaction(self) -> AbstractContextManager:
+        pass
+
+    @abstractmethod
+    def execute(self, sql_statement: str, variables: Optional[list] = None) -> Optional[list[tuple]]:
+        pass
+
+    @abstractmethod
+    def execute_prepared(self, name: str, sql_statement: str,
+                         variables: Optional[list] = None) -> Optional[list[tuple]]:
+        pass
+
+    @abstractmethod
+    def execute_values(self, sql_statement: str, rows: list, page_size: Optional[int] = 1000) -> list[tuple]:
+        pass
+
+    @abstractmethod
+    def stream(self, sql_statement: str, variables: Optional[list] = None,
+               batch_size: Optional[int] = 500) -> Iterator[tuple]:
+        pass
+
+    @abstractmethod
+    def get_pool_stats(self) -> dict[str, int]:
+        pass
+
+    @abstractmethod
+    def commit(self) -> None:
+        pass
+
+    @abstractmethod
+    def rollback(self) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
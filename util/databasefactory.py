@@ -0,0 +1,30 @@
+from typing import Optional
+
+from util.databasedriver import DatabaseDriver
+from util.dataerror import DataError
+from util.postgresdb import PostgresDB
+from util.sqlitedb import SQLiteDB
+
+
+def create_database(data: dict, storage: Optional[str] = None, min_connections: Optional[int] = None,
+                    max_connections: Optional[int] = None) -> DatabaseDriver:
+    if storage is None:
+        storage = data.get("storage", "postgres")
+    if storage == "sqlite":
+        return SQLiteDB(data.get("sqlitePath", "banking.db"),
+                        commit_batch=data.get("sqliteCommitBatch", 1),
+                        commit_interval=data.get("sqliteCommitInterval", 0.002))
+    if storage == "postgres":
+        if min_connections is None:
+            min_connections = data.get("minConnections", 1)
+        if max_connections is None:
+            max_connections = data.get("maxConnections", 10)
+        return PostgresDB(data["host"], data["username"], data["password"],
+                          min_connections=min_connections,
+                          max_connections=max_connections,
+                          timeout=data.get("poolTimeout", 30.0),
+                          slow_query_ms=data.get("slowQueryMs"),
+                          explain_sample_rate=data.get("slowQueryExplainRate", 0.0),
+                          group_commit_size=data.get("groupCommitSize", 1),
+                          group_commit_window=data.get("groupCommitWindow", 0.002))
+    raise DataError(f"Unknown storage backend {storage}")
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+
+    def __init__(self, max_size: Optional[int] = 1024, ttl: Optional[float] = 30.0) -> None:
+        if max_size < 1:
+            raise ValueError(f"Cache size must be positive, size given {max_size}")
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__entries: OrderedDict = OrderedDict()
+        self.__generations: dict = {}
+        self.__epoch = 0
+        self.__lock = Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0] < monotonic():
+                if entry is not None:
+                    del self.__entries[key]
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry[1]
+
+    def generation(self, key: Hashable) -> tuple[int, int]:
+        with self.__lock:
+            return self.__epoch, self.__generations.get(key, 0)
+
+    def put(self, key: Hashable, value: Any, generation: Optional[tuple[int, int]] = None) -> None:
+        with self.__lock:
+            # a value read before an invalidation of its key is already stale and must not be cached
+            if generation is not None and generation != (self.__epoch, self.__generations.get(key, 0)):
+                return
+            self.__entries[key] = (monotonic() + self.__ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self.__lock:
+            self.__entries.pop(key, None)
+            self.__generations[key] = self.__generations.get(key, 0) + 1
+            if len(self.__generations) > self.__max_size:
+                # forgetting the counters moves the epoch, which turns away every read still in flight
+                self.__generations.clear()
+                self.__epoch += 1
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__generations.clear()
+            self.__epoch += 1
+
+    def get_hits(self) -> int:
+        return self.__hits
+
+    def get_misses(self) -> int:
+        return self.__misses
+
+    def __len__(self) -> int:
+        return len(self.__entries)
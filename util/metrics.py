@@ -0,0 +1,184 @@
+import re
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Optional
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names: tuple, values: tuple, extra: Optional[str] = None) -> str:
+    pairs = [f'{name}="{escape(str(value))}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if len(pairs) > 0 else ""
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@lru_cache(maxsize=1024)
+def statement_label(sql_statement: str) -> str:
+    label = re.sub(r"\s+", " ", sql_statement).strip()
+    label = re.sub(r"(%s, )+%s", "%s, ...", label)
+    if len(label) <= 120:
+        return label
+    return label[:80] + " ... " + label[-35:]
+
+
+class Counter:
+
+    def __init__(self, name: str, description: str, labels: Optional[tuple] = ()) -> None:
+        self.__name = name
+        self.__description = description
+        self.__labels = labels
+        self.__lock = Lock()
+        self.__values: dict[tuple, float] = {}
+
+    def inc(self, amount: Optional[float] = 1, *label_values) -> None:
+        with self.__lock:
+            self.__values[label_values] = self.__values.get(label_values, 0) + amount
+
+    def get(self, *label_values) -> float:
+        return self.__values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.__name} {self.__description}", f"# TYPE {self.__name} counter"]
+        with self.__lock:
+            for label_values, value in sorted(self.__values.items()):
+                lines.append(f"{self.__name}{format_labels(self.__labels, label_values)} {format_value(value)}")
+        return lines
+
+
+class Gauge:
+
+    def __init__(self, name: str, description: str, labels: Optional[tuple] = ()) -> None:
+        self.__name = name
+        self.__description = description
+        self.__labels = labels
+        self.__lock = Lock()
+        self.__values: dict[tuple, float] = {}
+
+    def set(self, value: float, *label_values) -> None:
+        with self.__lock:
+            self.__values[label_values] = value
+
+    def get(self, *label_values) -> float:
+        return self.__values.get(label_values, 0)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__values.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.__name} {self.__description}", f"# TYPE {self.__name} gauge"]
+        with self.__lock:
+            for label_values, value in sorted(self.__values.items()):
+                lines.append(f"{self.__name}{format_labels(self.__labels, label_values)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name: str, description: str, labels: Optional[tuple] = (),
+                 buckets: Optional[tuple] = DEFAULT_BUCKETS) -> None:
+        self.__name = name
+        self.__description = description
+        self.__labels = labels
+        self.__buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.__lock = Lock()
+        self.__values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        with self.__lock:
+            entry = self.__values.setdefault(label_values, [[0] * len(self.__buckets), 0.0])
+            for i, bound in enumerate(self.__buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+
+    def get_count(self, *label_values) -> int:
+        counts = self.__values.get(label_values, [[0], 0.0])[0]
+        return sum(counts)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.__name} {self.__description}", f"# TYPE {self.__name} histogram"]
+        with self.__lock:
+            for label_values, (counts, total) in sorted(self.__values.items()):
+                cumulative = 0
+                for bound, count in zip(self.__buckets, counts):
+                    cumulative += count
+                    labels = format_labels(self.__labels, label_values, f'le="{format_value(bound)}"')
+                    lines.append(f"{self.__name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.__labels, label_values)
+                lines.append(f"{self.__name}_sum{labels} {format_value(total)}")
+                lines.append(f"{self.__name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self) -> None:
+        self.__metrics: list = []
+        self.__collectors: list[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.__metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self.__collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], None]) -> None:
+        if collector in self.__collectors:
+            self.__collectors.remove(collector)
+
+    def render(self) -> str:
+        for collector in list(self.__collectors):
+            try:
+                collector()
+            except Exception as e:
+                print("Metrics Error: " + str(e))
+        lines = []
+        for metric in self.__metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram("banking_request_duration_seconds", "HTTP request latency by route",
+                                               ("method", "route", "status")))
+SQL_DURATION = REGISTRY.register(Histogram("banking_sql_duration_seconds", "SQL statement latency by statement",
+                                           ("statement",)))
+SQL_ROWS = REGISTRY.register(Counter("banking_sql_rows_total", "Rows returned by SQL statements", ("statement",)))
+SQL_ERRORS = REGISTRY.register(Counter("banking_sql_errors_total", "Failed SQL statements", ("statement",)))
+POOL_CONNECTIONS = REGISTRY.register(Gauge("banking_pool_connections", "Database connections by state",
+                                           ("state",)))
+CACHE_LOOKUPS = REGISTRY.register(Counter("banking_cache_lookups_total", "Cache lookups by result",
+                                          ("cache", "result")))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge("banking_cache_hit_ratio", "Share of cache lookups that hit", ("cache",)))
+CACHE_ENTRIES = REGISTRY.register(Gauge("banking_cache_entries", "Entries held by each cache", ("cache",)))
+LOCK_WAIT = REGISTRY.register(Histogram("banking_account_lock_wait_seconds",
+                                        "Time spent waiting for a contended account lock"))
+LOCK_TIMEOUTS = REGISTRY.register(Counter("banking_account_lock_timeouts_total",
+                                          "Operations rejected after waiting too long for an account lock"))
+LOCK_HOT_ACCOUNTS = REGISTRY.register(Gauge("banking_account_lock_contentions",
+                                            "Contended lock acquisitions of the currently most contended accounts",
+                                            ("account",)))
+
+
+def observe_statement(sql_statement: str, seconds: float, rows: Optional[int], failed: Optional[bool] = False) -> None:
+    label = statement_label(sql_statement)
+    SQL_DURATION.observe(seconds, label)
+    if rows:
+        SQL_ROWS.inc(rows, label)
+    if failed:
+        SQL_ERRORS.inc(1, label)
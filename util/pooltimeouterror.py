@@ -0,0 +1,6 @@
+class PoolTimeoutError(Exception):
+    def __init__(self, message: str) -> None:
+        self.message = message
+
+    def __str__(self) -> str:
+        return self.message
@@ -1,38 +1,357 @@
-from typing import Optional
+from contextlib import contextmanager
+from queue import Empty, Queue
+from threading import Condition, Event, Thread, local
+from time import monotonic, perf_counter
+from typing import Iterator, Optional
+from weakref import WeakKeyDictionary
 import psycopg2
+from psycopg2.errors import InvalidSqlStatementName
+from psycopg2.extras import execute_values
 
+from util.databasedriver import DatabaseDriver, count_statement, modifies_rows
+from util.metrics import observe_statement
+from util.pooltimeouterror import PoolTimeoutError
+from util.slowquerylog import SlowQueryLog
 
-class PostgresDB:
+
+class GroupedWrite:
+
+    __slots__ = ("name", "sql_statement", "variables", "result", "error", "done")
+
+    def __init__(self, name: Optional[str], sql_statement: str, variables: Optional[list]) -> None:
+        self.name = name
+        self.sql_statement = sql_statement
+        self.variables = variables
+        self.result: Optional[list[tuple]] = None
+        self.error: Optional[Exception] = None
+        self.done = Event()
+
+
+class PostgresDB(DatabaseDriver):
 
     def __init__(self, host: str, username: str, password: str, port: Optional[int] = 5432,
-                 database: Optional[str] = "postgres") -> None:
+                 database: Optional[str] = "postgres", min_connections: Optional[int] = 1,
+                 max_connections: Optional[int] = 10, timeout: Optional[float] = 30.0,
+                 slow_query_ms: Optional[float] = None, explain_sample_rate: Optional[float] = 0.0,
+                 group_commit_size: Optional[int] = 1, group_commit_window: Optional[float] = 0.002) -> None:
+        if min_connections < 0 or max_connections < 1 or min_connections > max_connections:
+            raise ValueError(f"Invalid pool bounds min {min_connections}, max {max_connections}")
         self.__host = host
         self.__username = username
         self.__password = password
         self.__port = port
         self.__database = database
-        self.__pg = psycopg2.connect(host=host, port=port, user=username, password=password, database=database)
+        self.__max_connections = max_connections
+        self.__timeout = timeout
+        self.__available = Condition()
+        self.__idle: list = [self.__connect() for _ in range(min_connections)]
+        self.__opened = min_connections
+        self.__waiting = 0
+        self.__local = local()
+        self.__prepared = WeakKeyDictionary()
+        self.__slow_queries = None
+        if slow_query_ms is not None:
+            self.__slow_queries = SlowQueryLog(slow_query_ms, explain_sample_rate, self.__connect)
+        self.__group_commit_size = group_commit_size
+        self.__group_commit_window = group_commit_window
+        self.__writes: Queue = Queue()
+        self.__committer = None
+        if self.__group_commit_size > 1:
+            self.__committer = Thread(target=self.__commit_groups, name="postgres-group-commit", daemon=True)
+            self.__committer.start()
 
-    def execute(self, sql_statement: str, variables: Optional[list] = None) -> Optional[list[tuple]]:
+    def get_dialect(self) -> str:
+        return "postgres"
+
+    def __connect(self):
+        connection = psycopg2.connect(host=self.__host,
+                                      port=self.__port,
+                                      user=self.__username,
+                                      password=self.__password,
+                                      database=self.__database)
+        connection.autocommit = True
+        return connection
+
+    def __checkout(self):
+        deadline = monotonic() + self.__timeout
+        with self.__available:
+            while len(self.__idle) == 0 and self.__opened >= self.__max_connections:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection available after {self.__timeout} seconds")
+                self.__waiting += 1
+                try:
+                    self.__available.wait(remaining)
+                finally:
+                    self.__waiting -= 1
+            connection = self.__idle.pop() if len(self.__idle) > 0 else None
+            if connection is None:
+                self.__opened += 1
+        if connection is not None and connection.closed == 0:
+            return connection
         try:
-            if self.__pg.closed != 0:
-                self.__pg = psycopg2.connect(host=self.__host,
-                                             port=self.__port,
-                                             user=self.__username,
-                                             password=self.__password,
-                                             database=self.__database)
-            cursor = self.__pg.cursor()
-            if variables is None:
-                cursor.execute(sql_statement)
+            return self.__connect()
+        except Exception:
+            with self.__available:
+                self.__opened -= 1
+                self.__available.notify()
+            raise
+
+    def __release(self, connection) -> None:
+        with self.__available:
+            if connection.closed != 0:
+                self.__opened -= 1
             else:
+                self.__idle.append(connection)
+            self.__available.notify()
+
+    def __run(self, connection, sql_statement: str, variables: Optional[list],
+              label: Optional[str] = None, logged: Optional[str] = None) -> list[tuple]:
+        count_statement()
+        started = perf_counter()
+        rows = None
+        try:
+            with connection.cursor() as cursor:
                 cursor.execute(sql_statement, variables)
-            return cursor.fetchall()
+                rows = [] if cursor.description is None else cursor.fetchall()
+                return rows
+        finally:
+            elapsed = perf_counter() - started
+            observe_statement(label or sql_statement, elapsed, None if rows is None else len(rows), rows is None)
+            if self.__slow_queries is not None:
+                self.__slow_queries.observe(logged or sql_statement, variables, elapsed)
+
+    def __run_prepared(self, connection, name: str, sql_statement: str, variables: Optional[list],
+                       prefix: Optional[str] = "") -> list[tuple]:
+        prepared = self.__prepared.setdefault(connection, set())
+        if name not in prepared:
+            parts = sql_statement.split("%s")
+            numbered = parts[0] + "".join(f"${i}{part}" for i, part in enumerate(parts[1:], start=1))
+            self.__run(connection, f"{prefix}PREPARE {name} AS {numbered}", None, f"PREPARE {name}")
+            prepared.add(name)
+            prefix = ""
+        placeholders = "" if not variables else " (" + ", ".join(["%s"] * len(variables)) + ")"
+        try:
+            return self.__run(connection, f"{prefix}EXECUTE {name}{placeholders}", variables, f"EXECUTE {name}",
+                              sql_statement)
+        except InvalidSqlStatementName:
+            # the session lost its prepared statements (e.g. DISCARD ALL behind a pooler), prepare again
+            prepared.clear()
+            if not connection.autocommit:
+                raise
+            return self.__run_prepared(connection, name, sql_statement, variables, prefix)
+
+    def __groups_write(self, sql_statement: str) -> bool:
+        return self.__committer is not None and getattr(self.__local, "connection", None) is None \
+            and modifies_rows(sql_statement)
+
+    def __submit(self, name: Optional[str], sql_statement: str, variables: Optional[list]) -> list[tuple]:
+        # the committer thread runs the statement, but the request that issued it is the one to count it against
+        count_statement()
+        write = GroupedWrite(name, sql_statement, variables)
+        self.__writes.put(write)
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    def __commit_groups(self) -> None:
+        closing = False
+        while not closing:
+            write = self.__writes.get()
+            if write is None:
+                break
+            group = [write]
+            deadline = monotonic() + self.__group_commit_window
+            while len(group) < self.__group_commit_size:
+                try:
+                    write = self.__writes.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+                if write is None:
+                    closing = True
+                    break
+                group.append(write)
+            self.__commit_group(group)
+
+    def __commit_group(self, group: list[GroupedWrite]) -> None:
+        try:
+            connection = self.__checkout()
         except Exception as e:
-            print("Postgres Error: " + str(e))
-            return []
+            for write in group:
+                write.error = e
+                write.done.set()
+            return
+        connection.autocommit = False
+        try:
+            for write in group:
+                try:
+                    write.result = self.__run_grouped(connection, write)
+                except InvalidSqlStatementName:
+                    # __run_prepared forgot the session's statements, so the second attempt prepares again
+                    self.__undo_grouped(connection)
+                    try:
+                        write.result = self.__run_grouped(connection, write)
+                    except Exception as e:
+                        write.error = e
+                        self.__undo_grouped(connection)
+                except Exception as e:
+                    write.error = e
+                    self.__undo_grouped(connection)
+            connection.commit()
+        except Exception as e:
+            for write in group:
+                write.result = None
+                write.error = e
+            if connection.closed == 0:
+                connection.rollback()
+        finally:
+            if connection.closed == 0:
+                connection.autocommit = True
+            self.__release(connection)
+            for write in group:
+                write.done.set()
+
+    def __run_grouped(self, connection, write: GroupedWrite) -> list[tuple]:
+        # the savepoint travels in the same round trip, so a failed write only undoes itself
+        if write.name is None:
+            return self.__run(connection, "SAVEPOINT grouped_write; " + write.sql_statement, write.variables,
+                              write.sql_statement)
+        return self.__run_prepared(connection, write.name, write.sql_statement, write.variables,
+                                   "SAVEPOINT grouped_write; ")
+
+    @staticmethod
+    def __undo_grouped(connection) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("ROLLBACK TO SAVEPOINT grouped_write")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if getattr(self.__local, "connection", None) is not None:
+            try:
+                yield
+            except BaseException:
+                self.__local.rollback_only = True
+                raise
+            return
+        connection = self.__checkout()
+        connection.autocommit = False
+        self.__local.connection = connection
+        self.__local.rollback_only = False
+        try:
+            yield
+        except BaseException:
+            self.__local.rollback_only = True
+            raise
+        finally:
+            try:
+                if self.__local.rollback_only:
+                    connection.rollback()
+                else:
+                    connection.commit()
+            finally:
+                self.__local.connection = None
+                if connection.closed == 0:
+                    connection.autocommit = True
+                self.__release(connection)
+
+    def execute(self, sql_statement: str, variables: Optional[list] = None) -> Optional[list[tuple]]:
+        if self.__groups_write(sql_statement):
+            return self.__submit(None, sql_statement, variables)
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            try:
+                return self.__run(connection, sql_statement, variables)
+            except Exception:
+                self.__local.rollback_only = True
+                raise
+        connection = self.__checkout()
+        try:
+            return self.__run(connection, sql_statement, variables)
+        finally:
+            self.__release(connection)
+
+    def execute_prepared(self, name: str, sql_statement: str,
+                         variables: Optional[list] = None) -> Optional[list[tuple]]:
+        if self.__groups_write(sql_statement):
+            return self.__submit(name, sql_statement, variables)
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            try:
+                return self.__run_prepared(connection, name, sql_statement, variables)
+            except Exception:
+                self.__local.rollback_only = True
+                raise
+        connection = self.__checkout()
+        try:
+            return self.__run_prepared(connection, name, sql_statement, variables)
+        finally:
+            self.__release(connection)
+
+    def execute_values(self, sql_statement: str, rows: list, page_size: Optional[int] = 1000) -> list[tuple]:
+        with self.transaction():
+            started = perf_counter()
+            try:
+                count_statement()
+                with self.__local.connection.cursor() as cursor:
+                    results = execute_values(cursor, sql_statement, rows, page_size=page_size, fetch=True)
+                elapsed = perf_counter() - started
+                observe_statement(sql_statement, elapsed, len(results))
+                if self.__slow_queries is not None:
+                    self.__slow_queries.observe(sql_statement, [rows], elapsed)
+                return results
+            except Exception:
+                observe_statement(sql_statement, perf_counter() - started, None, True)
+                self.__local.rollback_only = True
+                raise
+
+    def stream(self, sql_statement: str, variables: Optional[list] = None,
+               batch_size: Optional[int] = 500) -> Iterator[tuple]:
+        connection = self.__checkout()
+        connection.autocommit = False
+        started = perf_counter()
+        streamed = 0
+        failed = True
+        try:
+            count_statement()
+            with connection.cursor(name="banking_stream") as cursor:
+                cursor.execute(sql_statement, variables)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if len(rows) == 0:
+                        break
+                    streamed += len(rows)
+                    yield from rows
+            failed = False
+        finally:
+            observe_statement(sql_statement, perf_counter() - started, streamed, failed)
+            if connection.closed == 0:
+                connection.rollback()
+                connection.autocommit = True
+            self.__release(connection)
+
+    def get_pool_stats(self) -> dict[str, int]:
+        with self.__available:
+            return {"open": self.__opened, "idle": len(self.__idle), "in_use": self.__opened - len(self.__idle),
+                    "waiting": self.__waiting, "max": self.__max_connections}
 
     def commit(self) -> None:
-        self.__pg.commit()
+        # statements outside transaction() autocommit, or commit with their group, and a transaction() scope
+        # commits on exit
+        pass
 
     def rollback(self) -> None:
-        self.__pg.rollback()
+        if getattr(self.__local, "connection", None) is not None:
+            self.__local.rollback_only = True
+
+    def close(self) -> None:
+        if self.__committer is not None:
+            self.__writes.put(None)
+            self.__committer.join()
+        if self.__slow_queries is not None:
+            self.__slow_queries.close()
+        with self.__available:
+            for connection in self.__idle:
+                connection.close()
+            self.__opened -= len(self.__idle)
+            self.__idle.clear()
@@ -0,0 +1,95 @@
+from math import inf
+from typing import Mapping, Optional
+
+from util.dataerror import DataError
+
+
+def parse_names(json_dict: dict) -> tuple[Optional[str], Optional[str]]:
+    first_name = None
+    last_name = None
+    for k, v in json_dict.items():
+        if k == "firstName":
+            first_name = str(v)
+        elif k == "lastName":
+            last_name = str(v)
+    return first_name, last_name
+
+
+def parse_account_type(json_dict: dict) -> str:
+    account_type = None
+    for k, v in json_dict.items():
+        if k == "accountType":
+            account_type = str(v)
+    if account_type is None:
+        raise DataError("Missing accountType in body")
+    return account_type
+
+
+def parse_account_update(json_dict: dict) -> tuple[Optional[str], Optional[float]]:
+    account_type = None
+    balance = None
+    for k, v in json_dict.items():
+        if k == "accountType":
+            account_type = str(v)
+        elif k == "balance":
+            balance = float(v)
+    return account_type, balance
+
+
+def parse_balance_change(json_dict: dict) -> int:
+    total = 0
+    for k, v in json_dict.items():
+        if k == "deposit":
+            total += int(v)
+        elif k == "withdraw":
+            total += -1 * int(v)
+    return total
+
+
+def parse_amount(json_dict: dict) -> int:
+    funds = 0
+    for k, v in json_dict.items():
+        if k == "amount":
+            funds += int(v)
+    return funds
+
+
+def parse_transfers(json_dict: dict) -> tuple[list[tuple[int, int, int]], bool]:
+    atomic = True
+    transfers = []
+    for k, v in json_dict.items():
+        if k == "atomic":
+            if not isinstance(v, bool):
+                raise DataError(f"atomic must be true or false, received {v}")
+            atomic = v
+        elif k == "transfers":
+            for transfer in v:
+                transfers.append((int(transfer["from"]), int(transfer["to"]), int(transfer["amount"])))
+    return transfers, atomic
+
+
+def parse_page_args(args: Mapping[str, str]) -> tuple[Optional[int], Optional[int], bool]:
+    after = None
+    limit = None
+    stream = False
+    for k, v in args.items():
+        if k == "after":
+            after = int(v)
+        elif k == "limit":
+            limit = int(v)
+            if limit < 1:
+                raise ValueError(f"limit must be positive, received {limit}")
+        elif k == "stream":
+            stream = v.lower() in ("1", "true", "yes")
+    return after, limit, stream
+
+
+def parse_balance_range(args: Mapping[str, str]) -> tuple[float, float]:
+    min_bal = 0.0
+    max_bal = inf
+    for k, v in args.items():
+        if k == "amountLessThan":
+            max_bal = int(v)
+        elif k == "amountGreaterThan":
+            min_bal = int(v)
+    return min_bal, max_bal
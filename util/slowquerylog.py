@@ -0,0 +1,119 @@
+import json
+import logging
+import random
+import re
+import sys
+from queue import Full, Queue
+from threading import Thread
+from time import time
+from typing import Callable, Optional
+
+logger = logging.getLogger("banking.slowqueries")
+# row locks, advisory locks, notifications and sequences act even when the surrounding SELECT only reads
+SIDE_EFFECTS = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b"
+                          r"|\b(pg_\w+|nextval|setval|set_config|dblink\w*|lo_\w+)\s*\(", re.IGNORECASE)
+
+
+def redact(variables: Optional[list]) -> list[str]:
+    redacted = []
+    for value in variables or []:
+        if isinstance(value, (list, tuple)):
+            redacted.append(f"<{type(value).__name__}[{len(value)}]>")
+        else:
+            redacted.append(f"<{type(value).__name__}>")
+    return redacted
+
+
+def explain_analyzes(sql_statement: str) -> bool:
+    # EXPLAIN ANALYZE executes the statement again, so only plain reads from tables may run under it
+    if sql_statement.lstrip()[:6].upper() != "SELECT" or re.search(r"\bFROM\b", sql_statement, re.IGNORECASE) is None:
+        return False
+    return SIDE_EFFECTS.search(sql_statement) is None
+
+
+def find_caller(package: Optional[str] = "daos") -> Optional[str]:
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module == package or module.startswith(package + "."):
+            owner = frame.f_locals.get("self")
+            method = frame.f_code.co_name
+            if owner is not None:
+                return f"{module}.{type(owner).__name__}.{method}"
+            return f"{module}.{method}"
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+
+    def __init__(self, threshold_ms: float, explain_sample_rate: Optional[float] = 0.0,
+                 connect: Optional[Callable] = None, queue_size: Optional[int] = 100) -> None:
+        self.__threshold = threshold_ms / 1000
+        self.__threshold_ms = threshold_ms
+        self.__explain_sample_rate = explain_sample_rate if connect is not None else 0.0
+        self.__connect = connect
+        self.__queue: Queue = Queue(queue_size)
+        self.__worker = None
+        if self.__explain_sample_rate > 0:
+            self.__worker = Thread(target=self.__explain_queued, name="slow-query-explain", daemon=True)
+            self.__worker.start()
+
+    def observe(self, sql_statement: str, variables: Optional[list], seconds: float) -> None:
+        if seconds < self.__threshold:
+            return
+        record = {"event": "slow_query",
+                  "timestamp": round(time(), 3),
+                  "duration_ms": round(seconds * 1000, 3),
+                  "threshold_ms": self.__threshold_ms,
+                  "statement": re.sub(r"\s+", " ", sql_statement).strip(),
+                  "parameters": redact(variables),
+                  "caller": find_caller()}
+        # writes are never explained, locking or side-effecting reads are planned without running them
+        if record["statement"][:6].upper() == "SELECT" and random.random() < self.__explain_sample_rate:
+            try:
+                self.__queue.put_nowait((record, sql_statement, variables, explain_analyzes(sql_statement)))
+                return
+            except Full:
+                record["plan_skipped"] = "explain queue full"
+        logger.warning(json.dumps(record))
+
+    def __explain_queued(self) -> None:
+        connection = None
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+            record, sql_statement, variables, analyze = item
+            try:
+                if connection is None or connection.closed != 0:
+                    connection = self.__connect()
+                    connection.autocommit = False
+                parts = sql_statement.split("%s")
+                numbered = parts[0] + "".join(f"${i}{part}" for i, part in enumerate(parts[1:], start=1))
+                placeholders = "" if not variables else " (" + ", ".join(["%s"] * len(variables)) + ")"
+                with connection.cursor() as cursor:
+                    # a generic plan keeps the bound values out of the logged conditions
+                    cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+                    cursor.execute(f"PREPARE banking_explain AS {numbered}")
+                    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+                    cursor.execute(f"EXPLAIN ({options}) EXECUTE banking_explain{placeholders}", variables)
+                    record["plan"] = cursor.fetchall()[0][0]
+                    record["plan_analyzed"] = analyze
+                    cursor.execute("DEALLOCATE banking_explain")
+            except Exception as e:
+                record["plan_error"] = str(e)
+                if connection is not None:
+                    # drop the session so a half-finished PREPARE cannot linger
+                    connection.close()
+            finally:
+                if connection is not None and connection.closed == 0:
+                    connection.rollback()
+            logger.warning(json.dumps(record))
+        if connection is not None:
+            connection.close()
+
+    def close(self) -> None:
+        if self.__worker is not None:
+            self.__queue.put(None)
+            self.__worker.join()
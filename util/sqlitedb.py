@@ -0,0 +1,215 @@
+import re
+import sqlite3
+from contextlib import contextmanager
+from threading import Event, Lock, RLock, Thread, local
+from time import perf_counter
+from typing import Iterator, Optional
+
+from util.databasedriver import DatabaseDriver, count_statement, modifies_rows
+from util.metrics import observe_statement
+
+READ_STATEMENT = re.compile(r"\s*(SELECT|WITH|VALUES)\b", re.IGNORECASE)
+
+
+class CommitBatch:
+
+    __slots__ = ("error", "done")
+
+    def __init__(self) -> None:
+        self.error = None
+        self.done = Event()
+
+
+class SQLiteDB(DatabaseDriver):
+
+    def __init__(self, path: Optional[str] = "banking.db", commit_batch: Optional[int] = 1,
+                 commit_interval: Optional[float] = 0.002, timeout: Optional[float] = 30.0) -> None:
+        self.__path = path
+        self.__commit_batch = commit_batch
+        self.__commit_interval = commit_interval
+        self.__timeout = timeout
+        self.__lock = RLock()
+        self.__local = local()
+        self.__connection = self.__connect()
+        # WAL readers only see committed rows and never wait for the writer, so reads skip the open batch
+        self.__reader = None if path == ":memory:" else self.__connect()
+        self.__read_lock = Lock()
+        self.__pending = 0
+        self.__batch = CommitBatch()
+        self.__opened = Event()
+        self.__closed = Event()
+        self.__flusher = None
+        if self.__commit_batch > 1:
+            self.__flusher = Thread(target=self.__flush_periodically, name="sqlite-commit-flusher", daemon=True)
+            self.__flusher.start()
+
+    def get_dialect(self) -> str:
+        return "sqlite"
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.__path, timeout=self.__timeout, isolation_level=None,
+                                     check_same_thread=False, cached_statements=256)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @staticmethod
+    def __run(connection: sqlite3.Connection, sql_statement: str, variables: Optional[list],
+              label: Optional[str] = None) -> list[tuple]:
+        count_statement()
+        started = perf_counter()
+        rows = None
+        try:
+            rows = connection.execute(sql_statement.replace("%s", "?"), variables or []).fetchall()
+            return rows
+        finally:
+            observe_statement(label or sql_statement, perf_counter() - started,
+                              None if rows is None else len(rows), rows is None)
+
+    def __flush(self) -> None:
+        if self.__pending > 0:
+            batch = self.__batch
+            self.__pending = 0
+            self.__batch = CommitBatch()
+            try:
+                self.__connection.execute("COMMIT")
+            except Exception as e:
+                batch.error = e
+                if self.__connection.in_transaction:
+                    self.__connection.execute("ROLLBACK")
+            finally:
+                batch.done.set()
+
+    def __flush_periodically(self) -> None:
+        while True:
+            self.__opened.wait()
+            if self.__closed.wait(self.__commit_interval):
+                return
+            with self.__lock:
+                self.__opened.clear()
+                self.__flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if getattr(self.__local, "active", False):
+            try:
+                yield
+            except BaseException:
+                self.__local.rollback_only = True
+                raise
+            return
+        with self.__lock:
+            self.__flush()
+            self.__connection.execute("BEGIN IMMEDIATE")
+            self.__local.active = True
+            self.__local.rollback_only = False
+            try:
+                yield
+            except BaseException:
+                self.__local.rollback_only = True
+                raise
+            finally:
+                self.__local.active = False
+                self.__connection.execute("ROLLBACK" if self.__local.rollback_only else "COMMIT")
+
+    def execute(self, sql_statement: str, variables: Optional[list] = None) -> Optional[list[tuple]]:
+        if getattr(self.__local, "active", False):
+            # this thread's transaction() already holds the lock and the connection
+            try:
+                return self.__run(self.__connection, sql_statement, variables)
+            except Exception:
+                self.__local.rollback_only = True
+                raise
+        if modifies_rows(sql_statement):
+            return self.__write(sql_statement, variables)
+        if self.__reader is not None and READ_STATEMENT.match(sql_statement) is not None:
+            with self.__read_lock:
+                return self.__run(self.__reader, sql_statement, variables)
+        with self.__lock:
+            # PRAGMAs, DDL and in memory reads run on their own, never inside a batch of unrelated rows
+            self.__flush()
+            return self.__run(self.__connection, sql_statement, variables)
+
+    def __write(self, sql_statement: str, variables: Optional[list]) -> list[tuple]:
+        with self.__lock:
+            if self.__commit_batch <= 1:
+                return self.__run(self.__connection, sql_statement, variables)
+            if self.__pending == 0:
+                self.__connection.execute("BEGIN")
+                self.__opened.set()
+            batch = self.__batch
+            try:
+                rows = self.__run(self.__connection, sql_statement, variables)
+            finally:
+                self.__pending += 1
+                if self.__pending >= self.__commit_batch:
+                    self.__flush()
+        # like the PostgreSQL group commit, a batched write only returns once the commit covering it is done
+        batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+        return rows
+
+    def execute_prepared(self, name: str, sql_statement: str,
+                         variables: Optional[list] = None) -> Optional[list[tuple]]:
+        # sqlite3 keeps compiled statements in the connection's statement cache
+        return self.execute(sql_statement, variables)
+
+    def execute_values(self, sql_statement: str, rows: list, page_size: Optional[int] = 1000) -> list[tuple]:
+        results = []
+        with self.transaction():
+            for start in range(0, len(rows), page_size):
+                page = rows[start:start + page_size]
+                values = ", ".join("(" + ", ".join(["%s"] * len(row)) + ")" for row in page)
+                # an exception leaving the transaction() scope rolls the whole insert back
+                results += self.__run(self.__connection, sql_statement.replace("%s", values, 1),
+                                      [value for row in page for value in row], sql_statement)
+        return results
+
+    def stream(self, sql_statement: str, variables: Optional[list] = None,
+               batch_size: Optional[int] = 500) -> Iterator[tuple]:
+        if self.__path == ":memory:":
+            yield from self.execute(sql_statement, variables)
+            return
+        # WAL lets a second connection read a consistent snapshot without holding up writers
+        connection = sqlite3.connect(self.__path, timeout=self.__timeout, isolation_level=None)
+        started = perf_counter()
+        streamed = 0
+        failed = True
+        try:
+            count_statement()
+            cursor = connection.execute(sql_statement.replace("%s", "?"), variables or [])
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if len(rows) == 0:
+                    break
+                streamed += len(rows)
+                yield from rows
+            failed = False
+        finally:
+            observe_statement(sql_statement, perf_counter() - started, streamed, failed)
+            connection.close()
+
+    def get_pool_stats(self) -> dict[str, int]:
+        return {"open": 1 if self.__reader is None else 2, "pending_writes": self.__pending}
+
+    def commit(self) -> None:
+        # statements outside transaction() are committed in batches and a transaction() scope commits on exit
+        pass
+
+    def rollback(self) -> None:
+        if getattr(self.__local, "active", False):
+            self.__local.rollback_only = True
+
+    def close(self) -> None:
+        self.__closed.set()
+        self.__opened.set()
+        if self.__flusher is not None:
+            self.__flusher.join()
+        with self.__lock:
+            self.__flush()
+            self.__connection.close()
+        if self.__reader is not None:
+            with self.__read_lock:
+                self.__reader.close()
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from heapq import nlargest
+from threading import Lock
+from time import perf_counter
+from typing import Iterator, Optional
+
+from util.locktimeouterror import LockTimeoutError
+from util.metrics import LOCK_TIMEOUTS, LOCK_WAIT
+
+
+class StripedLock:
+
+    def __init__(self, stripes: Optional[int] = 64, timeout: Optional[float] = None,
+                 tracked: Optional[int] = 1024) -> None:
+        if stripes < 1:
+            raise ValueError(f"Lock stripes must be positive, stripes given {stripes}")
+        if tracked < 2:
+            raise ValueError(f"Tracked accounts must be at least 2, tracked given {tracked}")
+        self.__locks = [Lock() for _ in range(stripes)]
+        self.__timeout = timeout
+        self.__tracked = tracked
+        self.__stats_lock = Lock()
+        self.__contentions: dict[int, int] = {}
+
+    @contextmanager
+    def hold(self, *account_ids: int) -> Iterator[None]:
+        stripes = {}
+        for account_id in account_ids:
+            stripes.setdefault(hash(account_id) % len(self.__locks), account_id)
+        acquired = []
+        try:
+            # a fixed stripe order keeps multi-account holders from deadlocking each other
+            for stripe in sorted(stripes):
+                lock = self.__locks[stripe]
+                if not lock.acquire(blocking=False):
+                    self.__acquire_contended(lock, stripes[stripe])
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def __acquire_contended(self, lock: Lock, account_id: int) -> None:
+        with self.__stats_lock:
+            if account_id not in self.__contentions and len(self.__contentions) >= self.__tracked:
+                # only the busier half survives, so a long running worker keeps a bounded map of its hot accounts
+                self.__contentions = dict(nlargest(self.__tracked // 2, self.__contentions.items(),
+                                                   key=lambda item: item[1]))
+            self.__contentions[account_id] = self.__contentions.get(account_id, 0) + 1
+        started = perf_counter()
+        acquired = lock.acquire(timeout=-1 if self.__timeout is None else self.__timeout)
+        LOCK_WAIT.observe(perf_counter() - started)
+        if not acquired:
+            LOCK_TIMEOUTS.inc()
+            raise LockTimeoutError(f"Account {account_id} is busy, no lock after {self.__timeout} seconds")
+
+    def get_contentions(self, account_id: int) -> int:
+        return self.__contentions.get(account_id, 0)
+
+    def most_contended(self, count: Optional[int] = 10) -> list[tuple[int, int]]:
+        with self.__stats_lock:
+            return nlargest(count, self.__contentions.items(), key=lambda item: item[1])